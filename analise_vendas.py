@@ -21,7 +21,7 @@ def analisar_catalogo():
     # Buscar todos os produtos
     cursor.execute("""
         SELECT codigo, categoria, titulo, preco_varejo, preco_atacado, 
-               peso, imagem 
+               peso, COALESCE(imagem_hash, imagem) 
         FROM produtos
     """)
     produtos = cursor.fetchall()
@@ -3,21 +3,40 @@ Backend API com Flask + SQLite
 Sistema de Pedidos - Griffe da Prata
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, redirect, send_file, url_for, make_response
 from flask_cors import CORS
-import sqlite3
 import json
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import wraps
 from pathlib import Path
-import hashlib
-from PIL import Image
-import pillow_avif  # Plugin para suporte AVIF
-import io
-import base64
-import re
+from banco import obter_pool, registrar_no_flask
+from migracoes import aplicar_migracoes, MIGRACOES_PEDIDOS
+from estatisticas_pedidos import ler_estatisticas, estatisticas_por_dia
+from busca_produtos import buscar_produtos
+from imagens import ArmazemImagens, larguras_variantes, FORMATOS as FORMATOS_IMAGEM
+from fila_conversao import FilaConversao, FilaCheia
+from cache_catalogo import CacheCatalogo
+from resumo_catalogo import ler_alteracoes
+from carga_catalogo import carregar_se_alterado, converter_preco
+from respostas_http import otimizar_respostas
+from identificadores import gerar_id, eh_id_legado, id_minimo
+from escrita_agrupada import escritor_opcional, gravar, FilaEscritaCheia, EscritaNaoConfirmada
+from metricas import instrumentar, registrar_cache
+from perfilador import registrar_perfilador
+import exportacao
 
 app = Flask(__name__)
 
+# JSON via orjson (se instalado) e compressão gzip/brotli das respostas
+otimizar_respostas(app)
+
+# Contagem e latência por rota, SQL e caches em GET /metrics (Prometheus)
+instrumentar(app)
+
+# Perfis cProfile + pilhas de uma fração das requisições (PERFIL_FRACAO) ou
+# das que trazem X-Perfil-Token; consulta em /admin/perfis
+registrar_perfilador(app)
+
 # CORS configurado para GitHub Pages + desenvolvimento local
 CORS(app, resources={
     r"/*": {
@@ -37,177 +56,487 @@ CORS(app, resources={
 DB_PATH = "pedidos.db"
 PRODUTOS_JSON = "silvercrown_scraper/atacadodeprata_completo/dados/produtos_atacado_completo.json"
 
+# Pool de conexões (WAL + pragmas) compartilhado por todos os endpoints
+pool_db = obter_pool(DB_PATH)
+
+# Imagens AVIF em disco, nomeadas pelo hash do conteúdo
+armazem_imagens = ArmazemImagens()
+
+# Catálogo em memória; todo handler que altera produtos deve invalidá-lo, e
+# as escritas de outros processos chegam pela versão do catálogo no banco
+cache_catalogo = CacheCatalogo(ler_alteracoes=ler_alteracoes)
+registrar_cache('catalogo', lambda: {
+    tipo: (contador['hits'], contador['misses'])
+    for tipo, contador in cache_catalogo.estatisticas().items() if tipo in ('produto', 'lista')
+})
+
+# Group commit opcional (ESCRITA_AGRUPADA): None grava direto na conexão da requisição
+escritor_pedidos = escritor_opcional(DB_PATH)
+
+# Conversões AVIF em processos separados (não bloqueiam as requisições)
+fila_conversao = FilaConversao(armazem_imagens, pool_db, ao_atualizar=cache_catalogo.invalidar)
+
 
 # ==================== DATABASE ====================
 
 def init_db():
-    """Inicializa o banco de dados"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Tabela de pedidos
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS pedidos (
-            id TEXT PRIMARY KEY,
-            data TEXT NOT NULL,
-            cliente_nome TEXT NOT NULL,
-            cliente_whatsapp TEXT NOT NULL,
-            total_atacado REAL NOT NULL,
-            total_varejo REAL NOT NULL,
-            lucro REAL NOT NULL,
-            margem TEXT DEFAULT '250%',
-            status TEXT DEFAULT 'pendente',
-            enviado_fornecedor INTEGER DEFAULT 0,
-            data_envio TEXT,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Tabela de itens do pedido
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS pedido_items (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            pedido_id TEXT NOT NULL,
-            codigo TEXT NOT NULL,
-            titulo TEXT,
-            quantidade INTEGER NOT NULL,
-            preco_atacado REAL NOT NULL,
-            preco_varejo REAL NOT NULL,
-            subtotal_atacado REAL NOT NULL,
-            subtotal_varejo REAL NOT NULL,
-            FOREIGN KEY (pedido_id) REFERENCES pedidos (id)
-        )
-    ''')
-    
-    # Tabela de produtos (cache)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS produtos (
-            codigo TEXT PRIMARY KEY,
-            categoria TEXT DEFAULT 'OUTROS',
-            titulo TEXT,
-            preco_atacado REAL,
-            preco_varejo REAL,
-            peso TEXT,
-            lote TEXT,
-            descricao TEXT,
-            imagem_url TEXT,
-            imagem_local TEXT,
-            imagem TEXT,
-            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Adicionar coluna categoria se não existir (migração)
-    try:
-        cursor.execute("ALTER TABLE produtos ADD COLUMN categoria TEXT DEFAULT 'OUTROS'")
-    except:
-        pass  # Coluna já existe
-    
-    # Adicionar coluna imagem se não existir (migração)
-    try:
-        cursor.execute("ALTER TABLE produtos ADD COLUMN imagem TEXT")
-    except:
-        pass  # Coluna já existe
-    
-    conn.commit()
-    conn.close()
+    """Inicializa o banco de dados (aplica as migrações pendentes)"""
+    with pool_db.conexao() as conn:
+        aplicar_migracoes(conn, MIGRACOES_PEDIDOS)
     print("✅ Banco de dados inicializado!")
 
 
-def carregar_produtos_json():
-    """Carrega produtos do JSON e salva no banco"""
+def carregar_produtos_json(forcar=False):
+    """
+    Carrega o JSON do fornecedor de forma incremental
+    
+    Pulada se o arquivo não mudou desde a última carga; senão só os produtos
+    novos ou alterados são gravados, sem tocar em categoria e imagem.
+    """
     try:
-        with open(PRODUTOS_JSON, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        with pool_db.conexao() as conn:
+            contagem = carregar_se_alterado(conn, PRODUTOS_JSON, forcar)
         
-        for produto in data['produtos']:
-            # Converter preços para float
-            preco_atacado = float(produto['preco_atacado'].replace('R$', '').replace(',', '.').strip())
-            preco_varejo = float(produto['preco_varejo'].replace('R$', '').replace(',', '.').strip())
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO produtos 
-                (codigo, titulo, preco_atacado, preco_varejo, peso, lote, descricao, imagem_url, imagem_local)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                produto['codigo'],
-                produto.get('titulo', ''),
-                preco_atacado,
-                preco_varejo,
-                produto.get('peso', ''),
-                produto.get('lote', ''),
-                produto.get('descricao', ''),
-                produto.get('imagem_url', ''),
-                produto.get('imagem_local', '')
-            ))
+        if contagem is None:
+            print("✅ Catálogo do fornecedor sem alterações (carga pulada)")
+            return
         
-        conn.commit()
-        conn.close()
-        print(f"✅ {len(data['produtos'])} produtos carregados no banco!")
+        if contagem['inseridos'] or contagem['atualizados']:
+            cache_catalogo.invalidar_tudo()
+        print(f"✅ Catálogo carregado: {contagem['inseridos']} novos, "
+              f"{contagem['atualizados']} atualizados, {contagem['inalterados']} inalterados")
+        if contagem['erros']:
+            print(f"⚠️  {contagem['erros']} produtos inválidos ignorados")
         
     except Exception as e:
         print(f"❌ Erro ao carregar produtos: {e}")
 
 
+_conexao_requisicao = registrar_no_flask(app, pool_db)
+
+
 def get_db():
-    """Retorna conexão com o banco"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Retorna a conexão do pool vinculada à requisição atual"""
+    return _conexao_requisicao()
+
+# Nome usado pelos handlers de gerenciamento de produtos
+get_db_connection = get_db
+
+
+# ==================== CONSULTAS ====================
+# Montadas só aqui: testar_indices.py confere o plano destas mesmas strings
+
+# Filtros das listagens (nome do parâmetro -> condição), na ordem do WHERE
+FILTROS_PRODUTOS = {
+    'after': 'codigo > ?',
+    'categoria': 'categoria = ?',
+    'preco_min': 'preco_varejo >= ?',
+    'preco_max': 'preco_varejo <= ?',
+}
+FILTROS_PEDIDOS = {
+    'status': 'status = ?',
+    'after': 'id < ?',
+    'desde': 'id >= ?',
+    'ate': 'id < ?',
+}
+
+SQL_IMAGEM_PRODUTO = 'SELECT imagem_hash, imagem_largura, imagem_altura FROM produtos WHERE codigo = ?'
+SQL_DELETAR_PRODUTO = 'DELETE FROM produtos WHERE codigo = ?'
+SQL_ID_LEGADO = 'SELECT id FROM pedidos_ids_legados WHERE id_legado = ?'
+SQL_PEDIDO = 'SELECT * FROM pedidos WHERE id = ?'
+SQL_ITEMS_PEDIDO = 'SELECT * FROM pedido_items WHERE pedido_id = ?'
+SQL_STATUS_PEDIDO = 'UPDATE pedidos SET status = ? WHERE id = ?'
+SQL_ENVIO_PEDIDO = 'UPDATE pedidos SET status = ?, enviado_fornecedor = 1, data_envio = ? WHERE id = ?'
+
+
+def _where(filtros, nomes):
+    return f"WHERE {' AND '.join(filtros[nome] for nome in nomes)}" if nomes else ''
+
+
+def sql_listar_produtos(colunas, nomes_filtros):
+    """Página de GET /api/produtos com os filtros (chaves de FILTROS_PRODUTOS) dados"""
+    return f'SELECT {colunas} FROM produtos {_where(FILTROS_PRODUTOS, nomes_filtros)} ORDER BY codigo LIMIT ?'
+
+
+def sql_listar_pedidos(nomes_filtros):
+    """Página de GET /api/pedidos com os filtros (chaves de FILTROS_PEDIDOS) dados"""
+    return f'SELECT * FROM pedidos {_where(FILTROS_PEDIDOS, nomes_filtros)} ORDER BY id DESC LIMIT ?'
+
+
+def sql_produtos_por_codigo(colunas, quantidade):
+    return f"SELECT {colunas} FROM produtos WHERE codigo IN ({', '.join('?' * quantidade)})"
+
+
+def sql_items_por_pedidos(quantidade):
+    return f"SELECT * FROM pedido_items WHERE pedido_id IN ({', '.join('?' * quantidade)}) ORDER BY pedido_id, id"
+
+
+# ==================== CACHE HTTP ====================
+
+# Catálogo: público e revalidado a cada minuto (a revalidação custa só um 304)
+CACHE_CATALOGO = 'public, max-age=60'
+# Pedidos e estatísticas: dados de clientes, sempre revalidados
+CACHE_PEDIDOS = 'private, no-cache'
+
+
+def _etag_catalogo():
+    # Versão do catálogo no banco (triggers): o mesmo ETag em todos os
+    # processos, e qualquer escrita, de qualquer processo, o troca
+    cache_catalogo.sincronizar(get_db())
+    if cache_catalogo.versao_banco is None:
+        return f"catalogo-{cache_catalogo.instancia}-{cache_catalogo.versao}"
+    return f"catalogo-{cache_catalogo.versao_banco}"
+
+
+def _etag_pedidos():
+    row = get_db().execute("SELECT versao FROM versoes_tabelas WHERE tabela = 'pedidos'").fetchone()
+    return f"pedidos-{row['versao']}" if row else None
+
+
+def condicional(etag_atual, cache_control):
+    """
+    GET condicional: responde 304 sem executar a view quando o If-None-Match
+    do cliente já corresponde à versão atual dos dados
+
+    A versão é lida antes de gerar o corpo, então uma escrita concorrente
+    no máximo produz um 200 a mais, nunca um 304 desatualizado.
+    """
+    def decorador(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = etag_atual()
+            # Comparação fraca: a compressão enfraquece o ETag (ver respostas_http)
+            if etag and request.if_none_match.contains_weak(etag):
+                resposta = app.response_class(status=304)
+            else:
+                resposta = make_response(view(*args, **kwargs))
+                if resposta.status_code != 200:
+                    return resposta
+            if etag:
+                resposta.set_etag(etag)
+            resposta.headers['Cache-Control'] = cache_control
+            return resposta
+        return wrapper
+    return decorador
 
 
 # ==================== ENDPOINTS ====================
 
+# Colunas expostas pela API (a imagem é enviada apenas como URL)
+CAMPOS_PRODUTO = (
+    'codigo', 'categoria', 'titulo', 'preco_atacado', 'preco_varejo', 'peso',
+    'lote', 'descricao', 'imagem_url', 'imagem_local', 'imagem_largura',
+    'imagem_altura', 'updated_at'
+)
+LIMITE_PADRAO = 100
+LIMITE_MAXIMO = 500
+LIMITE_BUSCA = 20
+
+
+def _colunas_produto(fields=None):
+    """Monta a projeção do SELECT a partir do parâmetro ?fields="""
+    if fields:
+        solicitados = [f.strip() for f in fields.split(',') if f.strip()]
+        invalidos = [f for f in solicitados if f not in CAMPOS_PRODUTO and f != 'imagem']
+        if invalidos:
+            raise ValueError(f"Campos inválidos: {', '.join(invalidos)}")
+    else:
+        solicitados = list(CAMPOS_PRODUTO) + ['imagem']
+    
+    # codigo é sempre enviado (é o cursor da paginação)
+    colunas = ['codigo'] + [f for f in solicitados if f not in ('codigo', 'imagem')]
+    if 'imagem' in solicitados:
+        colunas.append('imagem_hash')
+    return ', '.join(colunas)
+
+
+def _produtos_por_codigo(codigos, conn=None):
+    """{codigo: dict} com todos os campos, lido do cache do catálogo"""
+    def carregar(faltando):
+        rows = (conn or get_db()).execute(
+            sql_produtos_por_codigo(_colunas_produto(), len(faltando)), faltando
+        ).fetchall()
+        return {row['codigo']: dict(row) for row in rows}
+    
+    cache_catalogo.sincronizar(conn or get_db())
+    return cache_catalogo.obter_produtos(codigos, carregar)
+
+
+def _produto_para_json(row):
+    """Converte uma linha de produtos em dict, trocando a imagem por sua URL"""
+    produto = dict(row)
+    if 'imagem_hash' in produto:
+        hash_imagem = produto.pop('imagem_hash')
+        produto['imagem'] = (
+            url_for('servir_imagem', hash_imagem=hash_imagem, _external=True)
+            if hash_imagem else None
+        )
+    return produto
+
+
 @app.route('/api/produtos', methods=['GET'])
+@condicional(_etag_catalogo, CACHE_CATALOGO)
 def listar_produtos():
-    """Lista todos os produtos disponíveis"""
-    conn = get_db()
-    cursor = conn.cursor()
+    """
+    Lista produtos com paginação por cursor
+    
+    Parâmetros: after (último código recebido), limit, fields,
+    categoria, preco_min, preco_max (preço de varejo)
+    """
+    try:
+        colunas = _colunas_produto(request.args.get('fields'))
+        limite = min(int(request.args.get('limit', LIMITE_PADRAO)), LIMITE_MAXIMO)
+        preco_min = request.args.get('preco_min', type=float)
+        preco_max = request.args.get('preco_max', type=float)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if limite < 1:
+        return jsonify({'error': 'limit deve ser maior que zero'}), 400
+    
+    filtros = []
+    params = []
+    
+    after = request.args.get('after')
+    if after:
+        filtros.append('after')
+        params.append(after)
+    
+    categoria = request.args.get('categoria')
+    if categoria:
+        filtros.append('categoria')
+        params.append(categoria)
     
-    cursor.execute('SELECT * FROM produtos ORDER BY codigo')
-    produtos = [dict(row) for row in cursor.fetchall()]
+    if preco_min is not None:
+        filtros.append('preco_min')
+        params.append(preco_min)
     
-    conn.close()
-    return jsonify(produtos)
+    if preco_max is not None:
+        filtros.append('preco_max')
+        params.append(preco_max)
+    
+    sql = sql_listar_produtos(colunas, filtros)
+    
+    def gerar():
+        cursor = get_db().cursor()
+        
+        # Busca um item a mais para saber se existe próxima página
+        cursor.execute(sql, params + [limite + 1])
+        rows = cursor.fetchall()
+        
+        tem_mais = len(rows) > limite
+        produtos = [_produto_para_json(row) for row in rows[:limite]]
+        
+        return app.json.dumps_bytes({
+            'produtos': produtos,
+            'proximo': produtos[-1]['codigo'] if tem_mais else None,
+            'limite': limite
+        })
+    
+    # A resposta serializada depende só dos parâmetros (e do host, pelas URLs de imagem)
+    chave = (request.host_url, sql, *params, limite)
+    cache_catalogo.sincronizar(get_db())
+    corpo = cache_catalogo.obter_lista(chave, gerar)
+    return app.response_class(corpo, mimetype='application/json')
+
+
+@app.route('/api/produtos/busca', methods=['GET'])
+@condicional(_etag_catalogo, CACHE_CATALOGO)
+def buscar_produtos_texto():
+    """
+    Busca textual no catálogo (código, título, categoria e descrição)
+
+    Ignora acentos e maiúsculas e ordena por relevância (BM25).
+    Parâmetros: q, limit, fields
+    """
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': 'Parâmetro q é obrigatório'}), 400
+
+    try:
+        colunas = _colunas_produto(request.args.get('fields'))
+        limite = min(int(request.args.get('limit', LIMITE_BUSCA)), LIMITE_MAXIMO)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if limite < 1:
+        return jsonify({'error': 'limit deve ser maior que zero'}), 400
+
+    rows = buscar_produtos(get_db(), q, limite, colunas)
+    return jsonify({
+        'produtos': [_produto_para_json(row) for row in rows],
+        'q': q,
+        'limite': limite
+    })
 
 
 @app.route('/api/produtos/<codigo>', methods=['GET'])
+@condicional(_etag_catalogo, CACHE_CATALOGO)
 def buscar_produto(codigo):
     """Busca produto específico por código"""
+    produto = _produtos_por_codigo([codigo]).get(codigo)
+    
+    if produto:
+        return jsonify(_produto_para_json(produto))
+    return jsonify({'error': 'Produto não encontrado'}), 404
+
+
+def _url_variante(hash_imagem, largura, formato, largura_original, externa=False):
+    """URL de uma variante; a largura cheia em AVIF é a própria original"""
+    if formato == 'avif' and largura == largura_original:
+        return url_for('servir_imagem', hash_imagem=hash_imagem, _external=externa)
+    return url_for('servir_variante', hash_imagem=hash_imagem, largura=largura,
+                   formato=formato, _external=externa)
+
+
+def _formato_aceito():
+    """Escolhe o melhor formato suportado pelo navegador (Accept)"""
+    aceitos = request.accept_mimetypes
+    for formato in ('avif', 'webp'):
+        if FORMATOS_IMAGEM[formato][2] in aceitos.values():
+            return formato
+    return 'jpeg'
+
+
+@app.route('/api/produtos/<codigo>/imagem', methods=['GET'])
+def imagem_produto(codigo):
+    """
+    Redireciona para a URL imutável da imagem do produto
+    
+    Parâmetros: w (largura desejada), fmt (avif, webp ou jpeg; padrão pelo
+    cabeçalho Accept) e meta=1 para receber as URLs prontas para srcset.
+    """
     conn = get_db()
     cursor = conn.cursor()
     
-    cursor.execute('SELECT * FROM produtos WHERE codigo = ?', (codigo,))
-    produto = cursor.fetchone()
+    cursor.execute(SQL_IMAGEM_PRODUTO, (codigo,))
+    row = cursor.fetchone()
     
-    conn.close()
+    if not row or not row['imagem_hash']:
+        return jsonify({'error': 'Imagem não encontrada'}), 404
     
-    if produto:
-        return jsonify(dict(produto))
-    return jsonify({'error': 'Produto não encontrado'}), 404
+    hash_imagem = row['imagem_hash']
+    largura_original = row['imagem_largura']
+    
+    # Imagens antigas sem dimensões só têm a original
+    if not largura_original:
+        return redirect(url_for('servir_imagem', hash_imagem=hash_imagem))
+    
+    larguras = larguras_variantes(largura_original)
+    
+    if request.args.get('meta'):
+        return jsonify({
+            'codigo': codigo,
+            'largura': largura_original,
+            'altura': row['imagem_altura'],
+            'larguras': larguras,
+            'original': url_for('servir_imagem', hash_imagem=hash_imagem, _external=True),
+            'srcset': {
+                formato: ', '.join(
+                    f"{_url_variante(hash_imagem, l, formato, largura_original, True)} {l}w"
+                    for l in larguras
+                )
+                for formato in FORMATOS_IMAGEM
+            }
+        })
+    
+    largura = request.args.get('w', type=int)
+    formato = request.args.get('fmt') or _formato_aceito()
+    if formato not in FORMATOS_IMAGEM:
+        return jsonify({'error': f'Formato inválido: {formato}'}), 400
+    
+    if largura is None and formato == 'avif':
+        return redirect(url_for('servir_imagem', hash_imagem=hash_imagem))
+    
+    # Menor variante que cobre a largura pedida
+    escolhida = next((l for l in larguras if largura is not None and l >= largura), larguras[-1])
+    resposta = redirect(_url_variante(hash_imagem, escolhida, formato, largura_original))
+    if not request.args.get('fmt'):
+        resposta.vary.add('Accept')
+    return resposta
 
 
-@app.route('/api/pedidos', methods=['POST'])
-def criar_pedido():
-    """Cria novo pedido"""
-    data = request.json
+def _enviar_imagem(caminho, mimetype, etag):
+    # send_file usa o file_wrapper do servidor WSGI (sendfile, sem cópia)
+    resposta = send_file(
+        caminho,
+        mimetype=mimetype,
+        etag=etag,
+        max_age=31536000,
+        conditional=True
+    )
+    resposta.cache_control.public = True
+    resposta.cache_control.immutable = True
+    return resposta
+
+
+@app.route('/img/<hash_imagem>.avif', methods=['GET'])
+def servir_imagem(hash_imagem):
+    """Serve a imagem direto do disco (conteúdo imutável, cache de 1 ano)"""
+    if not armazem_imagens.existe(hash_imagem):
+        return jsonify({'error': 'Imagem não encontrada'}), 404
     
-    cliente_nome = data.get('cliente_nome')
-    cliente_whatsapp = data.get('cliente_whatsapp')
-    items = data.get('items', [])
+    return _enviar_imagem(armazem_imagens.caminho(hash_imagem), 'image/avif', hash_imagem)
+
+
+@app.route('/img/<hash_imagem>-<int:largura>.<formato>', methods=['GET'])
+def servir_variante(hash_imagem, largura, formato):
+    """Serve uma variante responsiva; sem ela ainda gerada, cai na original"""
+    if formato not in FORMATOS_IMAGEM:
+        return jsonify({'error': 'Imagem não encontrada'}), 404
     
-    if not cliente_nome or not cliente_whatsapp or not items:
-        return jsonify({'error': 'Dados incompletos'}), 400
+    if not armazem_imagens.existe(hash_imagem, largura, formato):
+        if not armazem_imagens.existe(hash_imagem):
+            return jsonify({'error': 'Imagem não encontrada'}), 404
+        return redirect(url_for('servir_imagem', hash_imagem=hash_imagem))
     
-    # Gerar ID único
-    pedido_id = hashlib.md5(f"{datetime.now().isoformat()}{cliente_nome}".encode()).hexdigest()[:8]
-    data_pedido = datetime.now().isoformat()
+    return _enviar_imagem(
+        armazem_imagens.caminho(hash_imagem, largura, formato),
+        FORMATOS_IMAGEM[formato][2],
+        f"{hash_imagem}-{largura}.{formato}"
+    )
+
+
+class ProdutosNaoEncontrados(Exception):
+    """Um ou mais códigos do carrinho não existem no catálogo"""
+
+    def __init__(self, codigos):
+        super().__init__(f"Produtos não encontrados: {', '.join(codigos)}")
+        self.codigos = codigos
+
+
+def _gravar_pedido(conn, linha_pedido, linhas_items):
+    """INSERTs do pedido e dos itens (a transação é de quem chama)"""
+    conn.execute('''
+        INSERT INTO pedidos
+        (id, data, cliente_nome, cliente_whatsapp, total_atacado, total_varejo, lucro, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 'pendente')
+    ''', linha_pedido)
     
-    conn = get_db()
-    cursor = conn.cursor()
+    conn.executemany('''
+        INSERT INTO pedido_items
+        (pedido_id, codigo, titulo, quantidade, preco_atacado, preco_varejo, subtotal_atacado, subtotal_varejo)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', linhas_items)
+
+
+def registrar_pedido(conn, pedido_id, data_pedido, cliente_nome, cliente_whatsapp, items):
+    """
+    Calcula os totais e grava o pedido com seus itens
+    
+    Os preços vêm do cache do catálogo (os ausentes, de uma única consulta
+    IN (...)) e os itens são gravados com executemany dentro de uma só
+    transação (compartilhada com outros pedidos se a escrita agrupada
+    estiver ativa).
+    Levanta ProdutosNaoEncontrados com todos os códigos inexistentes.
+    """
+    # Preços do cache do catálogo; os que faltam vêm de uma única consulta IN
+    codigos = list(dict.fromkeys(item['codigo'] for item in items))
+    produtos = _produtos_por_codigo(codigos, conn)
+    
+    faltando = [codigo for codigo in codigos if codigo not in produtos]
+    if faltando:
+        raise ProdutosNaoEncontrados(faltando)
     
     # Calcular totais
     total_atacado = 0
@@ -215,17 +544,9 @@ def criar_pedido():
     items_processados = []
     
     for item in items:
-        codigo = item['codigo']
+        produto = produtos[item['codigo']]
         quantidade = item['quantidade']
         
-        # Buscar produto
-        cursor.execute('SELECT * FROM produtos WHERE codigo = ?', (codigo,))
-        produto = cursor.fetchone()
-        
-        if not produto:
-            conn.close()
-            return jsonify({'error': f'Produto {codigo} não encontrado'}), 404
-        
         preco_atacado = produto['preco_atacado']
         preco_varejo = produto['preco_varejo']
         
@@ -236,7 +557,7 @@ def criar_pedido():
         total_varejo += subtotal_varejo
         
         items_processados.append({
-            'codigo': codigo,
+            'codigo': item['codigo'],
             'titulo': produto['titulo'],
             'quantidade': quantidade,
             'preco_atacado': preco_atacado,
@@ -247,29 +568,22 @@ def criar_pedido():
     
     lucro = total_varejo - total_atacado
     
-    # Inserir pedido
-    cursor.execute('''
-        INSERT INTO pedidos 
-        (id, data, cliente_nome, cliente_whatsapp, total_atacado, total_varejo, lucro, status)
-        VALUES (?, ?, ?, ?, ?, ?, ?, 'pendente')
-    ''', (pedido_id, data_pedido, cliente_nome, cliente_whatsapp, total_atacado, total_varejo, lucro))
-    
-    # Inserir items
-    for item in items_processados:
-        cursor.execute('''
-            INSERT INTO pedido_items 
-            (pedido_id, codigo, titulo, quantidade, preco_atacado, preco_varejo, subtotal_atacado, subtotal_varejo)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            pedido_id, item['codigo'], item['titulo'], item['quantidade'],
-            item['preco_atacado'], item['preco_varejo'],
-            item['subtotal_atacado'], item['subtotal_varejo']
-        ))
+    # Uma transação (BEGIN IMMEDIATE) ou o próximo lote do escritor agrupado;
+    # retorna só depois do commit
+    gravar(
+        escritor_pedidos, conn, _gravar_pedido,
+        (pedido_id, data_pedido, cliente_nome, cliente_whatsapp, total_atacado, total_varejo, lucro),
+        [
+            (
+                pedido_id, item['codigo'], item['titulo'], item['quantidade'],
+                item['preco_atacado'], item['preco_varejo'],
+                item['subtotal_atacado'], item['subtotal_varejo']
+            )
+            for item in items_processados
+        ]
+    )
     
-    conn.commit()
-    conn.close()
-    
-    return jsonify({
+    return {
         'id': pedido_id,
         'data': data_pedido,
         'cliente': {'nome': cliente_nome, 'whatsapp': cliente_whatsapp},
@@ -278,59 +592,171 @@ def criar_pedido():
         'total_varejo': total_varejo,
         'lucro': lucro,
         'status': 'pendente'
-    }), 201
+    }
+
+
+@app.route('/api/pedidos', methods=['POST'])
+def criar_pedido():
+    """Cria novo pedido"""
+    data = request.json
+    
+    cliente_nome = data.get('cliente_nome')
+    cliente_whatsapp = data.get('cliente_whatsapp')
+    items = data.get('items', [])
+    
+    if not cliente_nome or not cliente_whatsapp or not items:
+        return jsonify({'error': 'Dados incompletos'}), 400
+    
+    invalidos = [
+        str(item.get('codigo')) for item in items
+        if not item.get('codigo') or not isinstance(item.get('quantidade'), int) or item['quantidade'] < 1
+    ]
+    if invalidos:
+        return jsonify({'error': 'Itens inválidos', 'codigos': invalidos}), 400
+    
+    # ID ordenado por tempo: entra no fim do índice e não colide entre processos
+    pedido_id = gerar_id()
+    data_pedido = datetime.now().isoformat()
+    
+    try:
+        pedido = registrar_pedido(
+            get_db(), pedido_id, data_pedido, cliente_nome, cliente_whatsapp, items
+        )
+    except ProdutosNaoEncontrados as e:
+        return jsonify({'error': str(e), 'codigos': e.codigos}), 404
+    except FilaEscritaCheia as e:
+        return jsonify({'error': 'Servidor ocupado, tente novamente', 'detalhes': str(e)}), 503
+    except EscritaNaoConfirmada as e:
+        # O pedido ainda pode ser gravado: o cliente confere pelo ID antes de reenviar
+        return jsonify({
+            'error': 'Pedido ainda não confirmado; consulte o pedido antes de reenviar',
+            'pedido_id': pedido_id,
+            'detalhes': str(e)
+        }), 503
+    
+    return jsonify(pedido), 201
+
+
+def _resolver_pedido_id(conn, pedido_id):
+    """Traduz um ID antigo (8 caracteres) para o ID atual do pedido"""
+    if eh_id_legado(pedido_id):
+        row = conn.execute(SQL_ID_LEGADO, (pedido_id,)).fetchone()
+        if row:
+            return row[0]
+    return pedido_id
+
+
+def _parametro_momento(nome):
+    """Lê um parâmetro de data/hora ISO opcional; levanta ValueError"""
+    valor = request.args.get(nome)
+    try:
+        return datetime.fromisoformat(valor) if valor else None
+    except ValueError:
+        raise ValueError(f'{nome} deve ser uma data ISO (YYYY-MM-DD ou YYYY-MM-DDTHH:MM:SS)')
+
+
+def _items_por_pedido(cursor, pedido_ids):
+    """Busca os itens de vários pedidos em uma única consulta"""
+    items = {pedido_id: [] for pedido_id in pedido_ids}
+    if not pedido_ids:
+        return items
+    
+    cursor.execute(sql_items_por_pedidos(len(pedido_ids)), pedido_ids)
+    for row in cursor.fetchall():
+        items[row['pedido_id']].append(dict(row))
+    return items
 
 
 @app.route('/api/pedidos', methods=['GET'])
+@condicional(_etag_pedidos, CACHE_PEDIDOS)
 def listar_pedidos():
-    """Lista todos os pedidos"""
+    """
+    Lista pedidos do mais recente para o mais antigo, com paginação por cursor
+    
+    Parâmetros: status, limit, after (valor 'proximo' da página anterior),
+    desde/ate (data ISO, intervalo de criação) e items=0 para omitir os
+    itens (visões de resumo). Os IDs são ordenados por tempo, então
+    cursor e intervalo são faixas do índice da chave primária.
+    """
     status_filter = request.args.get('status')
+    incluir_items = request.args.get('items', '1') not in ('0', 'false')
+    
+    try:
+        limite = min(int(request.args.get('limit', LIMITE_PADRAO)), LIMITE_MAXIMO)
+    except ValueError:
+        return jsonify({'error': 'limit inválido'}), 400
+    if limite < 1:
+        return jsonify({'error': 'limit deve ser maior que zero'}), 400
+    
+    try:
+        desde = _parametro_momento('desde')
+        ate = _parametro_momento('ate')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     conn = get_db()
-    cursor = conn.cursor()
+    filtros = []
+    params = []
     
     if status_filter:
-        cursor.execute('SELECT * FROM pedidos WHERE status = ? ORDER BY data DESC', (status_filter,))
-    else:
-        cursor.execute('SELECT * FROM pedidos ORDER BY data DESC')
+        filtros.append('status')
+        params.append(status_filter)
     
-    pedidos = []
-    for row in cursor.fetchall():
-        pedido = dict(row)
-        pedido_id = pedido['id']
-        
-        # Buscar items do pedido
-        cursor.execute('SELECT * FROM pedido_items WHERE pedido_id = ?', (pedido_id,))
-        items = [dict(item) for item in cursor.fetchall()]
-        pedido['items'] = items
-        
-        pedidos.append(pedido)
+    # Cursor: ID do último pedido recebido (aceita o formato antigo "data|id")
+    after = request.args.get('after')
+    if after:
+        filtros.append('after')
+        params.append(_resolver_pedido_id(conn, after.rpartition('|')[2]))
     
-    conn.close()
-    return jsonify(pedidos)
+    if desde:
+        filtros.append('desde')
+        params.append(id_minimo(desde))
+    if ate:
+        filtros.append('ate')
+        params.append(id_minimo(ate))
+    
+    cursor = conn.cursor()
+    
+    cursor.execute(sql_listar_pedidos(filtros), params + [limite + 1])
+    rows = cursor.fetchall()
+    
+    tem_mais = len(rows) > limite
+    pedidos = [dict(row) for row in rows[:limite]]
+    
+    if incluir_items:
+        items = _items_por_pedido(cursor, [pedido['id'] for pedido in pedidos])
+        for pedido in pedidos:
+            pedido['items'] = items[pedido['id']]
+    
+    ultimo = pedidos[-1] if tem_mais else None
+    return jsonify({
+        'pedidos': pedidos,
+        'proximo': ultimo['id'] if ultimo else None,
+        'limite': limite
+    })
 
 
 @app.route('/api/pedidos/<pedido_id>', methods=['GET'])
+@condicional(_etag_pedidos, CACHE_PEDIDOS)
 def buscar_pedido(pedido_id):
-    """Busca pedido específico"""
+    """Busca pedido específico (pelo ID atual ou pelo antigo)"""
     conn = get_db()
     cursor = conn.cursor()
+    pedido_id = _resolver_pedido_id(conn, pedido_id)
     
-    cursor.execute('SELECT * FROM pedidos WHERE id = ?', (pedido_id,))
+    cursor.execute(SQL_PEDIDO, (pedido_id,))
     pedido = cursor.fetchone()
     
     if not pedido:
-        conn.close()
         return jsonify({'error': 'Pedido não encontrado'}), 404
     
     pedido_dict = dict(pedido)
     
     # Buscar items
-    cursor.execute('SELECT * FROM pedido_items WHERE pedido_id = ?', (pedido_id,))
+    cursor.execute(SQL_ITEMS_PEDIDO, (pedido_id,))
     items = [dict(item) for item in cursor.fetchall()]
     pedido_dict['items'] = items
     
-    conn.close()
     return jsonify(pedido_dict)
 
 
@@ -345,18 +771,14 @@ def atualizar_status(pedido_id):
     
     conn = get_db()
     cursor = conn.cursor()
+    pedido_id = _resolver_pedido_id(conn, pedido_id)
     
     if novo_status == 'enviado':
-        cursor.execute('''
-            UPDATE pedidos 
-            SET status = ?, enviado_fornecedor = 1, data_envio = ?
-            WHERE id = ?
-        ''', (novo_status, datetime.now().isoformat(), pedido_id))
+        cursor.execute(SQL_ENVIO_PEDIDO, (novo_status, datetime.now().isoformat(), pedido_id))
     else:
-        cursor.execute('UPDATE pedidos SET status = ? WHERE id = ?', (novo_status, pedido_id))
+        cursor.execute(SQL_STATUS_PEDIDO, (novo_status, pedido_id))
     
     conn.commit()
-    conn.close()
     
     return jsonify({'success': True, 'pedido_id': pedido_id, 'status': novo_status})
 
@@ -366,21 +788,19 @@ def gerar_whatsapp(pedido_id):
     """Gera mensagem formatada para WhatsApp"""
     conn = get_db()
     cursor = conn.cursor()
+    pedido_id = _resolver_pedido_id(conn, pedido_id)
     
-    cursor.execute('SELECT * FROM pedidos WHERE id = ?', (pedido_id,))
+    cursor.execute(SQL_PEDIDO, (pedido_id,))
     pedido = cursor.fetchone()
     
     if not pedido:
-        conn.close()
         return jsonify({'error': 'Pedido não encontrado'}), 404
     
     pedido_dict = dict(pedido)
     
-    cursor.execute('SELECT * FROM pedido_items WHERE pedido_id = ?', (pedido_id,))
+    cursor.execute(SQL_ITEMS_PEDIDO, (pedido_id,))
     items = [dict(item) for item in cursor.fetchall()]
     
-    conn.close()
-    
     # Formatar mensagem
     msg = f"🛒 *NOVO PEDIDO - GRIFFE DA PRATA*\n\n"
     msg += f"📋 Pedido: #{pedido_id}\n"
@@ -404,114 +824,51 @@ def gerar_whatsapp(pedido_id):
 
 
 @app.route('/api/estatisticas', methods=['GET'])
+@condicional(_etag_pedidos, CACHE_PEDIDOS)
 def estatisticas():
-    """Retorna estatísticas gerais"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT COUNT(*) as total FROM pedidos')
-    total = cursor.fetchone()['total']
-    
-    cursor.execute('SELECT COUNT(*) as total FROM pedidos WHERE status = "pendente"')
-    pendentes = cursor.fetchone()['total']
-    
-    cursor.execute('SELECT COUNT(*) as total FROM pedidos WHERE status = "enviado"')
-    enviados = cursor.fetchone()['total']
-    
-    cursor.execute('SELECT COUNT(*) as total FROM pedidos WHERE status = "concluido"')
-    concluidos = cursor.fetchone()['total']
-    
-    cursor.execute('SELECT SUM(lucro) as total_lucro FROM pedidos WHERE status = "concluido"')
-    total_lucro = cursor.fetchone()['total_lucro'] or 0
-    
-    conn.close()
-    
-    return jsonify({
-        'total': total,
-        'pendentes': pendentes,
-        'enviados': enviados,
-        'concluidos': concluidos,
-        'total_lucro': total_lucro
-    })
+    """
+    Retorna estatísticas gerais
 
+    Lidas dos contadores materializados (pedidos_stats); com ?desde=YYYY-MM-DD
+    inclui 'por_dia' com os totais diários a partir dessa data.
+    """
+    conn = get_db()
+    stats = ler_estatisticas(conn)
 
-# ==================== CONVERSÃO DE IMAGENS ====================
+    desde = request.args.get('desde')
+    if desde:
+        try:
+            datetime.strptime(desde, '%Y-%m-%d')
+        except ValueError:
+            return jsonify({'error': 'desde deve estar no formato YYYY-MM-DD'}), 400
+        stats['por_dia'] = estatisticas_por_dia(conn, desde)
 
-def converter_para_avif(imagem_base64):
-    """
-    Converte qualquer imagem para formato AVIF (silenciosamente)
-    Retorna a imagem em base64 no formato AVIF
-    """
-    try:
-        # Se não houver imagem, retornar None
-        if not imagem_base64:
-            return None
-        
-        # Extrair o tipo de imagem e os dados base64
-        match = re.match(r'data:image/(\w+);base64,(.+)', imagem_base64)
-        if not match:
-            # Se não tiver prefixo, assume que é base64 puro
-            img_data = imagem_base64
-        else:
-            formato_original = match.group(1)
-            img_data = match.group(2)
-            
-            # Se já for AVIF, retornar como está
-            if formato_original.lower() == 'avif':
-                return imagem_base64
-        
-        # Decodificar base64
-        img_bytes = base64.b64decode(img_data)
-        
-        # Abrir imagem com Pillow
-        img = Image.open(io.BytesIO(img_bytes))
-        
-        # Converter para RGB se necessário (AVIF não suporta RGBA diretamente)
-        if img.mode in ('RGBA', 'LA', 'P'):
-            # Criar fundo branco
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'P':
-                img = img.convert('RGBA')
-            background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-            img = background
-        elif img.mode != 'RGB':
-            img = img.convert('RGB')
-        
-        # Redimensionar se muito grande (otimização)
-        max_size = 1920
-        if max(img.size) > max_size:
-            img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-        
-        # Salvar como AVIF
-        output = io.BytesIO()
-        img.save(output, format='AVIF', quality=85, speed=6)
-        output.seek(0)
-        
-        # Converter para base64
-        avif_base64 = base64.b64encode(output.read()).decode('utf-8')
-        
-        # Retornar com prefixo data URI
-        return f"data:image/avif;base64,{avif_base64}"
-        
-    except Exception as e:
-        print(f"⚠️  Erro na conversão para AVIF: {str(e)}")
-        # Em caso de erro, retornar a imagem original
-        return imagem_base64
+    return jsonify(stats)
 
 
 # ==================== GERENCIAMENTO DE PRODUTOS ====================
 
+# Categoria de produtos novos criados sem uma (o DEFAULT da tabela)
+CATEGORIA_PADRAO = 'OUTROS'
+
+
 @app.route('/api/produtos', methods=['POST'])
 def adicionar_produto():
-    """Adiciona ou atualiza um produto"""
+    """
+    Adiciona ou atualiza um produto
+    
+    A imagem enviada é convertida para AVIF em segundo plano; a resposta
+    traz o id do job para consulta em /api/conversoes/<job_id>.
+    """
     try:
         dados = request.json
         
-        # 🔄 Converter imagem para AVIF silenciosamente
-        if dados.get('imagem'):
-            print("🔄 Convertendo imagem para AVIF...")
-            dados['imagem'] = converter_para_avif(dados['imagem'])
-            print("✅ Imagem convertida para AVIF com sucesso!")
+        # A listagem só expõe a URL da imagem; reenviar essa URL mantém a atual
+        imagem = dados.get('imagem')
+        manter_imagem = str(imagem or '').startswith('http')
+        if not imagem:
+            # Antes da transação: uma conversão em andamento não reanexa a imagem removida
+            fila_conversao.descartar(dados['codigo'])
         conn = get_db_connection()
         cursor = conn.cursor()
         
@@ -524,7 +881,8 @@ def adicionar_produto():
             cursor.execute("""
                 UPDATE produtos 
                 SET categoria = ?, titulo = ?, descricao = ?, 
-                    preco_varejo = ?, preco_atacado = ?, peso = ?, imagem = ?
+                    preco_varejo = ?, preco_atacado = ?, peso = ?,
+                    updated_at = CURRENT_TIMESTAMP
                 WHERE codigo = ?
             """, (
                 dados.get('categoria'),
@@ -533,44 +891,271 @@ def adicionar_produto():
                 dados.get('preco_varejo'),
                 dados.get('preco_atacado'),
                 dados.get('peso'),
-                dados.get('imagem'),
                 dados['codigo']
             ))
+            
+            # Imagem removida no formulário
+            if not imagem:
+                cursor.execute("""
+                    UPDATE produtos 
+                    SET imagem_hash = NULL, imagem_largura = NULL, imagem_altura = NULL, imagem = NULL,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE codigo = ?
+                """, (dados['codigo'],))
         else:
             # Inserir novo produto
             cursor.execute("""
                 INSERT INTO produtos 
-                (codigo, categoria, titulo, descricao, preco_varejo, preco_atacado, peso, imagem)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                (codigo, categoria, titulo, descricao, preco_varejo, preco_atacado, peso)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
             """, (
                 dados['codigo'],
-                dados.get('categoria'),
+                dados.get('categoria') if dados.get('categoria') is not None else CATEGORIA_PADRAO,
                 dados.get('titulo'),
                 dados.get('descricao'),
                 dados.get('preco_varejo'),
                 dados.get('preco_atacado'),
-                dados.get('peso'),
-                dados.get('imagem')
+                dados.get('peso')
             ))
         
         conn.commit()
-        conn.close()
+        cache_catalogo.invalidar(dados['codigo'])
+        
+        if not imagem or manter_imagem:
+            return jsonify({'sucesso': True, 'mensagem': 'Produto salvo com sucesso!'})
         
-        return jsonify({'sucesso': True, 'mensagem': 'Produto salvo com sucesso!'})
+        # 🔄 Converter imagem para AVIF em segundo plano
+        try:
+            job_id = fila_conversao.enviar(dados['codigo'], imagem)
+        except FilaCheia:
+            return jsonify({
+                'erro': 'Produto salvo, mas a fila de imagens está cheia. Reenvie a imagem em instantes.'
+            }), 503
+        
+        return jsonify({
+            'sucesso': True,
+            'mensagem': 'Produto salvo! Imagem em conversão.',
+            'job_id': job_id,
+            'status_url': url_for('status_conversao', job_id=job_id, _external=True)
+        }), 202
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+# Máximo de produtos por chamada de /api/produtos/bulk
+LIMITE_BULK = 10000
+
+# Campos gravados pelo bulk; ausentes (None) mantêm o valor atual
+CAMPOS_BULK = ('categoria', 'titulo', 'descricao', 'preco_atacado', 'preco_varejo', 'peso', 'lote', 'imagem_url')
+
+SQL_UPSERT_PRODUTO = f"""
+    INSERT INTO produtos (codigo, {', '.join(CAMPOS_BULK)})
+    VALUES (?, {', '.join('?' * len(CAMPOS_BULK))})
+    ON CONFLICT (codigo) DO UPDATE SET
+        {', '.join(f'{campo} = COALESCE(excluded.{campo}, {campo})' for campo in CAMPOS_BULK)},
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+def _validar_produto_bulk(dados):
+    """Normaliza uma linha do bulk; levanta ValueError com o motivo"""
+    if not isinstance(dados, dict):
+        raise ValueError('linha não é um objeto JSON')
+    
+    codigo = dados.get('codigo')
+    if not isinstance(codigo, str) or not codigo.strip():
+        raise ValueError('codigo é obrigatório')
+    
+    produto = {'codigo': codigo.strip()}
+    for campo in CAMPOS_BULK:
+        valor = dados.get(campo)
+        if valor is not None and campo.startswith('preco_'):
+            try:
+                valor = converter_preco(valor)
+            except (TypeError, ValueError):
+                raise ValueError(f'{campo} inválido: {valor!r}')
+        elif valor is not None and not isinstance(valor, str):
+            valor = str(valor)
+        produto[campo] = valor
+    
+    imagem = dados.get('imagem')
+    if imagem is not None and not isinstance(imagem, str):
+        raise ValueError('imagem deve ser uma data URI, uma URL ou vazia')
+    produto['imagem'] = imagem
+    return produto
+
+
+def _linhas_bulk():
+    """Lê o corpo como array JSON ou NDJSON; gera (dados, erro) por linha"""
+    tipo = request.mimetype
+    if tipo == 'application/json':
+        dados = request.get_json(silent=True)
+        if not isinstance(dados, list):
+            raise ValueError('O corpo deve ser um array JSON de produtos')
+        for item in dados:
+            yield item, None
+        return
+    
+    # NDJSON: lido linha a linha do stream, sem carregar o corpo inteiro
+    for linha in request.stream:
+        if not linha.strip():
+            continue
+        try:
+            yield app.json.loads(linha), None
+        except ValueError as e:
+            yield None, f'JSON inválido: {e}'
+
+
+@app.route('/api/produtos/bulk', methods=['POST'])
+def adicionar_produtos_bulk():
+    """
+    Adiciona ou atualiza vários produtos em uma única transação
+    
+    Corpo: array JSON (application/json) ou NDJSON (application/x-ndjson).
+    Todas as linhas são validadas antes da gravação; as inválidas são
+    relatadas e puladas (com ?atomico=1 nenhuma é gravada se houver erro).
+    Campos ausentes mantêm o valor atual; imagens em data URI entram, todas,
+    em um lote de conversão (consulta em /api/conversoes/lotes/<lote_id>).
+    Retorna o resultado de cada linha.
+    """
+    atomico = request.args.get('atomico') in ('1', 'true')
+    
+    # 1ª passada: validação
+    resultados = []
+    validos = []
+    vistos = set()
+    try:
+        for numero, (dados, erro) in enumerate(_linhas_bulk(), start=1):
+            if numero > LIMITE_BULK:
+                return jsonify({'erro': f'Máximo de {LIMITE_BULK} produtos por chamada'}), 413
+            
+            resultado = {'linha': numero, 'codigo': dados.get('codigo') if isinstance(dados, dict) else None}
+            resultados.append(resultado)
+            if erro is None:
+                try:
+                    produto = _validar_produto_bulk(dados)
+                    if produto['codigo'] in vistos:
+                        raise ValueError('codigo repetido no lote')
+                except ValueError as e:
+                    erro = str(e)
+            if erro:
+                resultado.update(status='erro', erro=erro)
+                continue
+            
+            vistos.add(produto['codigo'])
+            validos.append((resultado, produto))
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    
+    erros = len(resultados) - len(validos)
+    if atomico and erros:
+        return jsonify({'sucesso': False, 'erros': erros, 'resultados': resultados}), 422
+    
+    # 2ª passada: gravação em uma transação
+    for _, produto in validos:
+        if produto['imagem'] == '':
+            fila_conversao.descartar(produto['codigo'])
+    conn = get_db_connection()
+    codigos = [produto['codigo'] for _, produto in validos]
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        existentes = set()
+        for inicio in range(0, len(codigos), 500):
+            parte = codigos[inicio:inicio + 500]
+            existentes.update(row['codigo'] for row in conn.execute(
+                f"SELECT codigo FROM produtos WHERE codigo IN ({', '.join('?' * len(parte))})", parte
+            ))
+        
+        # Novos sem categoria recebem a padrão, como no POST unitário
+        for _, produto in validos:
+            if produto['categoria'] is None and produto['codigo'] not in existentes:
+                produto['categoria'] = CATEGORIA_PADRAO
+        conn.executemany(SQL_UPSERT_PRODUTO, [
+            (produto['codigo'], *(produto[campo] for campo in CAMPOS_BULK))
+            for _, produto in validos
+        ])
+        # imagem vazia remove a atual; URL http mantém (como no POST unitário)
+        conn.executemany("""
+            UPDATE produtos
+            SET imagem_hash = NULL, imagem_largura = NULL, imagem_altura = NULL, imagem = NULL
+            WHERE codigo = ?
+        """, [(produto['codigo'],) for _, produto in validos if produto['imagem'] == ''])
+        conn.commit()
     except Exception as e:
+        conn.rollback()
         return jsonify({'erro': str(e)}), 500
+    
+    if codigos:
+        cache_catalogo.invalidar(*codigos)
+    
+    imagens = []
+    for resultado, produto in validos:
+        resultado['status'] = 'atualizado' if produto['codigo'] in existentes else 'inserido'
+        imagem = produto['imagem']
+        if imagem and not imagem.startswith('http'):
+            imagens.append((produto['codigo'], imagem))
+    
+    # Imagens: um lote de conversão em segundo plano, após o commit; entra
+    # no pool conforme abrem vagas, sem recusar nenhuma por fila cheia
+    lote_id = fila_conversao.enviar_lote(imagens) if imagens else None
+    
+    return jsonify({
+        'sucesso': erros == 0,
+        'inseridos': sum(1 for r in resultados if r.get('status') == 'inserido'),
+        'atualizados': sum(1 for r in resultados if r.get('status') == 'atualizado'),
+        'erros': erros,
+        'imagens_em_conversao': len(imagens),
+        'lote_conversao': lote_id,
+        'resultados': resultados
+    })
+
+
+@app.route('/api/conversoes/<job_id>', methods=['GET'])
+def status_conversao(job_id):
+    """Consulta o andamento de uma conversão de imagem"""
+    job = fila_conversao.status(job_id)
+    if not job:
+        return jsonify({'erro': 'Conversão não encontrada'}), 404
+    
+    if job['imagem_hash']:
+        job['imagem'] = url_for('servir_imagem', hash_imagem=job['imagem_hash'], _external=True)
+    return jsonify(job)
+
+
+@app.route('/api/conversoes/lotes/<lote_id>', methods=['GET'])
+def status_lote_conversao(lote_id):
+    """Andamento das conversões de imagem de um POST /api/produtos/bulk"""
+    lote = fila_conversao.status_lote(lote_id)
+    if not lote:
+        return jsonify({'erro': 'Lote não encontrado'}), 404
+    return jsonify(lote)
+
+
+@app.route('/api/catalogo/cache', methods=['GET'])
+def status_cache_catalogo():
+    """Hits, misses e ocupação do cache do catálogo"""
+    return jsonify(cache_catalogo.estatisticas())
+
+
+@app.route('/api/escrita/metricas', methods=['GET'])
+def metricas_escrita():
+    """Fila e tamanho dos lotes do escritor agrupado (ativo: false se desligado)"""
+    if escritor_pedidos is None:
+        return jsonify({'ativo': False})
+    return jsonify({'ativo': True, **escritor_pedidos.metricas()})
 
 
 @app.route('/api/produtos/<codigo>', methods=['DELETE'])
 def deletar_produto(codigo):
     """Deleta um produto"""
     try:
+        fila_conversao.descartar(codigo)
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        cursor.execute("DELETE FROM produtos WHERE codigo = ?", (codigo,))
+        cursor.execute(SQL_DELETAR_PRODUTO, (codigo,))
         conn.commit()
-        conn.close()
+        cache_catalogo.invalidar(codigo)
         
         if cursor.rowcount > 0:
             return jsonify({'sucesso': True, 'mensagem': 'Produto excluído!'})
@@ -580,6 +1165,73 @@ def deletar_produto(codigo):
         return jsonify({'erro': str(e)}), 500
 
 
+# ==================== EXPORTAÇÃO ====================
+
+FORMATOS_EXPORTACAO = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def _parametros_exportacao():
+    """
+    Lê ?formato= e ?since= (data ou data/hora ISO); levanta ValueError
+    O since volta em UTC: sem fuso é lido como UTC, com fuso é convertido.
+    """
+    formato = request.args.get('formato', 'ndjson')
+    if formato not in FORMATOS_EXPORTACAO:
+        raise ValueError(f"formato deve ser um de: {', '.join(FORMATOS_EXPORTACAO)}")
+    
+    desde = _parametro_momento('since')
+    if desde:
+        desde = desde.replace(tzinfo=timezone.utc) if desde.tzinfo is None else desde.astimezone(timezone.utc)
+    return formato, desde
+
+
+def _resposta_exportacao(nome, formato, corpo):
+    resposta = Response(corpo, mimetype=FORMATOS_EXPORTACAO[formato])
+    resposta.headers['Content-Disposition'] = f'attachment; filename="{nome}.{formato}"'
+    resposta.headers['Cache-Control'] = 'private, no-store'
+    return resposta
+
+
+@app.route('/api/export/pedidos', methods=['GET'])
+def exportar_pedidos():
+    """
+    Exporta pedidos (com itens) em streaming, do mais antigo ao mais novo
+    
+    Parâmetros: formato=ndjson|csv (csv: uma linha por item) e
+    since=<data ISO, UTC se sem fuso> para pedidos a partir dessa data.
+    """
+    try:
+        formato, desde = _parametros_exportacao()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    lotes = exportacao.lotes_pedidos(pool_db, id_minimo(desde) if desde else None)
+    corpo = exportacao.csv_pedidos(lotes) if formato == 'csv' else exportacao.ndjson(lotes, app.json.dumps_bytes)
+    return _resposta_exportacao('pedidos', formato, corpo)
+
+
+@app.route('/api/export/produtos', methods=['GET'])
+def exportar_produtos():
+    """
+    Exporta o catálogo em streaming, em ordem de atualização
+    
+    Parâmetros: formato=ndjson|csv e since=<data ISO, UTC se sem fuso> para
+    produtos alterados a partir dessa data (sincronização incremental).
+    """
+    try:
+        formato, desde = _parametros_exportacao()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # updated_at usa o formato do CURRENT_TIMESTAMP do SQLite, sempre em UTC
+    lotes = exportacao.lotes_produtos(pool_db, desde.strftime('%Y-%m-%d %H:%M:%S') if desde else None)
+    corpo = exportacao.csv_produtos(lotes) if formato == 'csv' else exportacao.ndjson(lotes, app.json.dumps_bytes)
+    return _resposta_exportacao('produtos', formato, corpo)
+
+
 @app.route('/', methods=['GET'])
 def index():
     """Página inicial da API"""
@@ -587,9 +1239,21 @@ def index():
         'api': 'Sistema de Pedidos - Griffe da Prata',
         'versao': '1.0',
         'endpoints': {
-            'produtos': '/api/produtos',
-            'pedidos': '/api/pedidos',
-            'estatisticas': '/api/estatisticas'
+            'produtos': '/api/produtos?after=<codigo>&limit=&fields=&categoria=&preco_min=&preco_max=',
+            'busca': '/api/produtos/busca?q=&limit=&fields=',
+            'cache_catalogo': '/api/catalogo/cache',
+            'bulk_produtos': 'POST /api/produtos/bulk (JSON array ou NDJSON)',
+            'export_pedidos': '/api/export/pedidos?formato=ndjson|csv&since=',
+            'export_produtos': '/api/export/produtos?formato=ndjson|csv&since=',
+            'imagem_produto': '/api/produtos/<codigo>/imagem?w=&fmt=&meta=1',
+            'imagens': '/img/<hash>.avif',
+            'conversoes': '/api/conversoes/<job_id>',
+            'lotes_conversao': '/api/conversoes/lotes/<lote_id>',
+            'escrita': '/api/escrita/metricas',
+            'metricas': '/metrics (formato Prometheus)',
+            'perfis': '/admin/perfis?rota= e /admin/perfis/pilhas (X-Perfil-Token)',
+            'pedidos': '/api/pedidos?status=&after=<id>&desde=&ate=&limit=&items=0',
+            'estatisticas': '/api/estatisticas?desde=YYYY-MM-DD'
         }
     })
 
@@ -0,0 +1,146 @@
+"""
+Camada de Conexões SQLite
+Pool de conexões reutilizáveis em modo WAL para as APIs Flask
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from metricas import ConexaoMedida
+
+# Pragmas aplicados uma única vez em cada conexão nova
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",       # leitores não bloqueiam o escritor
+    "PRAGMA synchronous = NORMAL",     # seguro em WAL, evita fsync a cada commit
+    "PRAGMA busy_timeout = 5000",      # espera o lock em vez de 'database is locked'
+    "PRAGMA cache_size = -16000",      # ~16 MB de cache de páginas por conexão
+    "PRAGMA mmap_size = 134217728",    # 128 MB de leitura via mmap
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA recursive_triggers = ON",  # INSERT OR REPLACE dispara os triggers de DELETE
+)
+
+# Statements preparados mantidos em cache por conexão (chave = texto do SQL)
+STATEMENTS_EM_CACHE = 256
+
+
+def configurar_conexao(conn):
+    """Aplica os pragmas de desempenho em uma conexão"""
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class PoolConexoes:
+    """Pool de conexões SQLite compartilhado entre as threads do servidor"""
+
+    def __init__(self, db_path, tamanho=8, timeout=5.0, row_factory=sqlite3.Row):
+        self.db_path = db_path
+        self.tamanho = tamanho
+        self.timeout = timeout
+        self.row_factory = row_factory
+        self._livres = queue.LifoQueue()
+        self._criadas = 0
+        self._lock = threading.Lock()
+
+    def _nova_conexao(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=STATEMENTS_EM_CACHE,
+            factory=ConexaoMedida,  # tempo de cada comando em /metrics
+        )
+        conn.row_factory = self.row_factory
+        return configurar_conexao(conn)
+
+    def adquirir(self):
+        """Retira uma conexão do pool (cria uma nova se houver espaço)"""
+        try:
+            return self._livres.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            pode_criar = self._criadas < self.tamanho
+            if pode_criar:
+                self._criadas += 1
+
+        if pode_criar:
+            try:
+                return self._nova_conexao()
+            except Exception:
+                with self._lock:
+                    self._criadas -= 1
+                raise
+
+        try:
+            return self._livres.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Pool de conexões esgotado para {self.db_path}"
+            )
+
+    def liberar(self, conn):
+        """Devolve a conexão ao pool, desfazendo transações abertas"""
+        if conn.in_transaction:
+            conn.rollback()
+        self._livres.put(conn)
+
+    @contextmanager
+    def conexao(self):
+        """Context manager que adquire e devolve uma conexão"""
+        conn = self.adquirir()
+        try:
+            yield conn
+        finally:
+            self.liberar(conn)
+
+    def fechar(self):
+        """Fecha todas as conexões ociosas"""
+        while True:
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._criadas -= 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def obter_pool(db_path, **kwargs):
+    """Retorna o pool do banco informado (um por arquivo, por processo)"""
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = PoolConexoes(db_path, **kwargs)
+            _pools[db_path] = pool
+        return pool
+
+
+def registrar_no_flask(app, pool, chave='db'):
+    """
+    Associa o pool a uma app Flask
+
+    A conexão fica em flask.g durante a requisição e volta ao pool
+    automaticamente no teardown do contexto.
+    """
+    from flask import g
+
+    def obter():
+        if chave not in g:
+            setattr(g, chave, pool.adquirir())
+        return getattr(g, chave)
+
+    @app.teardown_appcontext
+    def _liberar_conexao(exc):
+        conn = g.pop(chave, None)
+        if conn is not None:
+            pool.liberar(conn)
+
+    return obter
@@ -0,0 +1,141 @@
+"""
+Benchmark - Motor de Regras do Chatbot
+Compara a detecção de intenção antiga (um re.search por padrão, intenção por
+intenção, com o bot recriado a cada mensagem) com o autômato de
+palavras-chave da instância do módulo, confere que os dois classificam igual
+e mede mensagens por segundo em um núcleo; mede também as respostas com o
+resumo do catálogo em memória contra a consulta FTS por mensagem da versão
+anterior do chatbot_api
+
+Uso: python benchmarks/bench_chatbot.py [mensagens]
+"""
+
+from contextlib import redirect_stdout
+from pathlib import Path
+import io
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from banco import PoolConexoes
+from busca_produtos import buscar_produtos
+from chatbot_hibrido import ChatBotInteligente, INTENCOES, gerar_resposta, responder
+from gerar_dados import PERGUNTAS, MOTIVOS, PERFIS_CATEGORIAS, gerar_dados
+from palavras_chave import normalizar
+from resumo_catalogo import ResumoCatalogo
+
+# Catálogo gerado para as respostas com preços reais
+PRODUTOS_CATALOGO = 20000
+
+EXTRAS = (
+    "Olá, boa tarde!", "Quero ver anéis", "Quanto custa?", "Aceita cartão?",
+    "Como funciona a entrega?", "É prata de verdade?", "oi quero um colar de prata com pix",
+    "Vocês têm garantia? Posso trocar?", "ok", "Qual o valor do frete para SP?",
+    "Gostaria de saber se a pulseira é original", "Tenho uma dúvida sobre o boleto",
+    "Qual o anel mais barato?", "Tem brinco disponível?", "Qual a pulseira mais cara?",
+)
+
+
+# Os padrões da versão anterior, \b(palavra|palavra|...)\b por intenção,
+# sem acentos como no autômato
+PADROES_ANTIGOS = [
+    (intencao, rf"\b({'|'.join(normalizar(palavra) for palavra in palavras)})\b")
+    for intencao, palavras in INTENCOES
+]
+
+
+def detectar_intencao_sequencial(mensagem):
+    """Implementação anterior: re.search por padrão, na ordem das intenções"""
+    mensagem_lower = normalizar(mensagem)
+    for intencao, padrao in PADROES_ANTIGOS:
+        if re.search(padrao, mensagem_lower):
+            return intencao
+    return 'geral'
+
+
+def resposta_com_fts(pool, mensagem):
+    """Versão anterior do chatbot_api: busca FTS quando a mensagem cita uma categoria"""
+    for categoria in ('anel', 'brinco', 'colar', 'pulseira', 'berloque', 'conjunto'):
+        if categoria in mensagem.lower():
+            with pool.conexao() as conn:
+                buscar_produtos(conn, categoria, limite=5)
+            break
+    return gerar_resposta(mensagem)
+
+
+def gerar_mensagens(total, semente=42):
+    aleatorio = random.Random(semente)
+    tipos = [tipo for perfil in PERFIS_CATEGORIAS.values() for tipo in perfil[4]]
+    mensagens = []
+    for _ in range(total):
+        if aleatorio.random() < 0.3:
+            mensagens.append(aleatorio.choice(EXTRAS))
+        else:
+            mensagens.append(aleatorio.choice(PERGUNTAS).format(
+                tipo=aleatorio.choice(tipos).lower(), motivo=aleatorio.choice(MOTIVOS).lower(),
+                codigo=f"A{aleatorio.randint(1, 40)}-{aleatorio.randint(1, 9999)}"
+            ))
+    return mensagens
+
+
+def medir(funcao, mensagens):
+    """Mensagens por segundo (melhor de 3 passadas)"""
+    melhor = float('inf')
+    for _ in range(3):
+        inicio = time.perf_counter()
+        for mensagem in mensagens:
+            funcao(mensagem)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return len(mensagens) / melhor
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    mensagens = gerar_mensagens(total)
+    bot = ChatBotInteligente()
+
+    print("=" * 70)
+    print(f"⏱️  MOTOR DE REGRAS DO CHATBOT ({total} mensagens, 1 núcleo)")
+    print("=" * 70)
+
+    divergencias = [m for m in mensagens if bot.detectar_intencao(m) != detectar_intencao_sequencial(m)]
+    if divergencias:
+        print(f"❌ {len(divergencias)} mensagens classificadas de forma diferente, ex.: {divergencias[0]!r}")
+        sys.exit(1)
+    print("✅ Autômato classifica igual à busca sequencial")
+
+    amostra = mensagens[:max(1, total // 20)]
+    resultados = [
+        ("intenção: re.search sequencial", medir(detectar_intencao_sequencial, mensagens)),
+        ("intenção: autômato", medir(bot.detectar_intencao, mensagens)),
+        ("resposta: bot novo por mensagem", medir(lambda m: ChatBotInteligente().gerar_resposta(m), amostra)),
+        ("resposta: instância do módulo", medir(gerar_resposta, mensagens)),
+    ]
+
+    with tempfile.TemporaryDirectory() as pasta:
+        with redirect_stdout(io.StringIO()):
+            gerar_dados(pasta, PRODUTOS_CATALOGO, pedidos=0, sessoes=0, clientes_whatsapp=0)
+        pool = PoolConexoes(str(Path(pasta) / 'pedidos.db'))
+        resumo = ResumoCatalogo(pool)
+        inicio = time.perf_counter()
+        resumo.atualizar(forcar=True)
+        carga = time.perf_counter() - inicio
+        resultados += [
+            ("catálogo: consulta FTS por mensagem", medir(lambda m: resposta_com_fts(pool, m), amostra)),
+            ("catálogo: resumo em memória", medir(lambda m: responder(m, resumo.categoria), mensagens)),
+        ]
+        pool.fechar()
+
+    print()
+    for nome, taxa in resultados:
+        print(f"   {nome:<38} {taxa:>12,.0f} mensagens/s")
+    print(f"\n🔧 Resumo de {PRODUTOS_CATALOGO} produtos carregado em {carga * 1000:.0f} ms")
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
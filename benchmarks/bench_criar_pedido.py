@@ -0,0 +1,109 @@
+"""
+Benchmark - Criação de Pedidos
+Compara a gravação antiga (um SELECT e um INSERT por item) com a atual
+(preços do cache do catálogo ou de uma consulta IN + executemany em uma
+transação) para carrinhos de 1, 20 e 200 itens
+
+Uso: python benchmarks/bench_criar_pedido.py [repeticoes]
+"""
+
+from pathlib import Path
+from statistics import median
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from banco import PoolConexoes
+from backend_api import registrar_pedido
+from migracoes import aplicar_migracoes, MIGRACOES_PEDIDOS
+
+TAMANHOS_CARRINHO = (1, 20, 200)
+TOTAL_PRODUTOS = 2000
+
+
+def criar_pedido_legado(conn, pedido_id, data_pedido, cliente_nome, cliente_whatsapp, items):
+    """Cópia da implementação anterior: consultas e inserts item a item"""
+    cursor = conn.cursor()
+    total_atacado = 0
+    total_varejo = 0
+    items_processados = []
+
+    for item in items:
+        cursor.execute('SELECT * FROM produtos WHERE codigo = ?', (item['codigo'],))
+        produto = cursor.fetchone()
+        subtotal_atacado = produto['preco_atacado'] * item['quantidade']
+        subtotal_varejo = produto['preco_varejo'] * item['quantidade']
+        total_atacado += subtotal_atacado
+        total_varejo += subtotal_varejo
+        items_processados.append((
+            pedido_id, item['codigo'], produto['titulo'], item['quantidade'],
+            produto['preco_atacado'], produto['preco_varejo'],
+            subtotal_atacado, subtotal_varejo
+        ))
+
+    cursor.execute('''
+        INSERT INTO pedidos
+        (id, data, cliente_nome, cliente_whatsapp, total_atacado, total_varejo, lucro, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 'pendente')
+    ''', (pedido_id, data_pedido, cliente_nome, cliente_whatsapp,
+          total_atacado, total_varejo, total_varejo - total_atacado))
+
+    for linha in items_processados:
+        cursor.execute('''
+            INSERT INTO pedido_items
+            (pedido_id, codigo, titulo, quantidade, preco_atacado, preco_varejo, subtotal_atacado, subtotal_varejo)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', linha)
+
+    conn.commit()
+
+
+def popular_catalogo(conn):
+    conn.executemany(
+        "INSERT INTO produtos (codigo, titulo, preco_atacado, preco_varejo) VALUES (?, ?, ?, ?)",
+        [(f"P{i:05d}", f"Produto {i}", 10.0 + i % 90, 35.0 + i % 90) for i in range(TOTAL_PRODUTOS)]
+    )
+    conn.commit()
+
+
+def medir(funcao, conn, tamanho, repeticoes, prefixo):
+    """Retorna a mediana em milissegundos de uma função de gravação"""
+    tempos = []
+    for n in range(repeticoes):
+        items = [
+            {'codigo': f"P{random.randrange(TOTAL_PRODUTOS):05d}", 'quantidade': random.randint(1, 5)}
+            for _ in range(tamanho)
+        ]
+        inicio = time.perf_counter()
+        funcao(conn, f"{prefixo}{tamanho}-{n}", "2026-01-01T00:00:00", "Cliente", "5500000000000", items)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return median(tempos)
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    with tempfile.TemporaryDirectory() as pasta:
+        pool = PoolConexoes(str(Path(pasta) / "bench.db"))
+        with pool.conexao() as conn:
+            aplicar_migracoes(conn, MIGRACOES_PEDIDOS)
+            popular_catalogo(conn)
+
+            print("=" * 60)
+            print(f"⏱️  CRIAÇÃO DE PEDIDOS (mediana de {repeticoes} execuções)")
+            print("=" * 60)
+            print(f"{'itens':>6} {'antes (ms)':>12} {'depois (ms)':>12} {'ganho':>8}")
+
+            for tamanho in TAMANHOS_CARRINHO:
+                antes = medir(criar_pedido_legado, conn, tamanho, repeticoes, "L")
+                depois = medir(registrar_pedido, conn, tamanho, repeticoes, "N")
+                print(f"{tamanho:>6} {antes:>12.3f} {depois:>12.3f} {antes / depois:>7.1f}x")
+
+        pool.fechar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark - Serialização JSON e Compressão
+Para cada endpoint compara o json da stdlib (provider padrão do Flask) com o
+orjson e mede o tamanho da resposta sem compressão, em gzip e em brotli
+
+Uso: python benchmarks/bench_json_compressao.py [repeticoes]
+"""
+
+from pathlib import Path
+from statistics import median
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flask.json.provider import DefaultJSONProvider
+
+from respostas_http import JSONProviderRapido, comprimir, codificacoes_suportadas, NIVEIS, orjson
+
+TOTAL_PRODUTOS = 2000
+TOTAL_PEDIDOS = 300
+
+ENDPOINTS = (
+    '/api/produtos?limit=500',
+    '/api/produtos/busca?q=prata&limit=100',
+    '/api/pedidos?limit=100',
+    '/api/estatisticas?desde=2000-01-01',
+)
+
+
+def popular(backend_api):
+    """Catálogo e pedidos sintéticos no banco temporário"""
+    categorias = ['ANÉIS', 'BRINCOS', 'COLARES', 'PULSEIRAS', 'PINGENTES']
+    with backend_api.pool_db.conexao() as conn:
+        conn.executemany("""
+            INSERT INTO produtos (codigo, categoria, titulo, preco_atacado, preco_varejo, peso, descricao)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (
+                f"P{i:05d}", categorias[i % len(categorias)],
+                f"{categorias[i % len(categorias)].title()} em prata 925 modelo {i}",
+                10.0 + i % 90, 35.0 + i % 90, f"{1 + i % 20}g",
+                "Peça em prata 925 com acabamento polido e garantia."
+            )
+            for i in range(TOTAL_PRODUTOS)
+        ])
+        conn.commit()
+
+        for n in range(TOTAL_PEDIDOS):
+            items = [
+                {'codigo': f"P{random.randrange(TOTAL_PRODUTOS):05d}", 'quantidade': random.randint(1, 5)}
+                for _ in range(random.randint(1, 8))
+            ]
+            backend_api.registrar_pedido(
+                conn, f"B{n:07d}", f"2026-{1 + n % 12:02d}-{1 + n % 28:02d}T10:00:00",
+                f"Cliente {n}", "5500000000000", items
+            )
+
+
+def medir_ms(funcao, repeticoes):
+    """Mediana do tempo de CPU em milissegundos"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.process_time()
+        funcao()
+        tempos.append((time.process_time() - inicio) * 1000)
+    return median(tempos)
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    with tempfile.TemporaryDirectory() as pasta:
+        # backend_api abre pedidos.db relativo ao diretório atual
+        os.chdir(pasta)
+        import backend_api
+
+        backend_api.init_db()
+        popular(backend_api)
+
+        app = backend_api.app
+        cliente = app.test_client()
+        providers = {'json': DefaultJSONProvider(app), 'orjson': JSONProviderRapido(app)}
+
+        print("=" * 78)
+        print(f"⏱️  JSON E COMPRESSÃO (mediana de {repeticoes} execuções, tempo de CPU)")
+        if orjson is None:
+            print("⚠️  orjson não instalado: as duas colunas usam a stdlib")
+        print("=" * 78)
+
+        for endpoint in ENDPOINTS:
+            payload = cliente.get(endpoint).get_json()
+            print(f"\n📡 {endpoint}")
+
+            for nome, provider in providers.items():
+                tempo = medir_ms(lambda: provider.dumps(payload), repeticoes)
+                print(f"   {nome:<8} serializar: {tempo:8.3f} ms")
+
+            dados = providers['orjson'].dumps(payload).encode()
+            print(f"   {'identity':<8} {len(dados):>9} bytes")
+            for codificacao in codificacoes_suportadas():
+                for tipo, nivel in NIVEIS[codificacao].items():
+                    corpo = comprimir(dados, codificacao, nivel)
+                    tempo = medir_ms(lambda: comprimir(dados, codificacao, nivel), max(1, repeticoes // 10))
+                    print(f"   {codificacao:<8} {len(corpo):>9} bytes  ({len(corpo) / len(dados):6.1%})"
+                          f"  nível {nivel:>2} ({tipo}): {tempo:8.3f} ms")
+
+        os.chdir(Path(__file__).resolve().parent)
+        backend_api.pool_db.fechar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark - Categorização do Catálogo por Palavras-chave
+Roda detectar_categoria (autômato de Aho-Corasick de palavras_chave) sobre o
+catálogo inteiro e compara com a busca antiga por substring (palavra in
+texto, categoria por categoria): produtos por segundo e quais produtos mudam
+de categoria
+
+Uso: python benchmarks/bench_palavras_chave.py [--produtos 100000 | --banco pedidos.db]
+"""
+
+from collections import Counter
+from contextlib import redirect_stdout
+from pathlib import Path
+import argparse
+import io
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from categorizar_produtos import CATEGORIAS, detectar_categoria
+from gerar_dados import gerar_dados
+from palavras_chave import BuscadorPalavras
+
+
+def detectar_categoria_substring(titulo, descricao=''):
+    """Implementação anterior: substring em texto minúsculo"""
+    texto = f"{titulo} {descricao}".lower()
+    for categoria, palavras_chave in CATEGORIAS.items():
+        for palavra in palavras_chave:
+            if palavra.lower() in texto:
+                return categoria
+    return 'OUTROS'
+
+
+def ler_catalogo(banco):
+    conn = sqlite3.connect(str(banco))
+    try:
+        return conn.execute("SELECT codigo, titulo, COALESCE(descricao, '') FROM produtos").fetchall()
+    finally:
+        conn.close()
+
+
+def medir(funcao, produtos):
+    """Produtos por segundo (melhor de 3 passadas) e as categorias obtidas"""
+    melhor = float('inf')
+    for _ in range(3):
+        inicio = time.perf_counter()
+        categorias = [funcao(titulo, descricao) for _, titulo, descricao in produtos]
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return len(produtos) / melhor, categorias
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Categorização do catálogo por palavras-chave")
+    parser.add_argument('--produtos', type=int, default=100000, help='tamanho do catálogo gerado')
+    parser.add_argument('--banco', type=Path, help='usar o catálogo de um pedidos.db existente')
+    args = parser.parse_args()
+
+    if args.banco:
+        produtos = ler_catalogo(args.banco)
+    else:
+        with tempfile.TemporaryDirectory() as pasta, redirect_stdout(io.StringIO()):
+            gerar_dados(pasta, args.produtos, pedidos=0, sessoes=0, clientes_whatsapp=0)
+            produtos = ler_catalogo(Path(pasta) / 'pedidos.db')
+
+    print("=" * 70)
+    print(f"⏱️  CATEGORIZAÇÃO POR PALAVRAS-CHAVE ({len(produtos)} produtos, 1 núcleo)")
+    print("=" * 70)
+
+    inicio = time.perf_counter()
+    BuscadorPalavras(CATEGORIAS.items(), plurais=True)
+    print(f"\n🔧 Autômato montado em {(time.perf_counter() - inicio) * 1000:.2f} ms")
+
+    taxa_antiga, antigas = medir(detectar_categoria_substring, produtos)
+    taxa_nova, novas = medir(detectar_categoria, produtos)
+    print(f"   substring (anterior)  {taxa_antiga:>12,.0f} produtos/s")
+    print(f"   Aho-Corasick          {taxa_nova:>12,.0f} produtos/s")
+
+    mudancas = Counter((antiga, nova) for antiga, nova in zip(antigas, novas) if antiga != nova)
+    print(f"\n🔄 {sum(mudancas.values())} produtos mudam de categoria")
+    for (antiga, nova), quantidade in mudancas.most_common(10):
+        exemplo = next(
+            titulo for (_, titulo, _), a, n in zip(produtos, antigas, novas) if (a, n) == (antiga, nova)
+        )
+        print(f"   {antiga:<10} → {nova:<10} {quantidade:>7}  ex.: {exemplo[:60]}")
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,399 @@
+"""
+Benchmark - Carga nos Três Serviços
+Popula bancos com gerar_dados (1k/10k/100k produtos, com pedidos e
+conversas proporcionais) e mede cada endpoint do backend, do chatbot e do WhatsApp de
+duas formas: com o test client do Flask (só a aplicação) e com um gerador de
+carga HTTP multi-thread contra um servidor local (aplicação + servidor WSGI)
+
+Reporta p50/p95/p99, requisições por segundo e pico de memória (RSS) do
+processo que serve as requisições, e grava tudo em JSON para comparar
+commits.
+
+Uso:
+    python benchmarks/bench_servicos.py [--tamanhos 1000 10000 100000]
+        [--modo cliente|http|ambos] [--requisicoes 300] [--threads 8]
+        [--servicos backend chatbot whatsapp] [--saida arquivo.json]
+        [--comparar resultado_anterior.json]
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+import argparse
+import http.client
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from categorizar_produtos import CATEGORIAS
+from gerar_dados import gerar_dados
+
+PASTA_RESULTADOS = RAIZ / 'benchmarks' / 'resultados'
+
+TAMANHOS = (1000, 10000, 100000)
+
+# (módulo, atributo da app, função de inicialização)
+SERVICOS = {
+    'backend': ('backend_api', 'init_db'),
+    'chatbot': ('chatbot_api', 'init_db'),
+    'whatsapp': ('whatsapp_bot', 'init_whatsapp_db'),
+}
+
+
+# ==================== DADOS ====================
+
+def popular(pasta, total_produtos, semente=42):
+    """Bancos com dados realistas de gerar_dados (proporções padrão da loja)"""
+    with redirect_stdout(io.StringIO()):
+        return gerar_dados(pasta, total_produtos, semente=semente)
+
+
+def contexto_dos_bancos(pasta, limite=2000):
+    """Códigos, pedidos, sessões e números existentes (alvos das requisições)"""
+    def valores(banco, sql):
+        conn = sqlite3.connect(str(Path(pasta) / banco))
+        try:
+            return [row[0] for row in conn.execute(sql, (limite,))]
+        finally:
+            conn.close()
+
+    return {
+        'codigos': valores('pedidos.db', "SELECT codigo FROM produtos ORDER BY random() LIMIT ?"),
+        'pedidos': valores('pedidos.db', "SELECT id FROM pedidos ORDER BY random() LIMIT ?"),
+        'sessoes': valores('chatbot_conversas.db', "SELECT sessao_id FROM sessoes ORDER BY random() LIMIT ?"),
+        'numeros': valores('whatsapp_conversas.db',
+                           "SELECT numero_telefone FROM clientes_whatsapp ORDER BY random() LIMIT ?"),
+    }
+
+
+# ==================== ENDPOINTS ====================
+
+def _pedido_novo(ctx, aleatorio):
+    items = [{'codigo': aleatorio.choice(ctx['codigos']), 'quantidade': aleatorio.randint(1, 3)}
+             for _ in range(aleatorio.randint(1, 5))]
+    return {'cliente_nome': 'Benchmark', 'cliente_whatsapp': '5500000000000', 'items': items}
+
+
+# servico -> [(nome, gerador(ctx, aleatorio) -> (método, url, corpo JSON ou None))]
+ENDPOINTS = {
+    'backend': [
+        ('GET /api/produtos', lambda ctx, a: ('GET', '/api/produtos?limit=50', None)),
+        ('GET /api/produtos?categoria', lambda ctx, a: ('GET', f'/api/produtos?limit=50&categoria={urllib.parse.quote(a.choice(list(CATEGORIAS)))}', None)),
+        ('GET /api/produtos/busca', lambda ctx, a: ('GET', f'/api/produtos/busca?q={urllib.parse.quote(a.choice(("anel", "colar prata", "brinco")))}', None)),
+        ('GET /api/produtos/<codigo>', lambda ctx, a: ('GET', f'/api/produtos/{a.choice(ctx["codigos"])}', None)),
+        ('GET /api/pedidos', lambda ctx, a: ('GET', '/api/pedidos?limit=50', None)),
+        ('GET /api/pedidos/<id>', lambda ctx, a: ('GET', f'/api/pedidos/{a.choice(ctx["pedidos"])}', None)),
+        ('GET /api/estatisticas', lambda ctx, a: ('GET', '/api/estatisticas', None)),
+        ('POST /api/pedidos', lambda ctx, a: ('POST', '/api/pedidos', _pedido_novo(ctx, a))),
+    ],
+    'chatbot': [
+        ('POST /api/chatbot/mensagem', lambda ctx, a: ('POST', '/api/chatbot/mensagem', {
+            'mensagem': a.choice(('Quero ver anéis', 'Quanto custa o colar?', 'Aceita cartão?')),
+            'sessao_id': a.choice(ctx['sessoes'])})),
+        ('GET /api/chatbot/historico/<sessao>', lambda ctx, a: ('GET', f'/api/chatbot/historico/{a.choice(ctx["sessoes"])}', None)),
+        ('GET /api/chatbot/estatisticas', lambda ctx, a: ('GET', '/api/chatbot/estatisticas', None)),
+    ],
+    'whatsapp': [
+        ('POST /whatsapp/webhook', lambda ctx, a: ('POST', '/whatsapp/webhook', {
+            'from': f'whatsapp:{a.choice(ctx["numeros"])}', 'body': 'Qual o preço da pulseira?'})),
+        ('GET /whatsapp/historico/<numero>', lambda ctx, a: ('GET', f'/whatsapp/historico/{a.choice(ctx["numeros"])}', None)),
+        ('GET /whatsapp/clientes', lambda ctx, a: ('GET', '/whatsapp/clientes', None)),
+        ('GET /whatsapp/estatisticas', lambda ctx, a: ('GET', '/whatsapp/estatisticas', None)),
+    ],
+}
+
+
+# ==================== MEDIÇÃO ====================
+
+def percentil(ordenados, p):
+    """Percentil por interpolação linear de uma lista já ordenada"""
+    if not ordenados:
+        return None
+    posicao = (len(ordenados) - 1) * p / 100
+    base = int(posicao)
+    proximo = min(base + 1, len(ordenados) - 1)
+    return ordenados[base] + (ordenados[proximo] - ordenados[base]) * (posicao - base)
+
+
+def resumir(tempos_ms, erros, duracao_s):
+    ordenados = sorted(tempos_ms)
+    return {
+        'n': len(tempos_ms),
+        'erros': erros,
+        'p50_ms': round(percentil(ordenados, 50), 3) if ordenados else None,
+        'p95_ms': round(percentil(ordenados, 95), 3) if ordenados else None,
+        'p99_ms': round(percentil(ordenados, 99), 3) if ordenados else None,
+        'media_ms': round(sum(ordenados) / len(ordenados), 3) if ordenados else None,
+        'rps': round(len(tempos_ms) / duracao_s, 1) if duracao_s > 0 else None,
+    }
+
+
+def rss_pico_mb(pid=None):
+    """Pico de RSS (VmHWM) de um processo; do próprio processo via getrusage"""
+    if pid is not None:
+        try:
+            for linha in Path(f'/proc/{pid}/status').read_text().splitlines():
+                if linha.startswith('VmHWM:'):
+                    return round(int(linha.split()[1]) / 1024, 1)
+        except OSError:
+            return None
+        return None
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return round(pico / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _importar_servico(servico):
+    modulo, inicializar = SERVICOS[servico]
+    with redirect_stdout(io.StringIO()):
+        app_modulo = __import__(modulo)
+        getattr(app_modulo, inicializar)()
+    return app_modulo.app
+
+
+# ---------- modo cliente (subprocesso por serviço) ----------
+
+def executar_cliente(pasta, servico, requisicoes, semente):
+    """Roda dentro do subprocesso: test client do Flask, uma requisição por vez"""
+    os.chdir(pasta)
+    app = _importar_servico(servico)
+    ctx = contexto_dos_bancos(pasta)
+    aleatorio = random.Random(semente)
+    cliente = app.test_client()
+    resultados = {}
+
+    for nome, gerar in ENDPOINTS[servico]:
+        for _ in range(max(5, requisicoes // 20)):  # aquecimento
+            metodo, url, corpo = gerar(ctx, aleatorio)
+            cliente.open(url, method=metodo, json=corpo)
+
+        tempos, erros = [], 0
+        inicio_total = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            for _ in range(requisicoes):
+                metodo, url, corpo = gerar(ctx, aleatorio)
+                inicio = time.perf_counter()
+                resposta = cliente.open(url, method=metodo, json=corpo)
+                resposta.get_data()
+                tempos.append((time.perf_counter() - inicio) * 1000)
+                erros += resposta.status_code >= 400
+        resultados[nome] = resumir(tempos, erros, time.perf_counter() - inicio_total)
+
+    return {'endpoints': resultados, 'rss_pico_mb': rss_pico_mb()}
+
+
+# ---------- modo HTTP (servidor em subprocesso + carga multi-thread) ----------
+
+def executar_servidor(pasta, servico):
+    """Roda dentro do subprocesso: servidor WSGI multi-thread em porta livre"""
+    from werkzeug.serving import make_server, WSGIRequestHandler
+
+    class ManterConexao(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive entre as requisições do gerador
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    os.chdir(pasta)
+    app = _importar_servico(servico)
+    servidor = make_server('127.0.0.1', 0, app, threaded=True, request_handler=ManterConexao)
+    print(servidor.server_port, flush=True)
+    with redirect_stdout(io.StringIO()):
+        servidor.serve_forever()
+
+
+def gerar_carga(porta, gerar, ctx, requisicoes, threads, semente):
+    """N requisições divididas entre threads, cada uma com conexão keep-alive"""
+    tempos, erros = [], [0]
+    lock = threading.Lock()
+    restantes = [requisicoes]
+
+    def trabalhador(indice):
+        aleatorio = random.Random(semente + indice)
+        conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=30)
+        locais = []
+        while True:
+            with lock:
+                if restantes[0] <= 0:
+                    break
+                restantes[0] -= 1
+            metodo, url, corpo = gerar(ctx, aleatorio)
+            dados = json.dumps(corpo).encode() if corpo is not None else None
+            cabecalhos = {'Content-Type': 'application/json'} if dados else {}
+            inicio = time.perf_counter()
+            try:
+                conexao.request(metodo, url, body=dados, headers=cabecalhos)
+                resposta = conexao.getresponse()
+                resposta.read()
+                falhou = resposta.status >= 400
+            except (OSError, http.client.HTTPException):
+                conexao.close()
+                conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=30)
+                falhou = True
+            locais.append((time.perf_counter() - inicio) * 1000)
+            if falhou:
+                with lock:
+                    erros[0] += 1
+        conexao.close()
+        with lock:
+            tempos.extend(locais)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(trabalhador, range(threads)))
+    return resumir(tempos, erros[0], time.perf_counter() - inicio)
+
+
+def medir_http(pasta, servico, requisicoes, threads, semente):
+    processo = subprocess.Popen(
+        [sys.executable, __file__, '--servidor', servico, '--pasta', str(pasta)],
+        stdout=subprocess.PIPE, text=True
+    )
+    try:
+        porta = int(processo.stdout.readline())
+        ctx = contexto_dos_bancos(pasta)
+        resultados = {}
+        for nome, gerar in ENDPOINTS[servico]:
+            gerar_carga(porta, gerar, ctx, max(threads, requisicoes // 20), threads, semente)  # aquecimento
+            resultados[nome] = gerar_carga(porta, gerar, ctx, requisicoes, threads, semente)
+        return {'endpoints': resultados, 'rss_pico_mb': rss_pico_mb(processo.pid)}
+    finally:
+        processo.terminate()
+        processo.wait()
+
+
+def medir_cliente(pasta, servico, requisicoes, semente):
+    saida = subprocess.run(
+        [sys.executable, __file__, '--cliente', servico, '--pasta', str(pasta),
+         '--requisicoes', str(requisicoes), '--semente', str(semente)],
+        stdout=subprocess.PIPE, text=True, check=True
+    ).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+# ==================== RELATÓRIO ====================
+
+def commit_atual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def imprimir(linhas):
+    print(f"\n{'tamanho':>8} {'modo':<8} {'endpoint':<38} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>9} {'erros':>6}")
+    for linha in linhas:
+        print(f"{linha['tamanho']:>8} {linha['modo']:<8} {linha['endpoint']:<38} "
+              f"{linha['p50_ms']:>8.2f} {linha['p95_ms']:>8.2f} {linha['p99_ms']:>8.2f} "
+              f"{linha['rps']:>9.1f} {linha['erros']:>6}")
+
+
+def comparar(atual, anterior):
+    """Variação do p95 e do rps em relação a um resultado salvo"""
+    chave = lambda linha: (linha['tamanho'], linha['modo'], linha['endpoint'])
+    base = {chave(linha): linha for linha in anterior['resultados']}
+    print(f"\n📊 Comparação com {anterior.get('commit')} ({anterior.get('data')})")
+    print(f"{'tamanho':>8} {'modo':<8} {'endpoint':<38} {'Δ p95':>9} {'Δ rps':>9}")
+    for linha in atual['resultados']:
+        antes = base.get(chave(linha))
+        if not antes or not antes['p95_ms'] or not antes['rps']:
+            continue
+        delta_p95 = (linha['p95_ms'] / antes['p95_ms'] - 1) * 100
+        delta_rps = (linha['rps'] / antes['rps'] - 1) * 100
+        alerta = ' ⚠️' if delta_p95 > 20 or delta_rps < -20 else ''
+        print(f"{linha['tamanho']:>8} {linha['modo']:<8} {linha['endpoint']:<38} "
+              f"{delta_p95:>+8.1f}% {delta_rps:>+8.1f}%{alerta}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=list(TAMANHOS))
+    parser.add_argument('--modo', choices=('cliente', 'http', 'ambos'), default='ambos')
+    parser.add_argument('--servicos', nargs='+', choices=list(SERVICOS), default=list(SERVICOS))
+    parser.add_argument('--requisicoes', type=int, default=300, help='por endpoint')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', type=Path)
+    parser.add_argument('--comparar', type=Path)
+    # Modos internos dos subprocessos
+    parser.add_argument('--cliente', choices=list(SERVICOS), help=argparse.SUPPRESS)
+    parser.add_argument('--servidor', choices=list(SERVICOS), help=argparse.SUPPRESS)
+    parser.add_argument('--pasta', type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cliente:
+        print(json.dumps(executar_cliente(args.pasta, args.cliente, args.requisicoes, args.semente)))
+        return
+    if args.servidor:
+        executar_servidor(args.pasta, args.servidor)
+        return
+
+    modos = ('cliente', 'http') if args.modo == 'ambos' else (args.modo,)
+    resultado = {
+        'commit': commit_atual(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'parametros': {k: v for k, v in vars(args).items()
+                       if k in ('tamanhos', 'modo', 'servicos', 'requisicoes', 'threads', 'semente')},
+        'resultados': [],
+    }
+
+    print("=" * 78)
+    print(f"⏱️  CARGA NOS SERVIÇOS ({args.requisicoes} requisições por endpoint, {args.threads} threads no HTTP)")
+    print("=" * 78)
+
+    for tamanho in args.tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            inicio = time.perf_counter()
+            contagens = popular(pasta, tamanho, args.semente)
+            resultado.setdefault('linhas', {})[tamanho] = contagens
+            print(f"\n📦 {tamanho} produtos: {sum(contagens.values())} linhas geradas em "
+                  f"{time.perf_counter() - inicio:.1f}s")
+
+            for servico in args.servicos:
+                for modo in modos:
+                    if modo == 'cliente':
+                        medicao = medir_cliente(pasta, servico, args.requisicoes, args.semente)
+                    else:
+                        medicao = medir_http(pasta, servico, args.requisicoes, args.threads, args.semente)
+                    print(f"   {servico:<9} {modo:<8} pico de RSS: {medicao['rss_pico_mb']} MB")
+                    for endpoint, numeros in medicao['endpoints'].items():
+                        resultado['resultados'].append({
+                            'tamanho': tamanho, 'modo': modo, 'servico': servico, 'endpoint': endpoint,
+                            **numeros, 'rss_pico_mb': medicao['rss_pico_mb'],
+                        })
+
+    imprimir(resultado['resultados'])
+
+    saida = args.saida or PASTA_RESULTADOS / f"servicos-{datetime.now():%Y%m%d-%H%M%S}-{resultado['commit'] or 'sem-git'}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(resultado, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"\n💾 Resultados salvos em {saida}")
+
+    if args.comparar:
+        comparar(resultado, json.loads(args.comparar.read_text(encoding='utf-8')))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Busca de Produtos (SQLite FTS5)
+Índice produtos_fts sobre código, título, categoria e descrição, sem acentos
+e sem diferenciar maiúsculas, com resultados ordenados por BM25
+"""
+
+import re
+
+# Pesos BM25 na ordem das colunas do índice: codigo, titulo, categoria, descricao
+PESOS_BM25 = (10.0, 5.0, 3.0, 1.0)
+
+RE_TERMO = re.compile(r'\w+')
+
+SQL_CRIAR_INDICE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS produtos_fts USING fts5(
+        codigo, titulo, categoria, descricao,
+        content='produtos', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+
+_COLUNAS = "codigo, titulo, categoria, descricao"
+_INSERIR = f"INSERT INTO produtos_fts (rowid, {_COLUNAS}) VALUES (NEW.rowid, NEW.codigo, NEW.titulo, NEW.categoria, NEW.descricao);"
+_REMOVER = (
+    f"INSERT INTO produtos_fts (produtos_fts, rowid, {_COLUNAS}) "
+    "VALUES ('delete', OLD.rowid, OLD.codigo, OLD.titulo, OLD.categoria, OLD.descricao);"
+)
+
+# INSERT OR REPLACE só dispara o trigger de DELETE com recursive_triggers
+# ligado (ver banco.PRAGMAS)
+SQL_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_produtos_fts_insert AFTER INSERT ON produtos
+    BEGIN {_INSERIR} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_produtos_fts_delete AFTER DELETE ON produtos
+    BEGIN {_REMOVER} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_produtos_fts_update AFTER UPDATE OF {_COLUNAS} ON produtos
+    BEGIN {_REMOVER} {_INSERIR} END
+    """,
+]
+
+
+def configurar_ranking(conn):
+    """Grava os pesos BM25 como ranking padrão do índice (ORDER BY rank)"""
+    pesos = ', '.join(str(peso) for peso in PESOS_BM25)
+    conn.execute("INSERT INTO produtos_fts (produtos_fts, rank) VALUES ('rank', ?)", (f"bm25({pesos})",))
+
+
+def reconstruir_indice_busca(conn):
+    """Reindexa todo o catálogo (após VACUUM os rowids de produtos podem mudar)"""
+    conn.execute("INSERT INTO produtos_fts (produtos_fts) VALUES ('rebuild')")
+
+
+def consulta_fts(texto):
+    """
+    Converte texto livre em uma expressão MATCH
+
+    Cada termo vira um prefixo entre aspas (sem operadores do usuário) e
+    todos precisam aparecer. Acentos e caixa são tratados pelo tokenizer.
+    """
+    return ' '.join(f'"{termo}"*' for termo in RE_TERMO.findall(texto))
+
+
+def sql_busca(colunas):
+    """Busca FTS com as colunas (separadas por vírgula) lidas de produtos"""
+    # O índice também tem codigo, titulo...: as colunas vêm sempre de produtos
+    colunas = ', '.join(f"produtos.{coluna.strip()}" for coluna in colunas.split(','))
+    return f"""
+        SELECT {colunas}
+        FROM produtos_fts JOIN produtos ON produtos.rowid = produtos_fts.rowid
+        WHERE produtos_fts MATCH ?
+        ORDER BY produtos_fts.rank
+        LIMIT ?
+    """
+
+
+def buscar_produtos(conn, texto, limite=20, colunas="codigo, titulo, preco_varejo, peso"):
+    """Produtos que casam com o texto, do mais ao menos relevante"""
+    consulta = consulta_fts(texto)
+    if not consulta:
+        return []
+    return conn.execute(sql_busca(colunas), (consulta, limite)).fetchall()
@@ -0,0 +1,192 @@
+"""
+Cache do Catálogo em Memória
+Produtos por código e respostas JSON já serializadas das listagens, com
+versão monotônica do catálogo e descarte LRU acima do limite de memória
+"""
+
+from collections import OrderedDict
+from uuid import uuid4
+import threading
+import time
+
+TAMANHO_MAXIMO = 32 * 1024 * 1024  # bytes estimados de todas as entradas
+CUSTO_CAMPO = 64  # overhead aproximado de cada chave/valor de um dict
+# Intervalo mínimo entre duas consultas da versão do catálogo no banco (segundos)
+INTERVALO_VERIFICACAO = 1.0
+
+
+def _tamanho_produto(produto):
+    """Estimativa barata da memória de um produto (os textos dominam)"""
+    textos = sum(len(valor) for valor in produto.values() if isinstance(valor, str))
+    return textos + CUSTO_CAMPO * len(produto)
+
+
+class CacheCatalogo:
+    """
+    Cache read-through do catálogo, invalidado pelos handlers de escrita
+
+    Produtos ficam sob a chave ('produto', codigo) e listagens sob
+    ('lista', ...); ambos dividem o mesmo limite LRU. Toda escrita no
+    catálogo incrementa a versão, e um valor carregado do banco só entra
+    no cache se a versão não mudou durante a carga (sem reviver dados
+    sobrescritos por uma escrita concorrente).
+
+    Escritas de outros processos (outros workers, cargas e scripts) chegam
+    por sincronizar(conn): no máximo a cada `intervalo` segundos,
+    ler_alteracoes(conn, desde) informa a versão do catálogo no banco e os
+    códigos alterados, que são descartados como em invalidar().
+    """
+
+    def __init__(self, tamanho_maximo=TAMANHO_MAXIMO, ler_alteracoes=None, intervalo=INTERVALO_VERIFICACAO):
+        self.tamanho_maximo = tamanho_maximo
+        # A versão recomeça a cada processo; a instância distingue as execuções
+        self.instancia = uuid4().hex[:8]
+        self.versao = 1
+        self.ler_alteracoes = ler_alteracoes  # (conn, desde) -> (versao, códigos ou None)
+        self.intervalo = intervalo
+        self.versao_banco = None
+        self._proxima_verificacao = 0.0
+        self._entradas = OrderedDict()  # chave -> (valor, tamanho)
+        self._tamanho = 0
+        self._contadores = {tipo: {'hits': 0, 'misses': 0} for tipo in ('produto', 'lista')}
+        self._descartes = 0
+        self._lock = threading.Lock()
+
+    # ---------- leitura ----------
+
+    def _buscar(self, chave):
+        entrada = self._entradas.get(chave)
+        contador = self._contadores[chave[0]]
+        if entrada is None:
+            contador['misses'] += 1
+            return None
+        contador['hits'] += 1
+        self._entradas.move_to_end(chave)
+        return entrada[0]
+
+    def _guardar(self, chave, valor, tamanho, versao):
+        if versao != self.versao or tamanho > self.tamanho_maximo:
+            return
+        anterior = self._entradas.pop(chave, None)
+        if anterior is not None:
+            self._tamanho -= anterior[1]
+        self._entradas[chave] = (valor, tamanho)
+        self._tamanho += tamanho
+        while self._tamanho > self.tamanho_maximo:
+            _, (_, tamanho_descartado) = self._entradas.popitem(last=False)
+            self._tamanho -= tamanho_descartado
+            self._descartes += 1
+
+    def obter_produtos(self, codigos, carregar):
+        """
+        Retorna {codigo: dict} para os códigos pedidos
+
+        carregar(faltando) busca no banco os que não estão no cache e
+        devolve um dict no mesmo formato; códigos inexistentes ficam de fora.
+        """
+        encontrados = {}
+        with self._lock:
+            versao = self.versao
+            for codigo in codigos:
+                produto = self._buscar(('produto', codigo))
+                if produto is not None:
+                    encontrados[codigo] = produto
+
+        faltando = [codigo for codigo in codigos if codigo not in encontrados]
+        if faltando:
+            carregados = carregar(faltando)
+            with self._lock:
+                for codigo, produto in carregados.items():
+                    self._guardar(('produto', codigo), produto, _tamanho_produto(produto), versao)
+            encontrados.update(carregados)
+
+        return encontrados
+
+    def obter_lista(self, chave, gerar):
+        """
+        Retorna o corpo JSON (bytes) de uma listagem
+
+        gerar() devolve os bytes, ou None quando a resposta não deve ser
+        guardada (ex.: erro de validação).
+        """
+        with self._lock:
+            versao = self.versao
+            corpo = self._buscar(('lista',) + tuple(chave))
+        if corpo is not None:
+            return corpo
+
+        corpo = gerar()
+        if corpo is not None:
+            with self._lock:
+                self._guardar(('lista',) + tuple(chave), corpo, len(corpo), versao)
+        return corpo
+
+    # ---------- invalidação ----------
+
+    def _descartar(self, codigos):
+        self.versao += 1
+        # A versão no banco também mudou: a próxima sincronização não espera o intervalo
+        self._proxima_verificacao = 0.0
+        if codigos is None:
+            self._entradas.clear()
+            self._tamanho = 0
+            return
+        for chave in [chave for chave in self._entradas if chave[0] == 'lista']:
+            self._tamanho -= self._entradas.pop(chave)[1]
+        for codigo in codigos:
+            entrada = self._entradas.pop(('produto', codigo), None)
+            if entrada is not None:
+                self._tamanho -= entrada[1]
+
+    def invalidar(self, *codigos):
+        """Descarta os produtos alterados e todas as listagens"""
+        with self._lock:
+            self._descartar(codigos)
+
+    def invalidar_tudo(self):
+        """Descarta todo o cache (carga completa do catálogo)"""
+        with self._lock:
+            self._descartar(None)
+
+    def sincronizar(self, conn):
+        """
+        Aplica as escritas feitas no banco por outros processos
+
+        Consulta o banco no máximo uma vez por intervalo (logo após uma
+        invalidação local, na chamada seguinte).
+        """
+        if self.ler_alteracoes is None:
+            return
+        agora = time.monotonic()
+        with self._lock:
+            if agora < self._proxima_verificacao:
+                return
+            self._proxima_verificacao = agora + self.intervalo
+            desde = self.versao_banco
+        try:
+            versao, codigos = self.ler_alteracoes(conn, desde)
+        except Exception as e:
+            print(f"⚠️ Versão do catálogo não verificada: {e}")
+            return
+        with self._lock:
+            # Outra thread já aplicou esta (ou uma versão mais nova)
+            if self.versao_banco != desde or versao == desde:
+                return
+            self._descartar(codigos)
+            self._proxima_verificacao = agora + self.intervalo
+            self.versao_banco = versao
+
+    # ---------- métricas ----------
+
+    def estatisticas(self):
+        """Contadores de hits/misses, ocupação e versão atual"""
+        with self._lock:
+            return {
+                'versao': self.versao,
+                'versao_banco': self.versao_banco,
+                'entradas': len(self._entradas),
+                'bytes': self._tamanho,
+                'bytes_maximo': self.tamanho_maximo,
+                'descartes': self._descartes,
+                **{tipo: dict(contador) for tipo, contador in self._contadores.items()}
+            }
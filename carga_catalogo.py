@@ -0,0 +1,227 @@
+"""
+Carga Incremental do Catálogo do Fornecedor
+Lê produtos_atacado_completo.json em streaming, compara o hash de cada
+produto com o gravado e só escreve os novos ou alterados, em lotes
+"""
+
+from pathlib import Path
+import hashlib
+import json
+
+TAMANHO_BLOCO = 64 * 1024
+TAMANHO_LOTE = 500
+
+# Campos vindos do fornecedor; categoria e imagem (editados no admin) ficam de fora
+CAMPOS_FONTE = (
+    'titulo', 'preco_atacado', 'preco_varejo', 'peso', 'lote', 'descricao',
+    'imagem_url', 'imagem_local'
+)
+
+SQL_UPSERT = f"""
+    INSERT INTO produtos (codigo, {', '.join(CAMPOS_FONTE)}, hash_fonte)
+    VALUES (?, {', '.join('?' * len(CAMPOS_FONTE))}, ?)
+    ON CONFLICT (codigo) DO UPDATE SET
+        {', '.join(f'{campo} = excluded.{campo}' for campo in CAMPOS_FONTE)},
+        hash_fonte = excluded.hash_fonte,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+def converter_preco(valor):
+    """Aceita número ou texto no formato do fornecedor ('R$ 12,50')"""
+    if valor is None or isinstance(valor, bool):
+        raise ValueError
+    if isinstance(valor, str):
+        valor = valor.replace('R$', '').replace(',', '.').strip()
+    preco = float(valor)
+    if preco < 0:
+        raise ValueError
+    return preco
+
+
+# ==================== LEITURA EM STREAMING ====================
+
+class _LeitorJSON:
+    """Decodifica valores JSON de um arquivo lido em blocos"""
+
+    def __init__(self, arquivo, tamanho_bloco=TAMANHO_BLOCO):
+        self.arquivo = arquivo
+        self.tamanho_bloco = tamanho_bloco
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.fim = False
+
+    def _ler_bloco(self):
+        bloco = self.arquivo.read(self.tamanho_bloco)
+        if not bloco:
+            self.fim = True
+            return False
+        self.buffer = self.buffer[self.pos:] + bloco
+        self.pos = 0
+        return True
+
+    def caractere(self):
+        """Próximo caractere que não é espaço (sem consumi-lo)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._ler_bloco():
+                raise ValueError('JSON terminou inesperadamente')
+
+    def consumir(self, *esperados):
+        c = self.caractere()
+        if c not in esperados:
+            raise ValueError(f"JSON inválido na posição {self.pos}: esperado {' ou '.join(esperados)}, veio {c!r}")
+        self.pos += 1
+        return c
+
+    def valor(self):
+        """Decodifica o próximo valor completo, lendo mais blocos se preciso"""
+        self.caractere()
+        while True:
+            try:
+                valor, fim = self.decoder.raw_decode(self.buffer, self.pos)
+                # Um número no fim do buffer pode continuar no próximo bloco
+                if fim < len(self.buffer) or self.fim:
+                    self.pos = fim
+                    return valor
+            except json.JSONDecodeError:
+                if self.fim:
+                    raise
+            self._ler_bloco()
+
+
+def produtos_do_arquivo(caminho, chave='produtos'):
+    """Gera os produtos do array 'produtos' sem carregar o arquivo inteiro"""
+    with open(caminho, 'r', encoding='utf-8') as arquivo:
+        leitor = _LeitorJSON(arquivo)
+        leitor.consumir('{')
+        if leitor.caractere() == '}':
+            return
+
+        while True:
+            nome = leitor.valor()
+            leitor.consumir(':')
+            if nome == chave:
+                leitor.consumir('[')
+                if leitor.caractere() == ']':
+                    leitor.pos += 1
+                else:
+                    while True:
+                        yield leitor.valor()
+                        if leitor.consumir(',', ']') == ']':
+                            break
+            else:
+                leitor.valor()
+
+            if leitor.consumir(',', '}') == '}':
+                return
+
+
+# ==================== CARGA ====================
+
+def normalizar(produto):
+    """Linha pronta para gravar (codigo, campos, hash); levanta ValueError"""
+    codigo = str(produto.get('codigo') or '').strip()
+    if not codigo:
+        raise ValueError('produto sem código')
+
+    valores = {campo: produto.get(campo, '') for campo in CAMPOS_FONTE}
+    valores['preco_atacado'] = converter_preco(produto.get('preco_atacado'))
+    valores['preco_varejo'] = converter_preco(produto.get('preco_varejo'))
+
+    conteudo = json.dumps([codigo, *valores.values()], ensure_ascii=False)
+    hash_fonte = hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+    return (codigo, *valores.values(), hash_fonte)
+
+
+def _gravar_lote(conn, linhas, contagem):
+    """Grava apenas as linhas novas ou com hash diferente, em uma transação"""
+    codigos = [linha[0] for linha in linhas]
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        atuais = {
+            row[0]: row[1] for row in conn.execute(
+                f"SELECT codigo, hash_fonte FROM produtos WHERE codigo IN ({', '.join('?' * len(codigos))})",
+                codigos
+            )
+        }
+        alteradas = [linha for linha in linhas if atuais.get(linha[0], '') != linha[-1]]
+        if alteradas:
+            conn.executemany(SQL_UPSERT, alteradas)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    novas = sum(1 for linha in alteradas if linha[0] not in atuais)
+    contagem['inseridos'] += novas
+    contagem['atualizados'] += len(alteradas) - novas
+    contagem['inalterados'] += len(linhas) - len(alteradas)
+
+
+def carregar_catalogo(conn, produtos, tamanho_lote=TAMANHO_LOTE):
+    """
+    Grava um iterável de produtos do fornecedor em lotes
+
+    Retorna as contagens de inseridos, atualizados, inalterados e erros.
+    Códigos repetidos no arquivo: vale a última ocorrência de cada lote.
+    """
+    contagem = {'inseridos': 0, 'atualizados': 0, 'inalterados': 0, 'erros': 0}
+    lote = {}
+    for produto in produtos:
+        try:
+            linha = normalizar(produto)
+        except (TypeError, ValueError, AttributeError):
+            contagem['erros'] += 1
+            continue
+        lote[linha[0]] = linha
+        if len(lote) >= tamanho_lote:
+            _gravar_lote(conn, list(lote.values()), contagem)
+            lote = {}
+    if lote:
+        _gravar_lote(conn, list(lote.values()), contagem)
+    return contagem
+
+
+def hash_arquivo(caminho):
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def carregar_se_alterado(conn, caminho, forcar=False):
+    """
+    Carrega o arquivo apenas se ele mudou desde a última carga
+
+    Mesmo mtime e tamanho: nem abre o arquivo. Mudou só o mtime: compara o
+    sha256 do conteúdo. Retorna as contagens, ou None se nada mudou.
+    """
+    caminho = str(Path(caminho).resolve())
+    info = Path(caminho).stat()
+    anterior = conn.execute(
+        "SELECT mtime_ns, tamanho, sha256 FROM fontes_catalogo WHERE caminho = ?", (caminho,)
+    ).fetchone()
+
+    if not forcar and anterior and (anterior[0], anterior[1]) == (info.st_mtime_ns, info.st_size):
+        return None
+
+    sha256 = hash_arquivo(caminho)
+    contagem = None
+    if forcar or not anterior or anterior[2] != sha256:
+        contagem = carregar_catalogo(conn, produtos_do_arquivo(caminho))
+
+    conn.execute("""
+        INSERT INTO fontes_catalogo (caminho, mtime_ns, tamanho, sha256, carregado_em)
+        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT (caminho) DO UPDATE SET
+            mtime_ns = excluded.mtime_ns, tamanho = excluded.tamanho,
+            sha256 = excluded.sha256, carregado_em = excluded.carregado_em
+    """, (caminho, info.st_mtime_ns, info.st_size, sha256))
+    conn.commit()
+    return contagem
@@ -4,7 +4,8 @@ Categoriza automaticamente baseado no nome/descrição
 """
 
 import sqlite3
-import re
+
+from palavras_chave import BuscadorPalavras
 
 # Categorias de joias
 CATEGORIAS = {
@@ -33,20 +34,12 @@ CATEGORIAS = {
     'OUTROS': []  # Fallback
 }
 
+# Montado uma vez: a ordem de CATEGORIAS é a prioridade entre categorias
+_buscador_categorias = BuscadorPalavras(CATEGORIAS.items(), plurais=True)
+
 def detectar_categoria(titulo, descricao=''):
-    """Detecta a categoria baseado no título e descrição"""
-    texto = f"{titulo} {descricao}".lower()
-    
-    # Verificar cada categoria
-    for categoria, palavras_chave in CATEGORIAS.items():
-        if categoria == 'OUTROS':
-            continue
-            
-        for palavra in palavras_chave:
-            if palavra.lower() in texto:
-                return categoria
-    
-    return 'OUTROS'
+    """Detecta a categoria baseado no título e descrição (palavras inteiras, sem acentos)"""
+    return _buscador_categorias.primeiro(f"{titulo} {descricao}", 'OUTROS')
 
 def categorizar_produtos():
     """Categoriza todos os produtos do banco de dados"""
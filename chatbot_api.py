@@ -6,13 +6,31 @@ Sistema inteligente SEM APIs externas - 100% Gratuito
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import sqlite3
 import json
+import sqlite3
 from datetime import datetime
-from chatbot_hibrido import gerar_resposta
+from chatbot_hibrido import responder
+from banco import obter_pool
+from migracoes import aplicar_migracoes, MIGRACOES_CHATBOT
+from busca_produtos import buscar_produtos
+from respostas_http import otimizar_respostas
+from resumo_catalogo import ResumoCatalogo
+from escrita_agrupada import escritor_opcional, gravar, FilaEscritaCheia, EscritaNaoConfirmada
+from metricas import instrumentar, medir_provedor, registrar_cache
+from perfilador import registrar_perfilador
 
 app = Flask(__name__)
 
+# JSON via orjson (se instalado) e compressão gzip/brotli das respostas
+otimizar_respostas(app)
+
+# Contagem e latência por rota, SQL e caches em GET /metrics (Prometheus)
+instrumentar(app)
+
+# Perfis cProfile + pilhas de uma fração das requisições (PERFIL_FRACAO) ou
+# das que trazem X-Perfil-Token; consulta em /admin/perfis
+registrar_perfilador(app)
+
 # CORS configurado para GitHub Pages + desenvolvimento local
 CORS(app, resources={
     r"/*": {
@@ -32,53 +50,58 @@ CORS(app, resources={
 # Banco de dados para conversas
 DB_CONVERSAS = "chatbot_conversas.db"
 
+# Catálogo de produtos mantido pelo backend principal
+DB_PRODUTOS = "pedidos.db"
+
+pool_conversas = obter_pool(DB_CONVERSAS)
+pool_produtos = obter_pool(DB_PRODUTOS)
+
+# Preços, quantidades e peças mais baratas/caras por categoria em memória;
+# relê só os produtos alterados (no máximo uma consulta de versão por segundo)
+resumo_catalogo = ResumoCatalogo(pool_produtos)
+
+def _acertos_resumo():
+    estatisticas = resumo_catalogo.estatisticas()
+    return {'categoria': (estatisticas['hits'], estatisticas['misses'])}
+
+registrar_cache('resumo_catalogo', _acertos_resumo)
+
+# Group commit opcional das mensagens (ESCRITA_AGRUPADA)
+escritor_conversas = escritor_opcional(DB_CONVERSAS)
+
+# Consultas de leitura (testar_indices.py confere o plano destas mesmas strings)
+SQL_HISTORICO_RECENTE = """
+    SELECT mensagem_usuario, mensagem_bot 
+    FROM conversas 
+    WHERE sessao_id = ? 
+    ORDER BY id DESC 
+    LIMIT ?
+"""
+SQL_HISTORICO_SESSAO = """
+    SELECT mensagem_usuario, mensagem_bot, timestamp
+    FROM conversas
+    WHERE sessao_id = ?
+    ORDER BY id ASC
+"""
+SQL_SESSOES_HOJE = """
+    SELECT COUNT(*) FROM sessoes 
+    WHERE criado_em >= DATE('now') AND criado_em < DATE('now', '+1 day')
+"""
+
 def init_db():
-    """Inicializa banco de dados de conversas"""
-    conn = sqlite3.connect(DB_CONVERSAS)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS conversas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            sessao_id TEXT NOT NULL,
-            mensagem_usuario TEXT NOT NULL,
-            mensagem_bot TEXT NOT NULL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            metadata TEXT
-        )
-    """)
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS sessoes (
-            sessao_id TEXT PRIMARY KEY,
-            email TEXT,
-            nome TEXT,
-            telefone TEXT,
-            criado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
-            ultima_atividade DATETIME DEFAULT CURRENT_TIMESTAMP,
-            total_mensagens INTEGER DEFAULT 0
-        )
-    """)
-    
-    conn.commit()
-    conn.close()
+    """Inicializa banco de dados de conversas (aplica as migrações pendentes)"""
+    with pool_conversas.conexao() as conn:
+        aplicar_migracoes(conn, MIGRACOES_CHATBOT)
     print("✅ Banco de dados do chatbot inicializado!")
 
 def get_historico_conversa(sessao_id, limite=10):
     """Busca histórico de conversa de uma sessão"""
-    conn = sqlite3.connect(DB_CONVERSAS)
-    cursor = conn.cursor()
+    with pool_conversas.conexao() as conn:
+        cursor = conn.cursor()
     
-    cursor.execute("""
-        SELECT mensagem_usuario, mensagem_bot 
-        FROM conversas 
-        WHERE sessao_id = ? 
-        ORDER BY timestamp DESC 
-        LIMIT ?
-    """, (sessao_id, limite))
+        cursor.execute(SQL_HISTORICO_RECENTE, (sessao_id, limite))
     
-    historico = cursor.fetchall()
-    conn.close()
+        historico = cursor.fetchall()
     
     # Converter para formato de mensagens
     mensagens = []
@@ -88,45 +111,43 @@ def get_historico_conversa(sessao_id, limite=10):
     
     return mensagens
 
-def salvar_conversa(sessao_id, mensagem_usuario, mensagem_bot, metadata=None):
-    """Salva conversa no banco"""
-    conn = sqlite3.connect(DB_CONVERSAS)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
+def _gravar_conversa(conn, sessao_id, mensagem_usuario, mensagem_bot, metadata):
+    conn.execute("""
         INSERT INTO conversas (sessao_id, mensagem_usuario, mensagem_bot, metadata)
         VALUES (?, ?, ?, ?)
-    """, (sessao_id, mensagem_usuario, mensagem_bot, json.dumps(metadata or {})))
+    """, (sessao_id, mensagem_usuario, mensagem_bot, metadata))
     
     # Atualizar sessão
-    cursor.execute("""
+    conn.execute("""
         INSERT INTO sessoes (sessao_id, ultima_atividade, total_mensagens)
         VALUES (?, CURRENT_TIMESTAMP, 1)
         ON CONFLICT(sessao_id) DO UPDATE SET
             ultima_atividade = CURRENT_TIMESTAMP,
             total_mensagens = total_mensagens + 1
     """, (sessao_id,))
-    
-    conn.commit()
-    conn.close()
+
+def salvar_conversa(sessao_id, mensagem_usuario, mensagem_bot, metadata=None):
+    """Salva conversa no banco (em lote com outras se a escrita agrupada estiver ativa)"""
+    args = (sessao_id, mensagem_usuario, mensagem_bot, json.dumps(metadata or {}))
+    if escritor_conversas is not None:
+        gravar(escritor_conversas, None, _gravar_conversa, *args)
+        return
+    with pool_conversas.conexao() as conn:
+        gravar(None, conn, _gravar_conversa, *args)
 
 def buscar_produtos_relevantes(query):
-    """Busca produtos relevantes baseado na query"""
-    from backend_api import get_db_connection
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Busca simples por título e código
-    cursor.execute("""
-        SELECT codigo, titulo, preco_varejo, peso
-        FROM produtos
-        WHERE titulo LIKE ? OR codigo LIKE ?
-        LIMIT 5
-    """, (f"%{query}%", f"%{query}%"))
+    """Busca produtos relevantes no índice FTS do catálogo (o mesmo da loja)"""
+    try:
+        with pool_produtos.conexao() as conn:
+            rows = buscar_produtos(conn, query, limite=5)
+    except sqlite3.Error as e:
+        # pedidos.db ainda sem as migrações do backend (sem produtos_fts):
+        # o chatbot responde sem sugerir produtos
+        print(f"⚠️ Busca de produtos indisponível: {e}")
+        return []
     
     produtos = []
-    for row in cursor.fetchall():
+    for row in rows:
         produtos.append({
             'codigo': row[0],
             'titulo': row[1],
@@ -134,7 +155,6 @@ def buscar_produtos_relevantes(query):
             'peso': row[3]
         })
     
-    conn.close()
     return produtos
 
 @app.route('/api/chatbot/mensagem', methods=['POST'])
@@ -148,34 +168,13 @@ def chatbot_mensagem():
         if not mensagem_usuario:
             return jsonify({'erro': 'Mensagem vazia'}), 400
         
-        # Buscar histórico
-        historico = get_historico_conversa(sessao_id, limite=5)
-        
-        # Buscar produtos se houver menção a categorias
-        produtos_relevantes = None
-        categorias = ['anel', 'brinco', 'colar', 'pulseira', 'berloque', 'conjunto']
-        for cat in categorias:
-            if cat in mensagem_usuario.lower():
-                produtos_relevantes = buscar_produtos_relevantes(cat)
-                break
-        
-        # Adicionar contexto de produtos se encontrou
-        contexto_adicional = ""
-        if produtos_relevantes:
-            contexto_adicional = f"\n\n**Produtos Relevantes:**\n"
-            for p in produtos_relevantes:
-                contexto_adicional += f"- {p['titulo']} ({p['codigo']}) - R$ {p['preco']:.2f}\n"
-        
-        # Preparar mensagens para API
-        mensagens = historico + [
-            {"role": "user", "content": mensagem_usuario + contexto_adicional}
-        ]
-
-        # Converter histórico para formato simples
-        historico_simples = [(msg['content'], '') for msg in historico if msg['role'] == 'user']
-        
-        # Chamar chatbot híbrido
-        resposta_bot = gerar_resposta(mensagem_usuario + contexto_adicional, 'chatbot_site', historico_simples)
+        # Chamar chatbot híbrido; preços e peças citadas vêm do resumo do
+        # catálogo em memória, e a busca FTS só entra quando o resumo não
+        # tem a categoria do produto citado
+        resumo_catalogo.atualizar()
+        resumo = resumo_catalogo.categoria if resumo_catalogo.carregado else None
+        with medir_provedor('hibrido'):
+            resposta_bot, produtos_relevantes = responder(mensagem_usuario, resumo, buscar_produtos_relevantes)
         
         if not resposta_bot:
             resposta_bot = "Desculpe, estou com dificuldades técnicas. Por favor, entre em contato pelo WhatsApp: (17) 99708-8111"
@@ -190,10 +189,13 @@ def chatbot_mensagem():
         return jsonify({
             'resposta': resposta_bot,
             'sessao_id': sessao_id,
-            'produtos': produtos_relevantes,
+            'produtos': produtos_relevantes or None,
             'timestamp': datetime.now().isoformat()
         })
         
+    except (FilaEscritaCheia, EscritaNaoConfirmada) as e:
+        # A conversa ainda pode ser gravada: não é uma recusa da mensagem
+        return jsonify({'erro': 'Servidor ocupado, tente novamente', 'detalhes': str(e)}), 503
     except Exception as e:
         print(f"Erro no chatbot: {e}")
         return jsonify({
@@ -214,16 +216,15 @@ def chatbot_iniciar():
             from uuid import uuid4
             sessao_id = str(uuid4())
         
-        conn = sqlite3.connect(DB_CONVERSAS)
-        cursor = conn.cursor()
+        with pool_conversas.conexao() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute("""
-            INSERT OR REPLACE INTO sessoes (sessao_id, nome, email, criado_em, ultima_atividade)
-            VALUES (?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-        """, (sessao_id, nome, email))
+            cursor.execute("""
+                INSERT OR REPLACE INTO sessoes (sessao_id, nome, email, criado_em, ultima_atividade)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+            """, (sessao_id, nome, email))
         
-        conn.commit()
-        conn.close()
+            conn.commit()
         
         # Mensagem de boas-vindas
         mensagem_inicial = f"""Olá{f' {nome}' if nome else ''}! 👋
@@ -252,25 +253,18 @@ Digite sua dúvida ou escolha uma opção!"""
 def chatbot_historico(sessao_id):
     """Retorna histórico de uma sessão"""
     try:
-        conn = sqlite3.connect(DB_CONVERSAS)
-        cursor = conn.cursor()
+        with pool_conversas.conexao() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT mensagem_usuario, mensagem_bot, timestamp
-            FROM conversas
-            WHERE sessao_id = ?
-            ORDER BY timestamp ASC
-        """, (sessao_id,))
+            cursor.execute(SQL_HISTORICO_SESSAO, (sessao_id,))
         
-        historico = []
-        for row in cursor.fetchall():
-            historico.append({
-                'usuario': row[0],
-                'bot': row[1],
-                'timestamp': row[2]
-            })
-        
-        conn.close()
+            historico = []
+            for row in cursor.fetchall():
+                historico.append({
+                    'usuario': row[0],
+                    'bot': row[1],
+                    'timestamp': row[2]
+                })
         
         return jsonify({
             'sessao_id': sessao_id,
@@ -281,32 +275,34 @@ def chatbot_historico(sessao_id):
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
+@app.route('/api/chatbot/escrita', methods=['GET'])
+def chatbot_metricas_escrita():
+    """Fila e tamanho dos lotes do escritor agrupado"""
+    if escritor_conversas is None:
+        return jsonify({'ativo': False})
+    return jsonify({'ativo': True, **escritor_conversas.metricas()})
+
 @app.route('/api/chatbot/estatisticas', methods=['GET'])
 def chatbot_estatisticas():
     """Retorna estatísticas do chatbot"""
     try:
-        conn = sqlite3.connect(DB_CONVERSAS)
-        cursor = conn.cursor()
-        
-        # Total de sessões
-        cursor.execute("SELECT COUNT(*) FROM sessoes")
-        total_sessoes = cursor.fetchone()[0]
+        with pool_conversas.conexao() as conn:
+            cursor = conn.cursor()
         
-        # Total de mensagens
-        cursor.execute("SELECT COUNT(*) FROM conversas")
-        total_mensagens = cursor.fetchone()[0]
+            # Total de sessões
+            cursor.execute("SELECT COUNT(*) FROM sessoes")
+            total_sessoes = cursor.fetchone()[0]
         
-        # Sessões hoje
-        cursor.execute("""
-            SELECT COUNT(*) FROM sessoes 
-            WHERE DATE(criado_em) = DATE('now')
-        """)
-        sessoes_hoje = cursor.fetchone()[0]
+            # Total de mensagens
+            cursor.execute("SELECT COUNT(*) FROM conversas")
+            total_mensagens = cursor.fetchone()[0]
         
-        # Média de mensagens por sessão
-        media_mensagens = total_mensagens / total_sessoes if total_sessoes > 0 else 0
+            # Sessões hoje
+            cursor.execute(SQL_SESSOES_HOJE)
+            sessoes_hoje = cursor.fetchone()[0]
         
-        conn.close()
+            # Média de mensagens por sessão
+            media_mensagens = total_mensagens / total_sessoes if total_sessoes > 0 else 0
         
         return jsonify({
             'total_sessoes': total_sessoes,
@@ -4,95 +4,196 @@ Funciona SEM APIs externas - 100% Gratuito e Local
 Usa processamento de linguagem natural baseado em regras
 """
 
-import re
-from typing import List, Tuple, Optional
+from types import MappingProxyType
+from typing import Callable, List, Tuple, Optional
 from datetime import datetime
 
+from categorizar_produtos import detectar_categoria
+from palavras_chave import BuscadorPalavras, tokenizar
+
+# Base de conhecimento de produtos
+PRODUTOS = MappingProxyType({
+    'anel': MappingProxyType({
+        'plural': 'anéis',
+        'descricao': 'Anéis de prata 925 lindos e elegantes',
+        'preco': 'R$ 80 a R$ 300',
+        'tipos': ('solitário', 'aliança', 'anel de compromisso', 'anel delicado')
+    }),
+    'brinco': MappingProxyType({
+        'plural': 'brincos',
+        'descricao': 'Brincos de prata 925 para todos os estilos',
+        'preco': 'R$ 50 a R$ 250',
+        'tipos': ('argola', 'pendente', 'brinco de pressão', 'ear cuff')
+    }),
+    'colar': MappingProxyType({
+        'plural': 'colares',
+        'descricao': 'Colares elegantes de prata 925',
+        'preco': 'R$ 100 a R$ 400',
+        'tipos': ('corrente', 'pingente', 'colar delicado', 'choker')
+    }),
+    'pulseira': MappingProxyType({
+        'plural': 'pulseiras',
+        'descricao': 'Pulseiras sofisticadas de prata 925',
+        'preco': 'R$ 90 a R$ 350',
+        'tipos': ('corrente', 'bracelete', 'pulseira articulada', 'charm')
+    }),
+    'conjunto': MappingProxyType({
+        'plural': 'conjuntos',
+        'descricao': 'Conjuntos coordenados de joias',
+        'preco': 'R$ 250 a R$ 600',
+        'tipos': ('colar + brinco', 'pulseira + anel', 'conjunto completo')
+    })
+})
+
+# Palavras-chave de cada intenção (palavras inteiras, sem diferenciar
+# acentos), em ordem de prioridade: se a mensagem tiver palavras de várias,
+# vale a primeira desta lista
+INTENCOES = (
+    ('saudacao', ('oi', 'olá', 'ola', 'hello', 'hey', 'bom dia', 'boa tarde', 'boa noite')),
+    ('mais_barato', ('mais barato', 'mais barata', 'mais baratos', 'mais baratas', 'menor preço', 'mais em conta')),
+    ('mais_caro', ('mais caro', 'mais cara', 'mais caros', 'mais caras', 'maior preço')),
+    ('disponibilidade', ('disponível', 'disponíveis', 'estoque', 'pronta entrega')),
+    ('produto', ('anel', 'aneis', 'brinco', 'brincos', 'colar', 'colares', 'pulseira', 'pulseiras', 'joia', 'joias')),
+    ('preco', ('preço', 'preco', 'valor', 'quanto custa', 'custo', 'caro', 'barato')),
+    ('comprar', ('comprar', 'quero', 'gostaria', 'interessado', 'adquirir')),
+    ('entrega', ('entrega', 'entregar', 'frete', 'envio', 'prazo', 'demora')),
+    ('pagamento', ('pagamento', 'pagar', 'cartão', 'cartao', 'pix', 'boleto', 'parcela')),
+    ('duvida', ('duvida', 'dúvida', 'pergunta', 'info', 'informação', 'informacao')),
+    ('qualidade', ('qualidade', 'material', 'prata', '925', 'original', 'autêntico', 'autentico')),
+    ('troca', ('troca', 'trocar', 'devolução', 'devolver', 'garantia')),
+)
+
+
+# Intenções respondidas com o resumo do catálogo quando há um produto na
+# mensagem e o resumo foi informado; as demais usam as respostas fixas
+INTENCOES_CATALOGO = frozenset({'produto', 'preco', 'mais_barato', 'mais_caro', 'disponibilidade', 'geral'})
+
+
+def _reais(valor: float) -> str:
+    """1234.5 -> 'R$ 1.234,50'"""
+    return 'R$ ' + f"{valor:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+
+
 class ChatBotInteligente:
-    """Chatbot inteligente baseado em regras e contexto"""
-    
-    def __init__(self):
-        # Base de conhecimento de produtos
-        self.produtos = {
-            'anel': {
-                'descricao': 'Anéis de prata 925 lindos e elegantes',
-                'preco': 'R$ 80 a R$ 300',
-                'tipos': ['solitário', 'aliança', 'anel de compromisso', 'anel delicado']
-            },
-            'brinco': {
-                'descricao': 'Brincos de prata 925 para todos os estilos',
-                'preco': 'R$ 50 a R$ 250',
-                'tipos': ['argola', 'pendente', 'brinco de pressão', 'ear cuff']
-            },
-            'colar': {
-                'descricao': 'Colares elegantes de prata 925',
-                'preco': 'R$ 100 a R$ 400',
-                'tipos': ['corrente', 'pingente', 'colar delicado', 'choker']
-            },
-            'pulseira': {
-                'descricao': 'Pulseiras sofisticadas de prata 925',
-                'preco': 'R$ 90 a R$ 350',
-                'tipos': ['corrente', 'bracelete', 'pulseira articulada', 'charm']
-            },
-            'conjunto': {
-                'descricao': 'Conjuntos coordenados de joias',
-                'preco': 'R$ 250 a R$ 600',
-                'tipos': ['colar + brinco', 'pulseira + anel', 'conjunto completo']
-            }
-        }
-        
-        # Padrões de intenção
-        self.intencoes = {
-            'saudacao': [r'\b(oi|olá|ola|hello|hey|bom dia|boa tarde|boa noite)\b'],
-            'produto': [r'\b(anel|aneis|brinco|brincos|colar|colares|pulseira|pulseiras|joia|joias)\b'],
-            'preco': [r'\b(preço|preco|valor|quanto custa|custo|caro|barato)\b'],
-            'comprar': [r'\b(comprar|quero|gostaria|interessado|adquirir)\b'],
-            'entrega': [r'\b(entrega|entregar|frete|envio|prazo|demora)\b'],
-            'pagamento': [r'\b(pagamento|pagar|cartão|cartao|pix|boleto|parcela)\b'],
-            'duvida': [r'\b(duvida|dúvida|pergunta|info|informação|informacao)\b'],
-            'qualidade': [r'\b(qualidade|material|prata|925|original|autêntico|autentico)\b'],
-            'troca': [r'\b(troca|trocar|devolução|devolver|garantia)\b']
-        }
-    
+    """
+    Chatbot inteligente baseado em regras e contexto
+
+    Imutável depois de criado: as tabelas, os buscadores de palavras-chave
+    e as respostas de cada (intenção, produto) são montados uma vez no
+    construtor. Use a instância do módulo (gerar_resposta) em vez de criar
+    uma por mensagem.
+
+    Preço, disponibilidade e peças mais baratas/caras vêm do resumo do
+    catálogo (resumo_catalogo.ResumoCatalogo.categoria) quando ele é
+    passado; sem resumo, ou sem dados da categoria, valem as faixas fixas
+    de PRODUTOS e as peças vêm de buscar(produto), se informado.
+    """
+
+    __slots__ = ('produtos', 'intencoes', 'categorias', '_buscador_intencoes', '_buscador_produtos', '_respostas')
+
+    def __init__(self, produtos=PRODUTOS, intencoes=INTENCOES):
+        definir = super().__setattr__
+        definir('produtos', produtos)
+        definir('intencoes', MappingProxyType(dict(intencoes)))
+        # Categoria do catálogo de cada produto ('anel' -> 'ANÉIS')
+        definir('categorias', MappingProxyType({produto: detectar_categoria(produto) for produto in produtos}))
+        definir('_buscador_intencoes', BuscadorPalavras(intencoes))
+        definir('_buscador_produtos', BuscadorPalavras(((produto, (produto,)) for produto in produtos), plurais=True))
+        definir('_respostas', MappingProxyType({
+            (intencao, produto): self._montar_resposta(intencao, produto)
+            for intencao in (*self.intencoes, 'geral')
+            for produto in (*produtos, None)
+        }))
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError(f"{type(self).__name__} é imutável")
+
     def detectar_intencao(self, mensagem: str) -> str:
-        """Detecta a intenção da mensagem"""
-        mensagem_lower = mensagem.lower()
-        
-        for intencao, padroes in self.intencoes.items():
-            for padrao in padroes:
-                if re.search(padrao, mensagem_lower):
-                    return intencao
-        
-        return 'geral'
+        """Detecta a intenção da mensagem (a de maior prioridade entre as que aparecem)"""
+        return self._buscador_intencoes.primeiro(mensagem, 'geral')
     
     def detectar_produto(self, mensagem: str) -> Optional[str]:
-        """Detecta qual produto o cliente está interessado"""
-        mensagem_lower = mensagem.lower()
-        
-        for produto in self.produtos.keys():
-            if produto in mensagem_lower or (produto + 's') in mensagem_lower:
-                return produto
-        
-        return None
+        """Detecta qual produto o cliente está interessado (singular ou plural, sem acentos)"""
+        return self._buscador_produtos.primeiro(mensagem)
     
-    def gerar_resposta(self, mensagem: str, historico: List[Tuple[str, str]] = None) -> str:
+    def gerar_resposta(self, mensagem: str, historico: List[Tuple[str, str]] = None,
+                       resumo: Optional[Callable[[str], Optional[dict]]] = None) -> str:
         """
         Gera resposta inteligente baseada em regras
         
         Args:
             mensagem: Mensagem do usuário
             historico: Histórico de conversas
+            resumo: categoria -> resumo do catálogo (None se sem produtos)
             
         Returns:
             Resposta contextual
         """
-        intencao = self.detectar_intencao(mensagem)
-        produto = self.detectar_produto(mensagem)
-        
+        return self.responder(mensagem, resumo)[0]
+
+    def responder(self, mensagem: str, resumo: Optional[Callable[[str], Optional[dict]]] = None,
+                  buscar: Optional[Callable[[str], list]] = None) -> Tuple[str, list]:
+        """
+        Como gerar_resposta(), junto com as peças do catálogo citadas na resposta
+
+        buscar(produto) é a busca de peças usada quando o resumo não tem a
+        categoria (ex.: a busca FTS do catálogo)
+        """
+        # Uma normalização da mensagem para os dois buscadores
+        palavras = tokenizar(mensagem)
+        intencao = self._buscador_intencoes.primeiro_em(palavras, 'geral')
+        produto = self._buscador_produtos.primeiro_em(palavras)
+        if produto and intencao in INTENCOES_CATALOGO:
+            dados = resumo(self.categorias[produto]) if resumo is not None else None
+            if dados is not None and dados['com_preco']:
+                return self._resposta_catalogo(intencao, produto, dados)
+            # Categoria fora do resumo não quer dizer falta de estoque
+            # (produtos sem categoria e sem palavra-chave no título, por
+            # exemplo): resposta fixa e as peças da busca
+            return self._respostas[(intencao, produto)], buscar(produto) if buscar is not None else []
+        return self._respostas[(intencao, produto)], []
+
+    def _resposta_catalogo(self, intencao: str, produto: str, resumo: dict) -> Tuple[str, list]:
+        """Resposta com os números atuais do catálogo para a categoria do produto"""
+        info = self.produtos[produto]
+        plural = info['plural']
+        faixa = f"{_reais(resumo['preco_min'])} a {_reais(resumo['preco_max'])}"
+        baratos = list(resumo['mais_baratos'])
+        if intencao in ('mais_barato', 'mais_caro'):
+            pecas = baratos if intencao == 'mais_barato' else list(resumo['mais_caros'])
+            primeira = pecas[0]
+            outras = ', '.join(f"{p['titulo']} ({_reais(p['preco'])})" for p in pecas[1:3])
+            destaque = 'mais em conta' if intencao == 'mais_barato' else 'mais sofisticada'
+            texto = (f"Nossa opção {destaque} em {plural} hoje é {primeira['titulo']} ({primeira['codigo']}), "
+                     f"por {_reais(primeira['preco'])}. 💎")
+            if outras:
+                texto += f" Outras opções: {outras}."
+            return texto, pecas
+        if intencao == 'disponibilidade':
+            return (f"Sim! Temos {resumo['quantidade']} modelos de {plural} disponíveis, de {faixa}. 💎 "
+                    "Quer que eu te mostre alguns?"), baratos
+        if intencao == 'preco':
+            return (f"Os {plural} variam de {faixa} (preço mediano {_reais(resumo['preco_mediano'])}), "
+                    f"dependendo do modelo e design. São {resumo['quantidade']} modelos no catálogo! 💎"), baratos
+        if intencao == 'produto':
+            return (f"Temos {info['descricao']}! São {resumo['quantidade']} modelos, de {faixa}. "
+                    f"Oferecemos vários tipos: {', '.join(info['tipos'])}. Gostaria de ver algum modelo específico?"), baratos
+        return (f"Interessado em {plural}? Excelente escolha! {info['descricao']} com preços de {faixa}. "
+                "Quer saber mais detalhes ou fazer um pedido?"), baratos
+    
+    def _montar_resposta(self, intencao: str, produto: Optional[str]) -> str:
+        """Resposta para uma intenção e um produto (pré-calculada no construtor)"""
         # Respostas baseadas em intenção
         if intencao == 'saudacao':
             return "Olá! 😊 Bem-vindo à Griffe da Prata! Somos especialistas em joias de prata 925. Como posso ajudar você hoje? Temos brincos, colares, anéis, pulseiras e conjuntos lindos!"
         
+        elif intencao in ('mais_barato', 'mais_caro', 'disponibilidade'):
+            if produto:
+                info = self.produtos[produto]
+                return f"Temos {info['plural']} de {info['preco']}, em vários modelos: {', '.join(info['tipos'])}. Quer que eu te mostre alguns? 💎"
+            else:
+                return "Temos brincos, colares, anéis, pulseiras e conjuntos, todos em prata 925! Qual peça você procura? Assim te mostro as opções e os preços. 💎"
+        
         elif intencao == 'produto' and produto:
             info = self.produtos[produto]
             return f"Temos {info['descricao']}! Os preços variam de {info['preco']}. Oferecemos vários tipos: {', '.join(info['tipos'])}. Gostaria de ver algum modelo específico?"
@@ -125,7 +226,10 @@ class ChatBotInteligente:
         else:
             return "Estou aqui para ajudar! 😊 Posso te mostrar nossos produtos (brincos, colares, anéis, pulseiras), falar sobre preços, formas de pagamento, entrega... O que você gostaria de saber?"
 
-# Configuração global
+# Configuração global: uma instância por processo, montada na importação
+_bot = ChatBotInteligente()
+
+
 def gerar_resposta(prompt: str, tipo: str = 'chatbot_site', historico: list = None) -> str:
     """
     Interface compatível com o sistema existente
@@ -138,12 +242,27 @@ def gerar_resposta(prompt: str, tipo: str = 'chatbot_site', historico: list = No
     Returns:
         Resposta gerada
     """
-    bot = ChatBotInteligente()
-    return bot.gerar_resposta(prompt, historico)
+    return _bot.gerar_resposta(prompt, historico)
+
+
+def responder(prompt: str, resumo: Optional[Callable[[str], Optional[dict]]] = None,
+              buscar: Optional[Callable[[str], list]] = None) -> Tuple[str, list]:
+    """
+    Resposta e peças do catálogo citadas nela (instância do módulo)
+
+    Args:
+        prompt: Mensagem do usuário
+        resumo: categoria -> resumo do catálogo, ex.: ResumoCatalogo.categoria
+        buscar: produto -> peças, quando o resumo não tem a categoria
+
+    Returns:
+        (resposta, lista de {'codigo', 'titulo', 'preco', ...})
+    """
+    return _bot.responder(prompt, resumo, buscar)
 
 if __name__ == "__main__":
     print("🤖 Testando ChatBot Inteligente...")
-    bot = ChatBotInteligente()
+    bot = _bot
     
     # Testes
     testes = [
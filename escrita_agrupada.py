@@ -0,0 +1,285 @@
+"""
+Escrita Agrupada (group commit)
+Uma thread escritora por banco recebe as escritas por uma fila e grava
+várias em cada transação, dividindo um único fsync entre elas
+"""
+
+from concurrent.futures import Future, TimeoutError as TempoEsgotado
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from banco import configurar_conexao
+from metricas import ConexaoMedida, registro
+
+INTERVALO_MS = 5       # espera máxima para juntar escritas a um lote
+MAX_COMANDOS = 200     # escritas por transação
+MAX_FILA = 10000       # acima disso novas escritas são recusadas
+TIMEOUT_ESCRITA = 10.0
+
+# Limites superiores dos buckets do histograma de tamanho de lote
+BUCKETS_LOTE = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Ativação por ambiente: "1" para todos os bancos ou uma lista de arquivos
+# (ex.: ESCRITA_AGRUPADA=pedidos.db,chatbot_conversas.db)
+VARIAVEL_ATIVACAO = 'ESCRITA_AGRUPADA'
+
+
+class FilaEscritaCheia(Exception):
+    """A thread escritora está atrasada; o cliente deve tentar mais tarde"""
+
+
+class EscritaNaoConfirmada(Exception):
+    """
+    O COMMIT não foi confirmado dentro do prazo
+
+    A escrita continua na fila e ainda pode ser gravada: o cliente deve
+    conferir o resultado antes de repetir a operação.
+    """
+
+
+class EscritorAgrupado:
+    """
+    Thread escritora de um banco SQLite
+
+    enviar(funcao, *args) devolve um Future; funcao(conn, *args) roda dentro
+    da transação do lote, isolada por um SAVEPOINT (se falhar, só ela é
+    desfeita e seu Future recebe a exceção). O lote fecha após intervalo_ms
+    desde a primeira escrita ou ao atingir max_comandos, e os Futures só são
+    resolvidos depois do COMMIT, feito com synchronous = FULL: sucesso
+    significa escrita durável.
+    """
+
+    def __init__(self, db_path, intervalo_ms=INTERVALO_MS, max_comandos=MAX_COMANDOS, max_fila=MAX_FILA):
+        self.db_path = db_path
+        self.intervalo = intervalo_ms / 1000
+        self.max_comandos = max_comandos
+        self._fila = queue.Queue(maxsize=max_fila)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._metricas = {
+            'lotes': 0,
+            'comandos': 0,
+            'erros': 0,
+            'ultimo_lote': 0,
+            'maior_lote': 0,
+            'tempo_commit_ms': 0.0,
+        }
+        self._histograma = [0] * (len(BUCKETS_LOTE) + 1)
+
+    # ---------- envio ----------
+
+    def _iniciar(self):
+        # Criada sob demanda: importar o módulo não inicia threads
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._executar, name=f'escritor-{self.db_path}', daemon=True
+                )
+                self._thread.start()
+
+    def enviar(self, funcao, *args):
+        """Agenda funcao(conn, *args) no próximo lote e retorna um Future"""
+        futuro = Future()
+        # Recria a thread se ela ainda não existe ou morreu
+        if self._thread is None or not self._thread.is_alive():
+            self._iniciar()
+        try:
+            self._fila.put_nowait((funcao, args, futuro))
+        except queue.Full:
+            raise FilaEscritaCheia(f"{self._fila.qsize()} escritas aguardando em {self.db_path}")
+        return futuro
+
+    def executar(self, sql, params=()):
+        """Atalho para um único comando SQL"""
+        return self.enviar(lambda conn: conn.execute(sql, params).rowcount)
+
+    # ---------- thread escritora ----------
+
+    def _conectar(self):
+        conn = sqlite3.connect(
+            self.db_path, isolation_level=None, check_same_thread=False, factory=ConexaoMedida
+        )
+        configurar_conexao(conn)
+        # O fsync de cada commit é dividido pelo lote inteiro
+        conn.execute("PRAGMA synchronous = FULL")
+        return conn
+
+    def _proximo_lote(self):
+        lote = [self._fila.get()]
+        limite = time.monotonic() + self.intervalo
+        while len(lote) < self.max_comandos:
+            restante = limite - time.monotonic()
+            try:
+                lote.append(self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _gravar_lote(self, conn, lote):
+        resultados = []
+        try:
+            # Dentro do try: um 'database is locked' após o busy_timeout
+            # falha só este lote
+            conn.execute("BEGIN IMMEDIATE")
+            for funcao, args, _ in lote:
+                conn.execute("SAVEPOINT escrita")
+                try:
+                    resultados.append((funcao(conn, *args), None))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO escrita")
+                    resultados.append((None, e))
+                conn.execute("RELEASE escrita")
+            inicio = time.perf_counter()
+            conn.execute("COMMIT")
+            tempo_commit = (time.perf_counter() - inicio) * 1000
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for _, _, futuro in lote:
+                futuro.set_exception(e)
+            self._registrar(len(lote), len(lote), None)
+            return
+
+        erros = 0
+        for (resultado, erro), (_, _, futuro) in zip(resultados, lote):
+            if erro is None:
+                futuro.set_result(resultado)
+            else:
+                erros += 1
+                futuro.set_exception(erro)
+        self._registrar(len(lote), erros, tempo_commit)
+
+    def _executar(self):
+        conn = None
+        while True:
+            lote = self._proximo_lote()
+            lote = [entrada for entrada in lote if entrada[2].set_running_or_notify_cancel()]
+            if not lote:
+                continue
+            # Nenhum erro encerra a thread: os Futures pendentes do lote
+            # recebem a exceção e a conexão é refeita no próximo lote
+            try:
+                if conn is None:
+                    conn = self._conectar()
+                self._gravar_lote(conn, lote)
+            except Exception as e:
+                print(f"⚠️ Escritor de {self.db_path}: lote de {len(lote)} escritas falhou: {e}")
+                for _, _, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                    conn = None
+
+    # ---------- métricas ----------
+
+    def _registrar(self, tamanho, erros, tempo_commit):
+        with self._lock:
+            m = self._metricas
+            m['lotes'] += 1
+            m['comandos'] += tamanho
+            m['erros'] += erros
+            m['ultimo_lote'] = tamanho
+            m['maior_lote'] = max(m['maior_lote'], tamanho)
+            if tempo_commit is not None:
+                m['tempo_commit_ms'] += tempo_commit
+            posicao = next((i for i, limite in enumerate(BUCKETS_LOTE) if tamanho <= limite), len(BUCKETS_LOTE))
+            self._histograma[posicao] += 1
+        tamanho_lote.observar(tamanho, self.db_path)
+
+    def metricas(self):
+        """Profundidade da fila, contadores e histograma do tamanho dos lotes"""
+        with self._lock:
+            m = dict(self._metricas)
+            histograma = list(self._histograma)
+        lotes = m['lotes']
+        tempo_commit = m.pop('tempo_commit_ms')
+        return {
+            'banco': self.db_path,
+            'profundidade_fila': self._fila.qsize(),
+            **m,
+            'media_lote': round(m['comandos'] / lotes, 2) if lotes else 0,
+            'media_commit_ms': round(tempo_commit / lotes, 3) if lotes else 0,
+            'histograma_lote': {
+                **{str(limite): n for limite, n in zip(BUCKETS_LOTE, histograma)},
+                '+Inf': histograma[-1],
+            },
+        }
+
+
+tamanho_lote = registro.histograma(
+    'griffe_escrita_lote_tamanho', 'Escritas por transação do escritor agrupado', ('banco',), BUCKETS_LOTE)
+
+
+# ==================== USO PELAS APIs ====================
+
+_escritores = {}
+_escritores_lock = threading.Lock()
+
+
+def ativada_para(db_path):
+    valor = os.getenv(VARIAVEL_ATIVACAO, '').strip()
+    if valor.lower() in ('1', 'true', 'sim'):
+        return True
+    return os.path.basename(db_path) in {nome.strip() for nome in valor.split(',') if nome.strip()}
+
+
+def obter_escritor(db_path, **kwargs):
+    """Escritor do banco (um por arquivo, por processo)"""
+    with _escritores_lock:
+        escritor = _escritores.get(db_path)
+        if escritor is None:
+            escritor = EscritorAgrupado(db_path, **kwargs)
+            _escritores[db_path] = escritor
+        return escritor
+
+
+def escritor_opcional(db_path, **kwargs):
+    """Escritor do banco se a escrita agrupada estiver ativada, senão None"""
+    return obter_escritor(db_path, **kwargs) if ativada_para(db_path) else None
+
+
+def escritores_ativos():
+    with _escritores_lock:
+        return list(_escritores.values())
+
+
+registro.coletado(
+    'griffe_escrita_fila', 'Escritas aguardando o escritor agrupado', 'gauge', ('banco',),
+    lambda: {(escritor.db_path,): escritor._fila.qsize() for escritor in escritores_ativos()}
+)
+
+
+def gravar(escritor, conn, funcao, *args, timeout=TIMEOUT_ESCRITA):
+    """
+    Executa funcao(conn, *args) como uma escrita e retorna o seu resultado
+
+    Com escritor, entra no próximo lote e espera o COMMIT; sem escritor,
+    roda na conexão informada em uma transação própria (comportamento
+    padrão). Em ambos os casos as exceções da função chegam ao chamador.
+    Se o lote não for confirmado em timeout segundos, levanta
+    EscritaNaoConfirmada (a escrita ainda pode ser gravada depois).
+    """
+    if escritor is not None:
+        futuro = escritor.enviar(funcao, *args)
+        try:
+            return futuro.result(timeout)
+        except TempoEsgotado:
+            raise EscritaNaoConfirmada(
+                f"escrita em {escritor.db_path} não confirmada em {timeout:.0f}s"
+            ) from None
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        resultado = funcao(conn, *args)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return resultado
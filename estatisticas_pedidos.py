@@ -0,0 +1,94 @@
+"""
+Estatísticas Materializadas de Pedidos
+pedidos_stats (linha única) e pedidos_stats_diarias são mantidas por
+triggers em pedidos; aqui ficam a leitura e o recálculo completo
+"""
+
+CAMPOS_STATS = ('total', 'pendentes', 'enviados', 'concluidos', 'total_lucro')
+
+
+def _delta(linha, sinal):
+    """Valores que um pedido (NEW ou OLD) soma ou subtrai dos contadores"""
+    return {
+        'total': f"{sinal}1",
+        'pendentes': f"{sinal}({linha}.status = 'pendente')",
+        'enviados': f"{sinal}({linha}.status = 'enviado')",
+        'concluidos': f"{sinal}({linha}.status = 'concluido')",
+        'total_lucro': f"{sinal}(CASE WHEN {linha}.status = 'concluido' THEN {linha}.lucro ELSE 0 END)",
+    }
+
+
+def sql_atualizar_stats(linha, sinal):
+    """Comandos de trigger que aplicam um pedido às duas tabelas de rollup"""
+    delta = _delta(linha, sinal)
+    campos = ', '.join(CAMPOS_STATS)
+    return f"""
+        UPDATE pedidos_stats SET {', '.join(f'{c} = {c} + {delta[c]}' for c in CAMPOS_STATS)}
+        WHERE id = 1;
+        INSERT INTO pedidos_stats_diarias (dia, {campos})
+        VALUES (substr({linha}.data, 1, 10), {', '.join(delta[c] for c in CAMPOS_STATS)})
+        ON CONFLICT (dia) DO UPDATE SET {', '.join(f'{c} = {c} + excluded.{c}' for c in CAMPOS_STATS)};
+    """
+
+
+def recalcular_estatisticas(conn):
+    """
+    Recalcula os rollups a partir da tabela pedidos
+
+    Não controla transação: quem chama decide (a migração já roda dentro
+    de uma; reconstruir_estatisticas abre a sua).
+    """
+    agregados = """
+        COUNT(*),
+        COALESCE(SUM(status = 'pendente'), 0),
+        COALESCE(SUM(status = 'enviado'), 0),
+        COALESCE(SUM(status = 'concluido'), 0),
+        TOTAL(CASE WHEN status = 'concluido' THEN lucro ELSE 0 END)
+    """
+    conn.execute("DELETE FROM pedidos_stats")
+    conn.execute(f"""
+        INSERT INTO pedidos_stats (id, {', '.join(CAMPOS_STATS)})
+        SELECT 1, {agregados} FROM pedidos
+    """)
+    conn.execute("DELETE FROM pedidos_stats_diarias")
+    conn.execute(f"""
+        INSERT INTO pedidos_stats_diarias (dia, {', '.join(CAMPOS_STATS)})
+        SELECT substr(data, 1, 10), {agregados} FROM pedidos GROUP BY substr(data, 1, 10)
+    """)
+
+
+def reconstruir_estatisticas(conn):
+    """Recalcula os rollups do zero em uma transação própria"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        recalcular_estatisticas(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _formatar(row):
+    stats = {campo: row[campo] for campo in CAMPOS_STATS}
+    stats['total_lucro'] = round(stats['total_lucro'] or 0, 2)
+    return stats
+
+
+SQL_ESTATISTICAS = f"SELECT {', '.join(CAMPOS_STATS)} FROM pedidos_stats WHERE id = 1"
+SQL_ESTATISTICAS_POR_DIA = f"""
+    SELECT dia, {', '.join(CAMPOS_STATS)} FROM pedidos_stats_diarias
+    WHERE dia >= ? AND total > 0
+    ORDER BY dia
+"""
+
+
+def ler_estatisticas(conn):
+    """Totais gerais: leitura de uma única linha"""
+    row = conn.execute(SQL_ESTATISTICAS).fetchone()
+    return _formatar(row)
+
+
+def estatisticas_por_dia(conn, desde):
+    """Totais por dia (YYYY-MM-DD) a partir de 'desde', em ordem cronológica"""
+    rows = conn.execute(SQL_ESTATISTICAS_POR_DIA, (desde,)).fetchall()
+    return [{'dia': row['dia'], **_formatar(row)} for row in rows]
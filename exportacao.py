@@ -0,0 +1,155 @@
+"""
+Exportação em Streaming
+Gera pedidos e produtos em NDJSON ou CSV lote a lote, com paginação por
+chave: a memória fica constante e nenhuma leitura segura o banco durante
+o download inteiro
+"""
+
+import csv
+import io
+
+TAMANHO_LOTE = 1000
+
+COLUNAS_PEDIDO = (
+    'id', 'data', 'cliente_nome', 'cliente_whatsapp', 'total_atacado',
+    'total_varejo', 'lucro', 'margem', 'status', 'enviado_fornecedor', 'data_envio'
+)
+COLUNAS_ITEM = (
+    'codigo', 'titulo', 'quantidade', 'preco_atacado', 'preco_varejo',
+    'subtotal_atacado', 'subtotal_varejo'
+)
+COLUNAS_PRODUTO = (
+    'codigo', 'categoria', 'titulo', 'preco_atacado', 'preco_varejo', 'peso',
+    'lote', 'descricao', 'imagem_url', 'imagem_hash', 'updated_at'
+)
+
+# CSV de pedidos: uma linha por item, com os dados do pedido repetidos
+CABECALHO_CSV_PEDIDOS = COLUNAS_PEDIDO + tuple(f'item_{coluna}' for coluna in COLUNAS_ITEM)
+
+
+def _lotes(pool, sql_primeiro, sql_seguinte, params, cursor_de, tamanho_lote, complementar=None):
+    """
+    Percorre uma consulta em lotes, cada um em uma leitura curta
+
+    sql_seguinte recebe os valores de cursor_de(última linha) antes dos
+    params; complementar(conn, lote) roda com a mesma conexão. A conexão
+    volta ao pool antes do lote ser entregue, enquanto o cliente o consome.
+    """
+    ultimo = None
+    while True:
+        with pool.conexao() as conn:
+            if ultimo is None:
+                rows = conn.execute(sql_primeiro, (*params, tamanho_lote)).fetchall()
+            else:
+                rows = conn.execute(sql_seguinte, (*cursor_de(ultimo), *params, tamanho_lote)).fetchall()
+            lote = [dict(row) for row in rows]
+            if lote and complementar:
+                complementar(conn, lote)
+
+        if lote:
+            yield lote
+        if len(lote) < tamanho_lote:
+            return
+        ultimo = lote[-1]
+
+
+def sql_items_lote(quantidade):
+    """Itens de 'quantidade' pedidos, agrupados por pedido"""
+    return (
+        f"SELECT pedido_id, {', '.join(COLUNAS_ITEM)} FROM pedido_items "
+        f"WHERE pedido_id IN ({', '.join('?' * quantidade)}) ORDER BY pedido_id, id"
+    )
+
+
+def _incluir_items(conn, pedidos):
+    """Itens de um lote de pedidos em uma única consulta"""
+    items = {pedido['id']: [] for pedido in pedidos}
+    for row in conn.execute(sql_items_lote(len(items)), list(items)):
+        item = dict(row)
+        items[item.pop('pedido_id')].append(item)
+    for pedido in pedidos:
+        pedido['items'] = items[pedido['id']]
+
+
+def sql_lotes_pedidos(com_inicio):
+    """(primeiro lote, lotes seguintes) da exportação de pedidos"""
+    colunas = ', '.join(COLUNAS_PEDIDO)
+    filtro = 'id >= ?' if com_inicio else '1'
+    return (
+        f"SELECT {colunas} FROM pedidos WHERE {filtro} ORDER BY id LIMIT ?",
+        f"SELECT {colunas} FROM pedidos WHERE id > ? AND {filtro} ORDER BY id LIMIT ?",
+    )
+
+
+def sql_lotes_produtos(com_inicio):
+    """(primeiro lote, lotes seguintes) da exportação de produtos"""
+    colunas = ', '.join(COLUNAS_PRODUTO)
+    filtro = 'updated_at >= ?' if com_inicio else '1'
+    return (
+        f"SELECT {colunas} FROM produtos WHERE {filtro} ORDER BY updated_at, codigo LIMIT ?",
+        f"SELECT {colunas} FROM produtos WHERE (updated_at, codigo) > (?, ?) AND {filtro} "
+        f"ORDER BY updated_at, codigo LIMIT ?",
+    )
+
+
+def lotes_pedidos(pool, id_inicial=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Pedidos (com itens) em ordem de criação, a partir de 'id_inicial'
+
+    Os IDs são ordenados por tempo: identificadores.id_minimo(data) dá o
+    início de um intervalo de datas.
+    """
+    params = (id_inicial,) if id_inicial else ()
+
+    return _lotes(
+        pool, *sql_lotes_pedidos(bool(id_inicial)),
+        params, lambda pedido: (pedido['id'],), tamanho_lote,
+        complementar=_incluir_items
+    )
+
+
+def lotes_produtos(pool, desde=None, tamanho_lote=TAMANHO_LOTE):
+    """Produtos em ordem de atualização, a partir de 'desde' (YYYY-MM-DD HH:MM:SS)"""
+    params = (desde,) if desde else ()
+
+    return _lotes(
+        pool, *sql_lotes_produtos(bool(desde)),
+        params, lambda produto: (produto['updated_at'], produto['codigo']), tamanho_lote
+    )
+
+
+# ==================== FORMATOS ====================
+
+def ndjson(lotes, dumps_bytes):
+    """Um objeto JSON por linha; cada lote vira um único chunk"""
+    for lote in lotes:
+        yield b''.join(dumps_bytes(registro) + b'\n' for registro in lote)
+
+
+def _csv(cabecalho, lotes, linhas_de):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(cabecalho)
+    for lote in lotes:
+        for registro in lote:
+            escritor.writerows(linhas_de(registro))
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def csv_pedidos(lotes):
+    """CSV com uma linha por item (pedidos sem itens saem com as colunas vazias)"""
+    def linhas(pedido):
+        base = [pedido[coluna] for coluna in COLUNAS_PEDIDO]
+        if not pedido['items']:
+            return [base + [''] * len(COLUNAS_ITEM)]
+        return [base + [item[coluna] for coluna in COLUNAS_ITEM] for item in pedido['items']]
+
+    return _csv(CABECALHO_CSV_PEDIDOS, lotes, linhas)
+
+
+def csv_produtos(lotes):
+    return _csv(COLUNAS_PRODUTO, lotes, lambda produto: [[produto[coluna] for coluna in COLUNAS_PRODUTO]])
@@ -0,0 +1,277 @@
+"""
+Fila de Conversão de Imagens
+Executa a conversão AVIF e a geração das variantes responsivas em processos
+separados, fora da thread da requisição
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from uuid import uuid4
+import multiprocessing
+import threading
+import time
+import os
+
+from imagens import gerar_variantes
+from metricas import duracao_avif
+
+
+def _converter_medindo(imagem_base64):
+    """Roda no processo conversor: devolve o resultado e o tempo gasto"""
+    inicio = time.perf_counter()
+    try:
+        resultado = gerar_variantes(imagem_base64)
+    except Exception as e:
+        # O tempo segue junto para ser registrado pelo processo principal
+        e.duracao_conversao = time.perf_counter() - inicio
+        raise
+    return resultado, time.perf_counter() - inicio
+
+
+class FilaCheia(Exception):
+    """Há conversões demais aguardando; o cliente deve tentar mais tarde"""
+
+
+class FilaConversao:
+    """
+    Fila de jobs de conversão com concorrência limitada
+
+    O pool usa no máximo metade dos núcleos, deixando CPU livre para as
+    threads que servem o catálogo, e recusa novos jobs acima de max_pendentes.
+
+    Só o job mais recente de cada produto grava a imagem; os anteriores, e
+    os em andamento quando a imagem é removida (descartar), terminam como
+    'descartado'. Se um processo conversor morrer, o pool é recriado.
+
+    Cargas em massa usam enviar_lote(): nunca recusadas, entram no pool
+    conforme abrem vagas e ocupam no máximo metade de max_pendentes, para
+    não travar os uploads unitários.
+    """
+
+    def __init__(self, armazem, pool_db, max_workers=None, max_pendentes=32, historico=1000,
+                 ao_atualizar=None):
+        self.armazem = armazem
+        self.pool_db = pool_db
+        self.ao_atualizar = ao_atualizar  # chamado com o código após gravar a imagem
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) // 2)
+        self.max_pendentes = max_pendentes
+        self.historico = historico
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._lotes = OrderedDict()
+        self._lote_do_job = {}  # job_id -> lote_id (jobs de enviar_lote)
+        self._ultimo_job = {}  # codigo -> job mais recente
+        self._pendentes = 0
+        self._lock = threading.Lock()
+        # Avisa as threads de enviar_lote quando um job termina
+        self._vaga = threading.Condition(self._lock)
+        # Serializa "ainda é o job mais recente?" + UPDATE com descartar()
+        self._lock_gravacao = threading.Lock()
+
+    def _obter_executor(self):
+        # Criado sob demanda: importar o módulo não inicia processos
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def _descartar_executor(self, executor):
+        """Troca um pool quebrado (BrokenProcessPool) por um novo na próxima chamada"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def enviar(self, codigo, imagem_base64):
+        """Agenda a conversão da imagem de um produto e retorna o id do job"""
+        job_id = uuid4().hex
+
+        with self._lock:
+            if self._pendentes >= self.max_pendentes:
+                raise FilaCheia(f"{self._pendentes} conversões aguardando")
+            self._pendentes += 1
+            self._jobs[job_id] = {
+                'id': job_id,
+                'codigo': codigo,
+                'status': 'pendente',
+                'criado_em': datetime.now().isoformat(),
+                'concluido_em': None,
+                'imagem_hash': None,
+                'erro': None
+            }
+            self._ultimo_job[codigo] = job_id
+            while len(self._jobs) > self.historico:
+                self._jobs.popitem(last=False)
+
+            executor = self._obter_executor()
+
+        self._submeter(job_id, codigo, imagem_base64, executor)
+        return job_id
+
+    def enviar_lote(self, itens):
+        """
+        Agenda as conversões de [(codigo, imagem_base64), ...] e retorna o id do lote
+
+        Não levanta FilaCheia: uma thread entrega as imagens ao pool conforme
+        abrem vagas. O andamento fica em status_lote(lote_id). Um upload
+        unitário ou descartar() feito depois tem precedência sobre o lote.
+        """
+        lote_id = uuid4().hex
+        jobs = []
+        with self._lock:
+            self._lotes[lote_id] = {
+                'id': lote_id,
+                'status': 'pendente' if itens else 'concluido',
+                'total': len(itens),
+                'concluidos': 0,
+                'erros': 0,
+                'descartados': 0,
+                'criado_em': datetime.now().isoformat(),
+                'concluido_em': None
+            }
+            while len(self._lotes) > self.historico:
+                self._lotes.popitem(last=False)
+            for codigo, imagem_base64 in itens:
+                job_id = uuid4().hex
+                self._ultimo_job[codigo] = job_id
+                self._lote_do_job[job_id] = lote_id
+                jobs.append((job_id, codigo, imagem_base64))
+
+        threading.Thread(
+            target=self._alimentar, args=(jobs,), name=f'conversao-lote-{lote_id[:8]}', daemon=True
+        ).start()
+        return lote_id
+
+    def _alimentar(self, jobs):
+        """Thread de enviar_lote: submete os jobs à medida que abrem vagas"""
+        limite = max(1, self.max_pendentes // 2)
+        jobs.reverse()
+        while jobs:
+            job_id, codigo, imagem_base64 = jobs.pop()
+            with self._vaga:
+                while self._pendentes >= limite:
+                    self._vaga.wait()
+                if self._ultimo_job.get(codigo) != job_id:
+                    # Substituída ou removida antes de chegar a vez
+                    self._contar_no_lote(job_id, 'descartado')
+                    continue
+                self._pendentes += 1
+                executor = self._obter_executor()
+            self._submeter(job_id, codigo, imagem_base64, executor)
+
+    def _submeter(self, job_id, codigo, imagem_base64, executor):
+        try:
+            try:
+                futuro = executor.submit(_converter_medindo, imagem_base64)
+            except BrokenProcessPool:
+                # Um conversor morreu: uma nova tentativa com um pool novo
+                self._descartar_executor(executor)
+                with self._lock:
+                    executor = self._obter_executor()
+                futuro = executor.submit(_converter_medindo, imagem_base64)
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                self._descartar_executor(executor)
+            print(f"⚠️  Conversão não agendada ({codigo}): {e}")
+            self._finalizar(job_id, codigo, {'status': 'erro', 'erro': str(e)})
+            return
+
+        futuro.add_done_callback(lambda f: self._concluir(job_id, codigo, f, executor))
+
+    def descartar(self, codigo):
+        """
+        Impede que conversões em andamento gravem a imagem do produto
+
+        Chamar antes de remover ou substituir a imagem no banco (e antes de
+        abrir a transação: espera uma gravação em curso terminar).
+        """
+        with self._lock_gravacao, self._lock:
+            self._ultimo_job.pop(codigo, None)
+
+    def _concluir(self, job_id, codigo, futuro, executor=None):
+        """Grava o resultado no armazém e atualiza o produto"""
+        atualizacao = {}
+        try:
+            resultado, duracao = futuro.result()
+            duracao_avif.observar(duracao, 'ok')
+            largura, altura = resultado['largura'], resultado['altura']
+            hash_imagem = self.armazem.salvar(resultado['original'])
+            self.armazem.salvar_variantes(hash_imagem, resultado['variantes'])
+
+            # Um upload mais novo do mesmo produto, ou a remoção da imagem,
+            # tem precedência
+            with self._lock_gravacao:
+                with self._lock:
+                    mais_recente = self._ultimo_job.get(codigo) == job_id
+                if mais_recente:
+                    with self.pool_db.conexao() as conn:
+                        conn.execute("""
+                            UPDATE produtos
+                            SET imagem_hash = ?, imagem_largura = ?, imagem_altura = ?, imagem = NULL,
+                                updated_at = CURRENT_TIMESTAMP
+                            WHERE codigo = ?
+                        """, (hash_imagem, largura, altura, codigo))
+                        conn.commit()
+            if mais_recente and self.ao_atualizar:
+                self.ao_atualizar(codigo)
+
+            atualizacao.update(status='concluido' if mais_recente else 'descartado', imagem_hash=hash_imagem)
+        except Exception as e:
+            if hasattr(e, 'duracao_conversao'):
+                duracao_avif.observar(e.duracao_conversao, 'erro')
+            if isinstance(e, BrokenProcessPool) and executor is not None:
+                self._descartar_executor(executor)
+            print(f"⚠️  Erro na conversão para AVIF ({codigo}): {e}")
+            atualizacao.update(status='erro', erro=str(e))
+
+        self._finalizar(job_id, codigo, atualizacao)
+
+    def _finalizar(self, job_id, codigo, atualizacao):
+        atualizacao['concluido_em'] = datetime.now().isoformat()
+        with self._lock:
+            self._pendentes -= 1
+            self._vaga.notify_all()
+            if self._ultimo_job.get(codigo) == job_id:
+                del self._ultimo_job[codigo]
+            if job_id in self._jobs:
+                self._jobs[job_id].update(atualizacao)
+            self._contar_no_lote(job_id, atualizacao['status'])
+
+    def _contar_no_lote(self, job_id, status):
+        # Chamado com self._lock
+        lote = self._lotes.get(self._lote_do_job.pop(job_id, None))
+        if lote is None:
+            return
+        lote[{'concluido': 'concluidos', 'erro': 'erros'}.get(status, 'descartados')] += 1
+        if lote['concluidos'] + lote['erros'] + lote['descartados'] == lote['total']:
+            lote['status'] = 'concluido'
+            lote['concluido_em'] = datetime.now().isoformat()
+        else:
+            lote['status'] = 'em_andamento'
+
+    def status(self, job_id):
+        """Retorna uma cópia do estado do job (ou None se desconhecido)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def status_lote(self, lote_id):
+        """Retorna uma cópia dos contadores do lote (ou None se desconhecido)"""
+        with self._lock:
+            lote = self._lotes.get(lote_id)
+            return dict(lote) if lote else None
+
+    def pendentes(self):
+        """Número de conversões aguardando ou em execução"""
+        with self._lock:
+            return self._pendentes
+
+    def encerrar(self, aguardar=True):
+        """Encerra os processos de conversão"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=aguardar)
+            self._executor = None
@@ -0,0 +1,505 @@
+"""
+Gerador de Dados Realistas
+Popula pedidos.db, chatbot_conversas.db e whatsapp_conversas.db com catálogo,
+pedidos e conversas de formato estatístico próximo ao real, para benchmarks
+e decisões de índice:
+
+- títulos de joias nas categorias de categorizar_produtos.CATEGORIAS, com
+  código, peso e lote no padrão do fornecedor ("J2-54 Brinco ... 2,1g Lote 18")
+- preço de atacado pelo peso (R$/g varia por categoria) e varejo com a
+  margem de 250% usada na importação do catálogo
+- popularidade dos produtos em lei de potência (poucos produtos concentram
+  a maior parte dos itens vendidos) e clientes recorrentes
+- mensagens por sessão de chat e por cliente de WhatsApp com distribuição
+  de Zipf (muitas conversas curtas, poucas muito longas)
+
+Grava direto com executemany em transações grandes, então escala para
+milhões de linhas.
+
+Uso:
+    python gerar_dados.py --produtos 100000 --pedidos 1000000 \
+        --pasta dados/ [--sessoes 200000] [--clientes-whatsapp 100000]
+"""
+
+from datetime import datetime, timedelta
+from itertools import accumulate, islice
+from pathlib import Path
+import argparse
+import bisect
+import json
+import math
+import random
+import sqlite3
+import time
+
+from categorizar_produtos import CATEGORIAS
+from identificadores import montar_id
+from migracoes import aplicar_migracoes, MIGRACOES_PEDIDOS, MIGRACOES_CHATBOT, MIGRACOES_WHATSAPP
+
+BANCOS = ('pedidos.db', 'chatbot_conversas.db', 'whatsapp_conversas.db')
+LINHAS_POR_TRANSACAO = 50000
+MARGEM = 2.5  # varejo = atacado * 2,5 (margem 250%), como em converter_catalogo_sql
+
+# Expoentes das distribuições
+EXPOENTE_POPULARIDADE = 1.1   # produto de posição r vendido com peso 1/r^s
+EXPOENTE_CLIENTES = 0.9       # pedidos por cliente (recorrência)
+EXPOENTE_MENSAGENS = 1.6      # mensagens por sessão/cliente
+MAX_MENSAGENS = 300
+
+# categoria -> (participação no catálogo, prefixo do código, peso mediano em g,
+#               R$/g no atacado, tipos de peça)
+PERFIS_CATEGORIAS = {
+    'ANÉIS': (0.20, 'A', 3.0, 6.5, ('Anel', 'Anel Solitário', 'Anel Aliança', 'Aliança', 'Anel Falange')),
+    'BRINCOS': (0.24, 'J', 1.8, 7.0, ('Brinco', 'Brinco Argola', 'Argola', 'Piercing', 'Brinco Ear Cuff')),
+    'COLARES': (0.12, 'C', 5.5, 5.5, ('Colar', 'Gargantilha', 'Choker', 'Colar Riviera')),
+    'PULSEIRAS': (0.14, 'P', 6.0, 5.5, ('Pulseira', 'Bracelete', 'Tornozeleira', 'Pulseira Berloque')),
+    'CONJUNTOS': (0.06, 'K', 9.0, 6.0, ('Conjunto', 'Kit', 'Conjunto Colar e Brinco')),
+    'CORRENTES': (0.10, 'R', 7.5, 4.8, ('Corrente', 'Cordão', 'Corrente Veneziana', 'Corrente Cartier', 'Cordão Grumet')),
+    'PINGENTES': (0.11, 'G', 1.5, 7.5, ('Pingente', 'Medalha', 'Crucifixo', 'Pingente São Jorge')),
+    'OUTROS': (0.03, 'X', 4.0, 3.0, ('Porta Joias', 'Chaveiro', 'Flanela Polidora', 'Expositor')),
+}
+
+MOTIVOS = (
+    'Coração', 'Olho Grego', 'Borboleta', 'Infinito', 'Estrela', 'Lua', 'Trevo', 'Flor',
+    'Folha', 'Gota', 'Cravejado', 'Zircônia', 'Pérola', 'Nó', 'Laço', 'Cruz', 'Árvore da Vida',
+    'Letra', 'Nossa Senhora', 'Ponto de Luz', 'Liso', 'Trabalhado', 'Torcido', 'Fio 320', 'Fio 390',
+)
+ACABAMENTOS = ('de Prata 925', 'Prata 925', 'Mista de Prata', 'Prata 925 Ródio Negro', 'Banhado a Ouro')
+CORES = ('', '', '', 'Vermelho', 'Azul', 'Rosa', 'Verde', 'Roxo', 'Branco', 'Multicolorido')
+
+DESCRICOES = (
+    "Peça em prata 925 legítima, com certificado de garantia.",
+    "Acabamento polido e fecho reforçado. Acompanha saquinho para presente.",
+    "Prata 925 antialérgica, ideal para uso diário.",
+    "Modelo exclusivo do fornecedor, vendido no atacado por peso.",
+)
+
+PERGUNTAS = (
+    "Quero ver {tipo}", "Tem {tipo} {motivo}?", "Quanto custa o {codigo}?",
+    "Qual o preço do {tipo} {motivo}?", "Vocês têm {tipo} de prata?", "Aceita cartão?",
+    "Qual o prazo de entrega?", "Faz entrega para o interior?", "Quero fazer um pedido",
+    "Tem desconto no atacado?", "Qual o pedido mínimo?", "Meu pedido já foi enviado?",
+    "Quero trocar um {tipo}", "Bom dia!", "Obrigada!",
+)
+RESPOSTAS = (
+    "Temos vários modelos de {tipo}! Posso te mostrar os mais vendidos?",
+    "O {codigo} sai por R$ {preco} no varejo. Quer que eu separe?",
+    "Aceitamos Pix, cartão em até 3x e boleto.",
+    "Enviamos para todo o Brasil em até 5 dias úteis.",
+    "Claro! Me passe os códigos e as quantidades.",
+    "No atacado o pedido mínimo é de R$ 300,00.",
+    "Vou verificar o status do seu pedido e já te retorno.",
+    "Olá! Como posso ajudar?",
+)
+INTENCOES = ('consulta_produto', 'preco', 'pedido', 'pagamento', 'duvida', 'rastreamento', 'troca', 'reclamacao')
+PESOS_INTENCOES = (35, 25, 12, 8, 10, 6, 3, 1)
+
+NOMES = ('Ana', 'Maria', 'Juliana', 'Fernanda', 'Camila', 'Patrícia', 'Beatriz', 'Larissa',
+         'Carla', 'Aline', 'Bruna', 'Gabriela', 'João', 'Pedro', 'Lucas', 'Rafael', 'Marcos')
+SOBRENOMES = ('Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Ferreira',
+              'Rodrigues', 'Almeida', 'Nascimento', 'Carvalho', 'Ribeiro', 'Gomes', 'Martins')
+DDDS = (11, 11, 11, 17, 17, 19, 21, 21, 31, 41, 51, 61, 71, 81, 85)
+
+
+# ==================== DISTRIBUIÇÕES ====================
+
+class Amostrador:
+    """
+    Sorteio com pesos arbitrários por busca binária nos pesos acumulados
+
+    O(log n) por amostra depois de montar a tabela, o que permite sortear
+    milhões de itens de pedido entre centenas de milhares de produtos.
+    """
+
+    def __init__(self, pesos, aleatorio):
+        self._acumulados = list(accumulate(pesos))
+        self._total = self._acumulados[-1]
+        self._aleatorio = aleatorio
+
+    def sortear(self):
+        return bisect.bisect_right(self._acumulados, self._aleatorio.random() * self._total)
+
+
+def lei_de_potencia(n, expoente, aleatorio, embaralhar=True):
+    """
+    Amostrador de índices 0..n-1 com peso 1/posição^expoente
+
+    Com embaralhar, as posições são atribuídas aos índices ao acaso (o
+    produto mais vendido não é o de menor código).
+    """
+    posicoes = list(range(1, n + 1))
+    if embaralhar:
+        aleatorio.shuffle(posicoes)
+    return Amostrador([posicao ** -expoente for posicao in posicoes], aleatorio)
+
+
+def zipf(maximo, expoente, aleatorio):
+    """Amostrador de inteiros 1..maximo com P(k) proporcional a k^-expoente"""
+    amostrador = Amostrador([k ** -expoente for k in range(1, maximo + 1)], aleatorio)
+    return lambda: amostrador.sortear() + 1
+
+
+def _preco(valor):
+    """Preço de vitrine: arredonda para cima em ,90"""
+    return math.ceil(valor) - 0.10 if valor > 1 else round(valor, 2)
+
+
+def _em_lotes(linhas, tamanho):
+    iterador = iter(linhas)
+    while lote := list(islice(iterador, tamanho)):
+        yield lote
+
+
+def _inserir(conn, sql, linhas, tamanho_lote=LINHAS_POR_TRANSACAO):
+    """executemany em transações de tamanho_lote linhas; devolve o total"""
+    total = 0
+    for lote in _em_lotes(linhas, tamanho_lote):
+        conn.execute("BEGIN")
+        conn.executemany(sql, lote)
+        conn.execute("COMMIT")
+        total += len(lote)
+    return total
+
+
+def _abrir(caminho, migracoes):
+    conn = sqlite3.connect(str(caminho), isolation_level=None)
+    aplicar_migracoes(conn, migracoes)
+    # Carga em massa: os dados podem ser gerados de novo se algo falhar
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -200000")
+    return conn
+
+
+def _telefone(aleatorio):
+    return f"55{aleatorio.choice(DDDS)}9{aleatorio.randrange(10**8):08d}"
+
+
+def _nome(aleatorio):
+    return f"{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)}"
+
+
+# ==================== CATÁLOGO ====================
+
+class Catalogo:
+    """Códigos, títulos e preços gerados (usados pelos pedidos e conversas)"""
+
+    def __init__(self):
+        self.codigos = []
+        self.titulos = []
+        self.tipos = []
+        self.precos_atacado = []
+        self.precos_varejo = []
+
+    def __len__(self):
+        return len(self.codigos)
+
+
+def gerar_catalogo(conn, total, aleatorio, tamanho_lote=LINHAS_POR_TRANSACAO):
+    # Mesma taxonomia do categorizador (KeyError se faltar perfil para uma categoria)
+    categorias = list(CATEGORIAS)
+    participacoes = [PERFIS_CATEGORIAS[categoria][0] for categoria in categorias]
+    catalogo = Catalogo()
+
+    def linhas():
+        for i in range(total):
+            categoria = aleatorio.choices(categorias, participacoes)[0]
+            _, prefixo, peso_mediano, preco_grama, tipos = PERFIS_CATEGORIAS[categoria]
+            lote = aleatorio.randint(1, 40)
+            codigo = f"{prefixo}{lote}-{i + 1}"
+            tipo = aleatorio.choice(tipos)
+            cor = aleatorio.choice(CORES)
+            titulo = ' '.join(parte for parte in (
+                codigo, tipo, aleatorio.choice(MOTIVOS), cor, aleatorio.choice(ACABAMENTOS)
+            ) if parte)
+            peso = round(max(0.3, aleatorio.lognormvariate(math.log(peso_mediano), 0.5)), 1)
+            titulo += f" Peso Aproximado {str(peso).replace('.', ',')}g Lote {lote}"
+            preco_atacado = round(peso * preco_grama * aleatorio.uniform(0.85, 1.2), 2)
+            preco_varejo = _preco(preco_atacado * MARGEM)
+
+            catalogo.codigos.append(codigo)
+            catalogo.titulos.append(titulo)
+            catalogo.tipos.append(tipo)
+            catalogo.precos_atacado.append(preco_atacado)
+            catalogo.precos_varejo.append(preco_varejo)
+            yield (codigo, categoria, titulo, preco_atacado, preco_varejo,
+                   f"{peso}g", str(lote), aleatorio.choice(DESCRICOES))
+
+    _inserir(conn, """
+        INSERT INTO produtos (codigo, categoria, titulo, preco_atacado, preco_varejo, peso, lote, descricao)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, linhas(), tamanho_lote)
+    return catalogo
+
+
+# ==================== PEDIDOS ====================
+
+def _status(idade_dias, aleatorio):
+    """Pedidos antigos já foram concluídos; os recentes ainda estão em aberto"""
+    sorteio = aleatorio.random()
+    if idade_dias < 3:
+        return 'pendente' if sorteio < 0.7 else 'enviado'
+    if idade_dias < 15:
+        return ('pendente', 'enviado', 'concluido')[(sorteio > 0.15) + (sorteio > 0.55)]
+    return 'concluido' if sorteio < 0.93 else ('enviado' if sorteio < 0.97 else 'pendente')
+
+
+def gerar_pedidos(conn, catalogo, total, dias, aleatorio, tamanho_lote=LINHAS_POR_TRANSACAO):
+    """
+    Pedidos em ordem cronológica (IDs crescentes, como em produção) com
+    volume crescendo ao longo do período; devolve (pedidos, itens)
+    """
+    produtos = lei_de_potencia(len(catalogo), EXPOENTE_POPULARIDADE, aleatorio)
+    clientes = [(_nome(aleatorio), _telefone(aleatorio)) for _ in range(max(1, total // 3))]
+    cliente = lei_de_potencia(len(clientes), EXPOENTE_CLIENTES, aleatorio)
+    itens_por_pedido = zipf(20, 1.3, aleatorio)
+    quantidade = zipf(10, 2.0, aleatorio)
+
+    agora = datetime.now()
+    inicio_ms = int((agora - timedelta(days=dias)).timestamp() * 1000)
+    periodo_ms = dias * 86400 * 1000
+    itens = []
+
+    def linhas_pedidos():
+        for n in range(total):
+            # Crescimento: densidade ~ proporcional ao tempo (raiz da fração)
+            ms = inicio_ms + int(periodo_ms * math.sqrt((n + aleatorio.random()) / total))
+            momento = datetime.fromtimestamp(ms / 1000)
+            pedido_id = montar_id(ms, aleatorio.getrandbits(80))
+            nome, telefone = clientes[cliente.sortear()]
+
+            total_atacado = total_varejo = 0
+            escolhidos = {produtos.sortear() for _ in range(itens_por_pedido())}
+            for indice in escolhidos:
+                qtd = quantidade()
+                atacado = catalogo.precos_atacado[indice]
+                varejo = catalogo.precos_varejo[indice]
+                total_atacado += atacado * qtd
+                total_varejo += varejo * qtd
+                itens.append((pedido_id, catalogo.codigos[indice], catalogo.titulos[indice], qtd,
+                              atacado, varejo, atacado * qtd, varejo * qtd))
+            yield (pedido_id, momento.isoformat(), nome, telefone, total_atacado, total_varejo,
+                   total_varejo - total_atacado, _status((agora - momento).days, aleatorio))
+
+    total_itens = 0
+    sql_pedidos = """
+        INSERT INTO pedidos (id, data, cliente_nome, cliente_whatsapp, total_atacado, total_varejo, lucro, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    sql_itens = """
+        INSERT INTO pedido_items
+        (pedido_id, codigo, titulo, quantidade, preco_atacado, preco_varejo, subtotal_atacado, subtotal_varejo)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    for lote in _em_lotes(linhas_pedidos(), tamanho_lote):
+        # Pedidos e itens na mesma transação; os itens acumulados são do lote
+        conn.execute("BEGIN")
+        conn.executemany(sql_pedidos, lote)
+        conn.executemany(sql_itens, itens)
+        conn.execute("COMMIT")
+        total_itens += len(itens)
+        itens.clear()
+    return total, total_itens
+
+
+# ==================== CONVERSAS ====================
+
+def _mensagem(catalogo, aleatorio, modelos):
+    indice = aleatorio.randrange(len(catalogo)) if len(catalogo) else None
+    return aleatorio.choice(modelos).format(
+        tipo=(catalogo.tipos[indice] if indice is not None else 'anel').lower(),
+        motivo=aleatorio.choice(MOTIVOS).lower(),
+        codigo=catalogo.codigos[indice] if indice is not None else 'A1-1',
+        preco=f"{catalogo.precos_varejo[indice]:.2f}".replace('.', ',') if indice is not None else '0,00',
+    )
+
+
+def _conversas(total, dias, catalogo, aleatorio, gerar_chave):
+    """
+    (chave, início, fim, mensagens) de cada conversa, ordenadas pelo início;
+    o número de mensagens segue Zipf e elas ficam a 1-10 minutos uma da outra
+    """
+    mensagens = zipf(MAX_MENSAGENS, EXPOENTE_MENSAGENS, aleatorio)
+    agora = datetime.now()
+    inicios = sorted(agora - timedelta(seconds=aleatorio.random() * dias * 86400) for _ in range(total))
+    for inicio in inicios:
+        momento = inicio
+        lista = []
+        for _ in range(mensagens()):
+            lista.append((momento, _mensagem(catalogo, aleatorio, PERGUNTAS), _mensagem(catalogo, aleatorio, RESPOSTAS)))
+            momento += timedelta(seconds=aleatorio.randint(60, 600))
+        yield gerar_chave(), inicio, min(momento, agora), lista
+
+
+def _formatar(momento):
+    """Mesmo formato do CURRENT_TIMESTAMP do SQLite"""
+    return momento.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def gerar_chat(conn, catalogo, total, dias, aleatorio, tamanho_lote=LINHAS_POR_TRANSACAO):
+    """Sessões do chatbot do site; devolve (sessões, mensagens)"""
+    contagem = {'mensagens': 0}
+    sessoes = []
+
+    def linhas_conversas():
+        sequencia = iter(range(1, total + 1))
+        for sessao_id, inicio, fim, lista in _conversas(
+                total, dias, catalogo, aleatorio, lambda: f"sessao-{next(sequencia):08d}"):
+            identificada = aleatorio.random() < 0.3
+            sessoes.append((
+                sessao_id,
+                _nome(aleatorio) if identificada else None,
+                f"cliente{aleatorio.randrange(10**6)}@email.com" if identificada else None,
+                _formatar(inicio), _formatar(fim), len(lista)
+            ))
+            for momento, pergunta, resposta in lista:
+                contagem['mensagens'] += 1
+                produtos = [catalogo.codigos[aleatorio.randrange(len(catalogo))]
+                            for _ in range(aleatorio.randint(0, 3))] if len(catalogo) else []
+                yield (sessao_id, pergunta, resposta, _formatar(momento),
+                       json.dumps({'produtos_mostrados': produtos, 'timestamp': momento.isoformat()}))
+
+    for lote in _em_lotes(linhas_conversas(), tamanho_lote):
+        conn.execute("BEGIN")
+        conn.executemany("""
+            INSERT INTO conversas (sessao_id, mensagem_usuario, mensagem_bot, timestamp, metadata)
+            VALUES (?, ?, ?, ?, ?)
+        """, lote)
+        conn.executemany("""
+            INSERT INTO sessoes (sessao_id, nome, email, criado_em, ultima_atividade, total_mensagens)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, sessoes)
+        conn.execute("COMMIT")
+        sessoes.clear()
+    return total, contagem['mensagens']
+
+
+def gerar_whatsapp(conn, catalogo, total, dias, aleatorio, tamanho_lote=LINHAS_POR_TRANSACAO):
+    """Clientes do WhatsApp com suas conversas; devolve (clientes, mensagens)"""
+    contagem = {'mensagens': 0}
+    clientes = []
+    usados = set()
+
+    def telefone_unico():
+        while (telefone := _telefone(aleatorio)) in usados:
+            pass
+        usados.add(telefone)
+        return telefone
+
+    def linhas_conversas():
+        for numero, inicio, fim, lista in _conversas(total, dias, catalogo, aleatorio, telefone_unico):
+            clientes.append((
+                numero, _nome(aleatorio) if aleatorio.random() < 0.6 else None,
+                _formatar(inicio), _formatar(fim), len(lista),
+                'ativo' if aleatorio.random() < 0.9 else 'inativo'
+            ))
+            for momento, pergunta, resposta in lista:
+                contagem['mensagens'] += 1
+                intencao = aleatorio.choices(INTENCOES, PESOS_INTENCOES)[0]
+                yield (numero, pergunta, resposta, _formatar(momento),
+                       json.dumps({'intencao': intencao, 'timestamp': momento.isoformat()}))
+
+    for lote in _em_lotes(linhas_conversas(), tamanho_lote):
+        conn.execute("BEGIN")
+        conn.executemany("""
+            INSERT INTO conversas_whatsapp (numero_telefone, mensagem_cliente, mensagem_bot, timestamp, metadata)
+            VALUES (?, ?, ?, ?, ?)
+        """, lote)
+        conn.executemany("""
+            INSERT INTO clientes_whatsapp
+            (numero_telefone, nome, primeira_interacao, ultima_interacao, total_mensagens, status_cliente)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, clientes)
+        conn.execute("COMMIT")
+        clientes.clear()
+    return total, contagem['mensagens']
+
+
+# ==================== ORQUESTRAÇÃO ====================
+
+def gerar_dados(pasta, produtos, pedidos=None, sessoes=None, clientes_whatsapp=None, dias=365,
+                semente=42, tamanho_lote=LINHAS_POR_TRANSACAO, mostrar=print):
+    """
+    Cria os três bancos na pasta (que não pode tê-los ainda) e devolve as
+    contagens de linhas
+
+    Sem pedidos/sessões/clientes informados, usa proporções de uma loja
+    típica: 10 pedidos, 2 sessões de chat e 1 cliente de WhatsApp para
+    cada 10 produtos.
+    """
+    pasta = Path(pasta)
+    existentes = [nome for nome in BANCOS if (pasta / nome).exists()]
+    if existentes:
+        # Códigos, sessões e telefones gerados colidiriam com os já gravados
+        raise FileExistsError(f"Bancos já existem em {pasta}: {', '.join(existentes)}")
+    pasta.mkdir(parents=True, exist_ok=True)
+    pedidos = produtos if pedidos is None else pedidos
+    sessoes = max(1, produtos // 5) if sessoes is None else sessoes
+    clientes_whatsapp = max(1, produtos // 10) if clientes_whatsapp is None else clientes_whatsapp
+    aleatorio = random.Random(semente)
+    contagens = {}
+
+    def etapa(funcao, descrever):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        mostrar(f"   ✅ {descrever(resultado)} em {time.perf_counter() - inicio:.1f}s")
+        return resultado
+
+    conn = _abrir(pasta / 'pedidos.db', MIGRACOES_PEDIDOS)
+    try:
+        catalogo = etapa(lambda: gerar_catalogo(conn, produtos, aleatorio, tamanho_lote),
+                         lambda c: f"{len(c)} produtos")
+        contagens['produtos'] = len(catalogo)
+        contagens['pedidos'], contagens['pedido_items'] = etapa(
+            lambda: gerar_pedidos(conn, catalogo, pedidos, dias, aleatorio, tamanho_lote),
+            lambda r: f"{r[0]} pedidos com {r[1]} itens"
+        ) if len(catalogo) else (0, 0)
+        conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+
+    conn = _abrir(pasta / 'chatbot_conversas.db', MIGRACOES_CHATBOT)
+    try:
+        contagens['sessoes'], contagens['conversas'] = etapa(
+            lambda: gerar_chat(conn, catalogo, sessoes, dias, aleatorio, tamanho_lote),
+            lambda r: f"{r[0]} sessões de chat com {r[1]} mensagens"
+        )
+        conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+
+    conn = _abrir(pasta / 'whatsapp_conversas.db', MIGRACOES_WHATSAPP)
+    try:
+        contagens['clientes_whatsapp'], contagens['conversas_whatsapp'] = etapa(
+            lambda: gerar_whatsapp(conn, catalogo, clientes_whatsapp, dias, aleatorio, tamanho_lote),
+            lambda r: f"{r[0]} clientes de WhatsApp com {r[1]} mensagens"
+        )
+        conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+
+    return contagens
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Gera catálogo, pedidos e conversas realistas")
+    parser.add_argument('--produtos', type=int, default=10000)
+    parser.add_argument('--pedidos', type=int, help='padrão: igual ao número de produtos')
+    parser.add_argument('--sessoes', type=int, help='sessões do chatbot (padrão: produtos / 5)')
+    parser.add_argument('--clientes-whatsapp', type=int, help='padrão: produtos / 10')
+    parser.add_argument('--dias', type=int, default=365, help='período coberto pelos pedidos e conversas')
+    parser.add_argument('--pasta', type=Path, required=True, help='pasta nova para os três bancos')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--lote', type=int, default=LINHAS_POR_TRANSACAO, help='linhas por transação')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🏭 GERANDO DADOS REALISTAS")
+    print("=" * 60)
+    inicio = time.perf_counter()
+    contagens = gerar_dados(
+        args.pasta, args.produtos, args.pedidos, args.sessoes, args.clientes_whatsapp,
+        args.dias, args.semente, args.lote
+    )
+    print(f"\n📦 {sum(contagens.values())} linhas em {time.perf_counter() - inicio:.1f}s ({args.pasta.resolve()})")
+    print("=" * 60)
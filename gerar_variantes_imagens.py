@@ -0,0 +1,112 @@
+"""
+Backfill de Variantes Responsivas
+Gera as variantes (160/320/640/1280 em AVIF, WebP e JPEG) das imagens já
+existentes no armazém, em paralelo e sem tocar nas imagens originais
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+import sys
+
+# Nada de backend_api aqui: com spawn, cada processo filho reimporta este
+# módulo, e importar a API montaria o Flask e os pools em todos eles
+from banco import obter_pool
+from migracoes import aplicar_migracoes, MIGRACOES_PEDIDOS
+from imagens import ArmazemImagens, gerar_variantes, larguras_variantes
+
+DB_PATH = "pedidos.db"
+
+SQL_DIMENSOES = "UPDATE produtos SET imagem_largura = ?, imagem_altura = ? WHERE imagem_hash = ?"
+
+
+def _gerar(args):
+    """
+    Executado nos processos filhos: lê a original e gera as variantes
+    Retorna (hash, resultado, erro); uma imagem ilegível não interrompe as demais
+    """
+    hash_imagem, caminho = args
+    try:
+        with open(caminho, 'rb') as f:
+            return hash_imagem, gerar_variantes(f.read(), incluir_original=False), None
+    except Exception as e:
+        return hash_imagem, None, f"{type(e).__name__}: {e}"
+
+
+def produtos_sem_variantes(conn, armazem_imagens):
+    """Lista (codigo, hash) dos produtos cujas variantes ainda não existem"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT codigo, imagem_hash, imagem_largura FROM produtos
+        WHERE imagem_hash IS NOT NULL
+    """)
+
+    pendentes = []
+    for codigo, hash_imagem, largura in cursor.fetchall():
+        if not armazem_imagens.existe(hash_imagem):
+            print(f"⚠️  {codigo}: imagem original ausente ({hash_imagem[:12]}...)")
+            continue
+        # Sem dimensões conhecidas, ou sem a menor variante JPEG: falta o backfill
+        if not largura or not armazem_imagens.existe(hash_imagem, larguras_variantes(largura)[0], 'jpeg'):
+            pendentes.append((codigo, hash_imagem))
+    return pendentes
+
+
+def backfill(processos=None, db_path=DB_PATH):
+    """
+    Gera as variantes faltantes e atualiza as dimensões dos produtos
+    Retorna (geradas, falhas), com falhas = [(hash, erro)]
+    """
+    pool_db = obter_pool(db_path)
+    armazem_imagens = ArmazemImagens()
+
+    with pool_db.conexao() as conn:
+        aplicar_migracoes(conn, MIGRACOES_PEDIDOS)
+        pendentes = produtos_sem_variantes(conn, armazem_imagens)
+
+    # Imagens compartilhadas por vários produtos são processadas uma vez
+    hashes = sorted({h for _, h in pendentes})
+    print(f"\n📦 {len(pendentes)} produtos / {len(hashes)} imagens sem variantes")
+    if not hashes:
+        return 0, []
+
+    tarefas = [(h, armazem_imagens.caminho(h)) for h in hashes]
+    processos = processos or max(1, (os.cpu_count() or 2) - 1)
+    geradas = 0
+    falhas = []
+
+    with ProcessPoolExecutor(max_workers=processos,
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        for hash_imagem, resultado, erro in executor.map(_gerar, tarefas, chunksize=4):
+            if erro:
+                falhas.append((hash_imagem, erro))
+                print(f"❌ {hash_imagem[:12]}... → {erro}")
+                continue
+
+            armazem_imagens.salvar_variantes(hash_imagem, resultado['variantes'])
+
+            with pool_db.conexao() as conn:
+                conn.execute(SQL_DIMENSOES, (resultado['largura'], resultado['altura'], hash_imagem))
+                conn.commit()
+
+            geradas += 1
+            print(f"✅ {hash_imagem[:12]}... → {len(resultado['variantes'])} variantes")
+
+    return geradas, falhas
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("🖼️  GERANDO VARIANTES RESPONSIVAS")
+    print("=" * 60)
+
+    processos = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    geradas, falhas = backfill(processos)
+
+    print("\n" + "=" * 60)
+    print(f"✅ {geradas} imagens processadas!")
+    if falhas:
+        print(f"⚠️  {len(falhas)} imagens falharam (rode de novo após corrigi-las):")
+        for hash_imagem, erro in falhas:
+            print(f"   {hash_imagem}: {erro}")
+    print("=" * 60)
@@ -9,6 +9,8 @@ import os
 from typing import Dict, List, Optional, Any
 from dotenv import load_dotenv
 
+from metricas import medir_provedor
+
 # Carregar variáveis de ambiente
 load_dotenv()
 
@@ -63,12 +65,13 @@ class GrokClient:
         }
 
         try:
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=self.headers,
-                json=payload,
-                timeout=30
-            )
+            with medir_provedor('grok'):
+                response = requests.post(
+                    f"{self.base_url}/chat/completions",
+                    headers=self.headers,
+                    json=payload,
+                    timeout=30
+                )
 
             if response.status_code == 200:
                 data = response.json()
@@ -8,6 +8,8 @@ from huggingface_hub import InferenceClient
 from typing import Optional
 from dotenv import load_dotenv
 
+from metricas import medir_provedor
+
 load_dotenv()
 
 class HuggingFaceClient:
@@ -62,11 +64,12 @@ class HuggingFaceClient:
             messages.append({"role": "user", "content": mensagem})
             
             # Gerar resposta usando chat_completion sem modelo específico
-            response = self.client.chat_completion(
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=0.7
-            )
+            with medir_provedor('huggingface'):
+                response = self.client.chat_completion(
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=0.7
+                )
             
             return response.choices[0].message.content.strip()
             
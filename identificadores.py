@@ -0,0 +1,120 @@
+"""
+Identificadores Ordenados por Tempo
+IDs no formato ULID (26 caracteres Crockford base32: 48 bits de milissegundos
++ 80 bits aleatórios), que ordenam como texto na ordem de criação
+"""
+
+from datetime import datetime
+import hashlib
+import os
+import re
+import threading
+import time
+
+ALFABETO = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+TAMANHO_ID = 26
+BITS_ALEATORIOS = 80
+MAXIMO_ALEATORIO = (1 << BITS_ALEATORIOS) - 1
+
+_PADRAO_ID = re.compile(f'[0-7][{ALFABETO}]{{25}}')
+# IDs antigos: md5(data + cliente)[:8]
+_PADRAO_LEGADO = re.compile(r'[0-9a-f]{8}')
+
+
+def _codificar(numero):
+    caracteres = []
+    for _ in range(TAMANHO_ID):
+        numero, resto = divmod(numero, 32)
+        caracteres.append(ALFABETO[resto])
+    return ''.join(reversed(caracteres))
+
+
+def _decodificar(texto):
+    numero = 0
+    for caractere in texto:
+        numero = numero * 32 + ALFABETO.index(caractere)
+    return numero
+
+
+def _milissegundos(momento):
+    """datetime (sem fuso = horário local, como os campos 'data') em ms"""
+    return int(momento.timestamp() * 1000)
+
+
+def montar_id(milissegundos, aleatorio):
+    return _codificar((milissegundos << BITS_ALEATORIOS) | aleatorio)
+
+
+class GeradorIds:
+    """
+    Gera IDs crescentes mesmo dentro do mesmo milissegundo
+
+    No mesmo ms (ou se o relógio voltar), a parte aleatória do último ID é
+    incrementada. Entre processos a unicidade vem dos 80 bits aleatórios;
+    após um fork o estado é descartado para o filho não repetir a
+    sequência do pai.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ultimo_ms = -1
+        self._ultimo_aleatorio = 0
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reiniciar)
+
+    def _reiniciar(self):
+        self._lock = threading.Lock()
+        self._ultimo_ms = -1
+
+    def gerar(self):
+        with self._lock:
+            agora = time.time_ns() // 1_000_000
+            if agora > self._ultimo_ms:
+                self._ultimo_ms = agora
+                self._ultimo_aleatorio = int.from_bytes(os.urandom(10), 'big')
+            elif self._ultimo_aleatorio < MAXIMO_ALEATORIO:
+                self._ultimo_aleatorio += 1
+            else:
+                # 2^80 IDs no mesmo ms: avança o relógio lógico
+                self._ultimo_ms += 1
+                self._ultimo_aleatorio = int.from_bytes(os.urandom(10), 'big')
+            return montar_id(self._ultimo_ms, self._ultimo_aleatorio)
+
+
+_gerador = GeradorIds()
+
+
+def gerar_id():
+    """Novo ID ordenado por tempo (seguro entre threads e processos)"""
+    return _gerador.gerar()
+
+
+def eh_id(texto):
+    return bool(texto) and _PADRAO_ID.fullmatch(texto) is not None
+
+
+def eh_id_legado(texto):
+    return bool(texto) and _PADRAO_LEGADO.fullmatch(texto) is not None
+
+
+def momento_do_id(texto):
+    """Horário local de criação de um ID novo; None para IDs legados"""
+    if not eh_id(texto):
+        return None
+    return datetime.fromtimestamp((_decodificar(texto) >> BITS_ALEATORIOS) / 1000)
+
+
+def id_minimo(momento):
+    """Menor ID possível no instante dado (limite de consultas por intervalo)"""
+    return montar_id(_milissegundos(momento), 0)
+
+
+def id_de_legado(id_legado, data):
+    """
+    ID novo para um pedido antigo, no instante da sua 'data'
+
+    A parte aleatória vem do ID antigo, então a conversão é determinística e
+    dois pedidos no mesmo milissegundo continuam distintos.
+    """
+    aleatorio = int.from_bytes(hashlib.sha256(id_legado.encode()).digest()[:10], 'big')
+    return montar_id(_milissegundos(datetime.fromisoformat(data)), aleatorio)
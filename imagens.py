@@ -0,0 +1,225 @@
+"""
+Conversão e Armazenamento de Imagens
+Converte uploads para AVIF, gera variantes responsivas (AVIF, WebP e JPEG)
+e guarda os bytes em disco, endereçados pelo hash da imagem original
+"""
+
+from PIL import Image
+import pillow_avif  # Plugin para suporte AVIF
+from pathlib import Path
+import hashlib
+import base64
+import io
+import os
+import re
+
+DIR_IMAGENS = "imagens"
+
+# Maior lado da imagem original guardada
+TAMANHO_MAXIMO = 1920
+
+# Larguras das variantes (srcset) e formatos gerados para cada uma
+LARGURAS_VARIANTES = (160, 320, 640, 1280)
+FORMATOS = {
+    'avif': ('AVIF', {'quality': 70, 'speed': 6}, 'image/avif'),
+    'webp': ('WEBP', {'quality': 80, 'method': 4}, 'image/webp'),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}, 'image/jpeg'),
+}
+
+# Hash SHA-256 em hexadecimal (nome dos arquivos do armazém)
+RE_HASH = re.compile(r'^[0-9a-f]{64}$')
+RE_DATA_URI = re.compile(r'data:image/(\w+);base64,(.+)', re.DOTALL)
+
+
+def decodificar_data_uri(imagem_base64):
+    """Retorna (formato, bytes) de um data URI ou de base64 puro"""
+    match = RE_DATA_URI.match(imagem_base64)
+    if not match:
+        # Se não tiver prefixo, assume que é base64 puro
+        return None, base64.b64decode(imagem_base64)
+    return match.group(1).lower(), base64.b64decode(match.group(2))
+
+
+def _abrir_imagem(img_bytes):
+    """Decodifica a imagem uma única vez, em RGB e limitada ao tamanho máximo"""
+    img = Image.open(io.BytesIO(img_bytes))
+
+    # Converter para RGB se necessário (AVIF não suporta RGBA diretamente)
+    if img.mode in ('RGBA', 'LA', 'P'):
+        # Criar fundo branco
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    # Redimensionar se muito grande (otimização)
+    if max(img.size) > TAMANHO_MAXIMO:
+        img.thumbnail((TAMANHO_MAXIMO, TAMANHO_MAXIMO), Image.Resampling.LANCZOS)
+
+    return img
+
+
+def _codificar(img, formato):
+    """Codifica uma imagem Pillow no formato informado"""
+    nome_pillow, opcoes, _ = FORMATOS[formato]
+    output = io.BytesIO()
+    img.save(output, format=nome_pillow, **opcoes)
+    return output.getvalue()
+
+
+def larguras_variantes(largura_original):
+    """Larguras de variante disponíveis para uma imagem (inclui a original)"""
+    return [l for l in LARGURAS_VARIANTES if l < largura_original] + [largura_original]
+
+
+def converter_para_avif(imagem_base64):
+    """
+    Converte qualquer imagem para formato AVIF
+    Retorna (bytes_avif, largura, altura) ou None se não houver imagem
+    """
+    if not imagem_base64:
+        return None
+
+    formato_original, img_bytes = decodificar_data_uri(imagem_base64)
+
+    # Se já for AVIF, mantém os bytes originais
+    if formato_original == 'avif':
+        img = Image.open(io.BytesIO(img_bytes))
+        return img_bytes, img.width, img.height
+
+    img = _abrir_imagem(img_bytes)
+
+    # Salvar como AVIF
+    output = io.BytesIO()
+    img.save(output, format='AVIF', quality=85, speed=6)
+
+    return output.getvalue(), img.width, img.height
+
+
+def gerar_variantes(imagem, incluir_original=True):
+    """
+    Gera a imagem original em AVIF e todas as variantes responsivas
+
+    imagem pode ser um data URI/base64 ou os bytes já decodificados. A
+    imagem é decodificada uma vez e cada largura é reduzida a partir dela.
+
+    Retorna dict com 'original' (bytes AVIF ou None), 'largura', 'altura'
+    e 'variantes': lista de (largura, formato, bytes).
+    """
+    if isinstance(imagem, str):
+        formato_original, img_bytes = decodificar_data_uri(imagem)
+    else:
+        formato_original, img_bytes = None, imagem
+
+    img = _abrir_imagem(img_bytes)
+    largura, altura = img.size
+
+    original = None
+    if incluir_original:
+        if formato_original == 'avif' and max(largura, altura) < TAMANHO_MAXIMO:
+            original = img_bytes
+        else:
+            output = io.BytesIO()
+            img.save(output, format='AVIF', quality=85, speed=6)
+            original = output.getvalue()
+
+    variantes = []
+    for largura_variante in larguras_variantes(largura):
+        if largura_variante == largura:
+            reduzida = img
+        else:
+            altura_variante = max(1, round(altura * largura_variante / largura))
+            reduzida = img.resize((largura_variante, altura_variante), Image.Resampling.LANCZOS)
+
+        for formato in FORMATOS:
+            # Na largura cheia o AVIF é a própria imagem original
+            if formato == 'avif' and largura_variante == largura:
+                continue
+            variantes.append((largura_variante, formato, _codificar(reduzida, formato)))
+
+    return {'original': original, 'largura': largura, 'altura': altura, 'variantes': variantes}
+
+
+class ArmazemImagens:
+    """Armazém de imagens AVIF endereçadas pelo SHA-256 do conteúdo"""
+
+    def __init__(self, diretorio=DIR_IMAGENS):
+        self.diretorio = Path(diretorio).resolve()
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+
+    def caminho(self, hash_imagem, largura=None, formato='avif'):
+        """
+        Caminho do arquivo de uma imagem (sem verificar existência)
+        Variantes ficam ao lado da original: <hash>-<largura>.<formato>
+        """
+        if not RE_HASH.match(hash_imagem):
+            raise ValueError(f"Hash de imagem inválido: {hash_imagem}")
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de imagem inválido: {formato}")
+        if largura is None:
+            return self.diretorio / f"{hash_imagem}.avif"
+        return self.diretorio / f"{hash_imagem}-{int(largura)}.{formato}"
+
+    def existe(self, hash_imagem, largura=None, formato='avif'):
+        """Indica se a imagem (ou variante) está no armazém"""
+        try:
+            return self.caminho(hash_imagem, largura, formato).is_file()
+        except ValueError:
+            return False
+
+    def _gravar(self, destino, dados):
+        if not destino.exists():
+            # Escrita atômica: outro processo nunca lê um arquivo pela metade
+            temporario = destino.with_suffix(f".{os.getpid()}.tmp")
+            temporario.write_bytes(dados)
+            os.replace(temporario, destino)
+
+    def salvar(self, dados):
+        """Grava os bytes (se ainda não existirem) e retorna o hash"""
+        hash_imagem = hashlib.sha256(dados).hexdigest()
+        self._gravar(self.caminho(hash_imagem), dados)
+        return hash_imagem
+
+    def salvar_variantes(self, hash_imagem, variantes):
+        """Grava as variantes [(largura, formato, bytes)] de uma imagem"""
+        for largura, formato, dados in variantes:
+            self._gravar(self.caminho(hash_imagem, largura, formato), dados)
+
+
+def migrar_imagens_para_disco(conn, armazem):
+    """
+    Move as imagens base64 da coluna produtos.imagem para o armazém
+    Retorna (migradas, erros)
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT codigo FROM produtos WHERE imagem IS NOT NULL AND imagem != ''")
+    codigos = [row[0] for row in cursor.fetchall()]
+
+    migradas = 0
+    erros = 0
+
+    # Uma linha por vez para não carregar todos os blobs na memória
+    for codigo in codigos:
+        cursor.execute("SELECT imagem FROM produtos WHERE codigo = ?", (codigo,))
+        imagem = cursor.fetchone()[0]
+
+        try:
+            dados, largura, altura = converter_para_avif(imagem)
+        except Exception as e:
+            print(f"⚠️  {codigo}: imagem ignorada ({e})")
+            erros += 1
+            continue
+
+        hash_imagem = armazem.salvar(dados)
+        cursor.execute("""
+            UPDATE produtos
+            SET imagem_hash = ?, imagem_largura = ?, imagem_altura = ?, imagem = NULL
+            WHERE codigo = ?
+        """, (hash_imagem, largura, altura, codigo))
+        conn.commit()
+        migradas += 1
+
+    return migradas, erros
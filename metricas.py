@@ -0,0 +1,308 @@
+"""
+Métricas de Execução (formato Prometheus)
+Contadores e histogramas em memória, de custo baixo o bastante para ficarem
+sempre ligados, expostos em /metrics pelas três APIs Flask
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+import sqlite3
+import threading
+import time
+
+BUCKETS_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_SQL = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+BUCKETS_LENTOS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+TIPO_CONTEUDO = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _formatar_rotulos(nomes, valores, extra=''):
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    """Contador monotônico, com uma série por combinação de rótulos"""
+
+    tipo = 'counter'
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, *valores_rotulos, valor=1):
+        with self._lock:
+            self._valores[valores_rotulos] = self._valores.get(valores_rotulos, 0) + valor
+
+    def linhas(self):
+        with self._lock:
+            valores = list(self._valores.items())
+        for chave, valor in sorted(valores):
+            yield f'{self.nome}{_formatar_rotulos(self.rotulos, chave)} {_numero(valor)}'
+
+
+class Histograma:
+    """Histograma com buckets fixos (contagens cumulativas só na exportação)"""
+
+    tipo = 'histogram'
+
+    def __init__(self, nome, ajuda, rotulos=(), buckets=BUCKETS_HTTP):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # rótulos -> [contagem por bucket..., +Inf, soma]
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *valores_rotulos):
+        posicao = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores_rotulos)
+            if serie is None:
+                serie = self._series[valores_rotulos] = [0] * (len(self.buckets) + 2)
+            serie[posicao] += 1
+            serie[-1] += valor
+
+    @contextmanager
+    def medir(self, *valores_rotulos):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, *valores_rotulos)
+
+    def linhas(self):
+        with self._lock:
+            series = [(chave, list(serie)) for chave, serie in self._series.items()]
+        for chave, serie in sorted(series):
+            acumulado = 0
+            for limite, contagem in zip(self.buckets + (float('inf'),), serie):
+                acumulado += contagem
+                rotulos = _formatar_rotulos(self.rotulos, chave, f'le="{_numero(float(limite))}"')
+                yield f'{self.nome}_bucket{rotulos} {acumulado}'
+            rotulos = _formatar_rotulos(self.rotulos, chave)
+            yield f'{self.nome}_sum{rotulos} {_numero(serie[-1])}'
+            yield f'{self.nome}_count{rotulos} {acumulado}'
+
+
+class Coletado:
+    """Métrica lida na hora da exportação: funcao() -> {valores_rotulos: valor}"""
+
+    def __init__(self, nome, ajuda, tipo, rotulos, funcao):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.tipo = tipo
+        self.rotulos = tuple(rotulos)
+        self.funcao = funcao
+
+    def linhas(self):
+        for chave, valor in sorted(self.funcao().items()):
+            yield f'{self.nome}{_formatar_rotulos(self.rotulos, chave)} {_numero(valor)}'
+
+
+class Registro:
+    """Conjunto de métricas de um processo"""
+
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def _registrar(self, metrica):
+        with self._lock:
+            return self._metricas.setdefault(metrica.nome, metrica)
+
+    def contador(self, nome, ajuda, rotulos=()):
+        return self._registrar(Contador(nome, ajuda, rotulos))
+
+    def histograma(self, nome, ajuda, rotulos=(), buckets=BUCKETS_HTTP):
+        return self._registrar(Histograma(nome, ajuda, rotulos, buckets))
+
+    def coletado(self, nome, ajuda, tipo, rotulos, funcao):
+        """Substitui um coletado anterior de mesmo nome (ex.: app recriada)"""
+        with self._lock:
+            self._metricas[nome] = Coletado(nome, ajuda, tipo, rotulos, funcao)
+
+    def exportar(self):
+        """Texto no formato de exposição do Prometheus (0.0.4)"""
+        with self._lock:
+            metricas = list(self._metricas.values())
+        saida = []
+        for metrica in metricas:
+            linhas = list(metrica.linhas())
+            if not linhas:
+                continue
+            saida.append(f'# HELP {metrica.nome} {metrica.ajuda}')
+            saida.append(f'# TYPE {metrica.nome} {metrica.tipo}')
+            saida.extend(linhas)
+        return '\n'.join(saida) + '\n'
+
+
+registro = Registro()
+
+requisicoes = registro.contador(
+    'griffe_http_requisicoes_total', 'Requisições HTTP atendidas', ('rota', 'metodo', 'status'))
+duracao_requisicoes = registro.histograma(
+    'griffe_http_duracao_segundos', 'Tempo de resposta HTTP', ('rota', 'metodo', 'status'))
+duracao_sql = registro.histograma(
+    'griffe_sql_duracao_segundos', 'Tempo de execução de comandos SQL', ('banco', 'operacao'), BUCKETS_SQL)
+duracao_avif = registro.histograma(
+    'griffe_avif_conversao_segundos', 'Tempo de conversão AVIF + variantes (no processo conversor)',
+    ('resultado',), BUCKETS_LENTOS)
+duracao_provedor = registro.histograma(
+    'griffe_provedor_duracao_segundos', 'Latência das chamadas ao gerador de respostas (chatbot/LLM)',
+    ('provedor', 'resultado'), BUCKETS_LENTOS)
+
+
+@contextmanager
+def medir_provedor(provedor):
+    """Mede uma chamada a um provedor de respostas, separando sucesso e erro"""
+    inicio = time.perf_counter()
+    resultado = 'ok'
+    try:
+        yield
+    except Exception:
+        resultado = 'erro'
+        raise
+    finally:
+        duracao_provedor.observar(time.perf_counter() - inicio, provedor, resultado)
+
+
+_caches = {}
+
+
+def _coletar_caches(indice):
+    return {
+        (cache, tipo): valores[indice]
+        for cache, obter in list(_caches.items())
+        for tipo, valores in obter().items()
+    }
+
+
+registro.coletado('griffe_cache_hits_total', 'Acertos dos caches em memória', 'counter',
+                  ('cache', 'tipo'), lambda: _coletar_caches(0))
+registro.coletado('griffe_cache_misses_total', 'Faltas dos caches em memória', 'counter',
+                  ('cache', 'tipo'), lambda: _coletar_caches(1))
+
+
+def registrar_cache(nome, obter_hits_misses):
+    """
+    Exporta hits e misses de um cache em memória
+
+    obter_hits_misses() -> {tipo: (hits, misses)}; a taxa de acerto é
+    hits / (hits + misses), calculada no Prometheus.
+    """
+    _caches[nome] = obter_hits_misses
+
+
+# ==================== SQL ====================
+
+def _operacao(sql):
+    """Primeira palavra do comando (SELECT, INSERT, ...) como rótulo"""
+    partes = sql.lstrip().split(None, 1)
+    return partes[0].upper() if partes else ''
+
+
+class CursorMedido(sqlite3.Cursor):
+    def execute(self, sql, parametros=()):
+        inicio = time.perf_counter()
+        try:
+            return super().execute(sql, parametros)
+        finally:
+            duracao_sql.observar(time.perf_counter() - inicio, self.connection.nome_banco, _operacao(sql))
+
+    def executemany(self, sql, sequencia):
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(sql, sequencia)
+        finally:
+            duracao_sql.observar(time.perf_counter() - inicio, self.connection.nome_banco, _operacao(sql))
+
+
+class ConexaoMedida(sqlite3.Connection):
+    """
+    Conexão que mede execute/executemany (via conexão ou cursor)
+
+    Use como sqlite3.connect(..., factory=ConexaoMedida). O tempo medido
+    vai até a primeira linha; o fetch das demais fica de fora.
+    """
+
+    def __init__(self, database, *args, **kwargs):
+        super().__init__(database, *args, **kwargs)
+        self.nome_banco = Path(str(database)).name
+
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, sequencia):
+        return self.cursor().executemany(sql, sequencia)
+
+
+# ==================== FLASK ====================
+
+class _MedidorWSGI:
+    """
+    Mede a requisição inteira no nível WSGI, depois de todos os
+    after_request (inclusive a compressão); a rota vem do before_request
+    """
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        inicio = time.perf_counter()
+        estado = {}
+
+        def start_response_medido(status, headers, exc_info=None):
+            estado['status'] = status.split(' ', 1)[0]
+            return start_response(status, headers, exc_info)
+
+        try:
+            return self.wsgi_app(environ, start_response_medido)
+        finally:
+            rotulos = (
+                environ.get('metricas.rota', 'sem_rota'),
+                environ.get('REQUEST_METHOD', ''),
+                estado.get('status', '500'),
+            )
+            requisicoes.incrementar(*rotulos)
+            duracao_requisicoes.observar(time.perf_counter() - inicio, *rotulos)
+
+
+def instrumentar(app, rota_metricas='/metrics'):
+    """Conta e mede as requisições por rota e status e publica GET /metrics"""
+    from flask import request
+
+    @app.before_request
+    def _registrar_rota():
+        # O padrão da rota (não a URL) mantém poucas séries por métrica
+        if request.url_rule is not None:
+            request.environ['metricas.rota'] = request.url_rule.rule
+
+    def exportar_metricas():
+        return app.response_class(registro.exportar(), content_type=TIPO_CONTEUDO)
+
+    app.add_url_rule(rota_metricas, 'metricas', exportar_metricas, methods=['GET'])
+    app.wsgi_app = _MedidorWSGI(app.wsgi_app)
+    return registro
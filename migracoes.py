@@ -0,0 +1,330 @@
+"""
+Migrações de Schema SQLite
+Scripts versionados e ordenados para os bancos do backend, do chatbot e do
+WhatsApp; cada banco registra as versões aplicadas em schema_version
+"""
+
+from estatisticas_pedidos import sql_atualizar_stats, recalcular_estatisticas
+from busca_produtos import SQL_CRIAR_INDICE, SQL_TRIGGERS, configurar_ranking, reconstruir_indice_busca
+from identificadores import eh_id_legado, id_de_legado
+from resumo_catalogo import SQL_REGISTRO_ALTERACOES, SQL_TRIGGERS_ALTERACOES
+
+
+def adicionar_coluna(tabela, definicao):
+    """Passo de migração que adiciona a coluna apenas se ela ainda não existir"""
+    nome = definicao.split()[0]
+
+    def passo(conn):
+        colunas = {row[1] for row in conn.execute(f"PRAGMA table_info({tabela})")}
+        if nome not in colunas:
+            conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {definicao}")
+
+    return passo
+
+
+def converter_ids_legados(conn):
+    """
+    Troca os IDs md5 de 8 caracteres por IDs ordenados pela 'data' do pedido
+
+    O ID antigo fica em pedidos_ids_legados, e os endpoints continuam
+    aceitando-o. Um pedido com 'data' ilegível mantém o ID antigo (os
+    endpoints o aceitam diretamente) em vez de interromper a migração.
+    """
+    for (id_legado, data) in conn.execute("SELECT id, data FROM pedidos").fetchall():
+        if not eh_id_legado(id_legado):
+            continue
+        try:
+            novo_id = id_de_legado(id_legado, data)
+        except (TypeError, ValueError, OverflowError, OSError) as e:
+            print(f"⚠️ Pedido {id_legado} mantém o ID antigo: data inválida {data!r} ({e})")
+            continue
+        conn.execute(
+            "INSERT INTO pedidos_ids_legados (id_legado, id) VALUES (?, ?)", (id_legado, novo_id)
+        )
+        conn.execute("UPDATE pedidos SET id = ? WHERE id = ?", (novo_id, id_legado))
+        conn.execute("UPDATE pedido_items SET pedido_id = ? WHERE pedido_id = ?", (novo_id, id_legado))
+
+
+# ==================== pedidos.db (backend_api) ====================
+
+MIGRACOES_PEDIDOS = [
+    (1, "tabelas de pedidos, itens e produtos", [
+        """
+        CREATE TABLE IF NOT EXISTS pedidos (
+            id TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            cliente_nome TEXT NOT NULL,
+            cliente_whatsapp TEXT NOT NULL,
+            total_atacado REAL NOT NULL,
+            total_varejo REAL NOT NULL,
+            lucro REAL NOT NULL,
+            margem TEXT DEFAULT '250%',
+            status TEXT DEFAULT 'pendente',
+            enviado_fornecedor INTEGER DEFAULT 0,
+            data_envio TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS pedido_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pedido_id TEXT NOT NULL,
+            codigo TEXT NOT NULL,
+            titulo TEXT,
+            quantidade INTEGER NOT NULL,
+            preco_atacado REAL NOT NULL,
+            preco_varejo REAL NOT NULL,
+            subtotal_atacado REAL NOT NULL,
+            subtotal_varejo REAL NOT NULL,
+            FOREIGN KEY (pedido_id) REFERENCES pedidos (id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS produtos (
+            codigo TEXT PRIMARY KEY,
+            categoria TEXT DEFAULT 'OUTROS',
+            titulo TEXT,
+            preco_atacado REAL,
+            preco_varejo REAL,
+            peso TEXT,
+            lote TEXT,
+            descricao TEXT,
+            imagem_url TEXT,
+            imagem_local TEXT,
+            imagem TEXT,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    (2, "colunas categoria e imagem em bancos antigos", [
+        adicionar_coluna('produtos', "categoria TEXT DEFAULT 'OUTROS'"),
+        adicionar_coluna('produtos', "imagem TEXT"),
+    ]),
+    (3, "armazém de imagens (hash e dimensões)", [
+        adicionar_coluna('produtos', "imagem_hash TEXT"),
+        adicionar_coluna('produtos', "imagem_largura INTEGER"),
+        adicionar_coluna('produtos', "imagem_altura INTEGER"),
+    ]),
+    (4, "índices das consultas de pedidos e produtos", [
+        "CREATE INDEX IF NOT EXISTS idx_pedidos_data ON pedidos (data, id)",
+        "CREATE INDEX IF NOT EXISTS idx_pedidos_status_data ON pedidos (status, data, id)",
+        "CREATE INDEX IF NOT EXISTS idx_pedido_items_pedido ON pedido_items (pedido_id)",
+        "CREATE INDEX IF NOT EXISTS idx_produtos_categoria ON produtos (categoria, codigo)",
+        "CREATE INDEX IF NOT EXISTS idx_produtos_imagem_hash ON produtos (imagem_hash)",
+    ]),
+    (5, "estatísticas materializadas mantidas por triggers", [
+        """
+        CREATE TABLE IF NOT EXISTS pedidos_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total INTEGER NOT NULL DEFAULT 0,
+            pendentes INTEGER NOT NULL DEFAULT 0,
+            enviados INTEGER NOT NULL DEFAULT 0,
+            concluidos INTEGER NOT NULL DEFAULT 0,
+            total_lucro REAL NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS pedidos_stats_diarias (
+            dia TEXT PRIMARY KEY,
+            total INTEGER NOT NULL DEFAULT 0,
+            pendentes INTEGER NOT NULL DEFAULT 0,
+            enviados INTEGER NOT NULL DEFAULT 0,
+            concluidos INTEGER NOT NULL DEFAULT 0,
+            total_lucro REAL NOT NULL DEFAULT 0
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_pedidos_stats_insert AFTER INSERT ON pedidos
+        BEGIN {sql_atualizar_stats('NEW', '+')} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_pedidos_stats_delete AFTER DELETE ON pedidos
+        BEGIN {sql_atualizar_stats('OLD', '-')} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_pedidos_stats_update AFTER UPDATE OF status, lucro, data ON pedidos
+        BEGIN {sql_atualizar_stats('OLD', '-')} {sql_atualizar_stats('NEW', '+')} END
+        """,
+        recalcular_estatisticas,
+    ]),
+    (6, "busca de produtos FTS5 (sem acentos, BM25)", [
+        SQL_CRIAR_INDICE,
+        *SQL_TRIGGERS,
+        configurar_ranking,
+        reconstruir_indice_busca,
+    ]),
+    (7, "versão dos pedidos para ETags", [
+        """
+        CREATE TABLE IF NOT EXISTS versoes_tabelas (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL
+        )
+        """,
+        # Início aleatório: um banco recriado não repete ETags já emitidos
+        "INSERT OR IGNORE INTO versoes_tabelas (tabela, versao) VALUES ('pedidos', abs(random() % 1000000000))",
+        *[
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_pedidos_versao_{evento.lower()} AFTER {evento} ON pedidos
+            BEGIN UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'pedidos'; END
+            """
+            for evento in ('INSERT', 'UPDATE', 'DELETE')
+        ],
+    ]),
+    (8, "exportação incremental de produtos por updated_at", [
+        "UPDATE produtos SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL",
+        "CREATE INDEX IF NOT EXISTS idx_produtos_updated_at ON produtos (updated_at, codigo)",
+    ]),
+    (9, "carga incremental do catálogo do fornecedor", [
+        adicionar_coluna('produtos', "hash_fonte TEXT"),
+        """
+        CREATE TABLE IF NOT EXISTS fontes_catalogo (
+            caminho TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            tamanho INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            carregado_em TEXT
+        )
+        """,
+    ]),
+    (10, "IDs de pedido ordenados por tempo (listagem por id)", [
+        """
+        CREATE TABLE IF NOT EXISTS pedidos_ids_legados (
+            id_legado TEXT PRIMARY KEY,
+            id TEXT NOT NULL
+        ) WITHOUT ROWID
+        """,
+        converter_ids_legados,
+        "CREATE INDEX IF NOT EXISTS idx_pedidos_status_id ON pedidos (status, id)",
+        # A ordem do id substitui a da data nas listagens e na exportação
+        "DROP INDEX IF EXISTS idx_pedidos_status_data",
+        "DROP INDEX IF EXISTS idx_pedidos_data",
+    ]),
+    (11, "versão e registro de alterações do catálogo (resumo do chatbot)", [
+        # Início aleatório, como em 'pedidos': a versão também vira o ETag do catálogo
+        "INSERT OR IGNORE INTO versoes_tabelas (tabela, versao) VALUES ('produtos', abs(random() % 1000000000))",
+        *SQL_REGISTRO_ALTERACOES,
+    ]),
+    (12, "versão do catálogo: UPDATE de qualquer coluna, compatível com upsert", [
+        "DROP TRIGGER IF EXISTS trg_produtos_alteracao_insert",
+        "DROP TRIGGER IF EXISTS trg_produtos_alteracao_delete",
+        "DROP TRIGGER IF EXISTS trg_produtos_alteracao_update",
+        *SQL_TRIGGERS_ALTERACOES,
+    ]),
+]
+
+
+# ==================== chatbot_conversas.db (chatbot_api) ====================
+
+MIGRACOES_CHATBOT = [
+    (1, "tabelas de conversas e sessões", [
+        """
+        CREATE TABLE IF NOT EXISTS conversas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sessao_id TEXT NOT NULL,
+            mensagem_usuario TEXT NOT NULL,
+            mensagem_bot TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            metadata TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS sessoes (
+            sessao_id TEXT PRIMARY KEY,
+            email TEXT,
+            nome TEXT,
+            telefone TEXT,
+            criado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+            ultima_atividade DATETIME DEFAULT CURRENT_TIMESTAMP,
+            total_mensagens INTEGER DEFAULT 0
+        )
+        """,
+    ]),
+    (2, "índices de histórico e sessões do dia", [
+        "CREATE INDEX IF NOT EXISTS idx_conversas_sessao ON conversas (sessao_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_sessoes_criado_em ON sessoes (criado_em)",
+    ]),
+]
+
+
+# ==================== whatsapp_conversas.db (whatsapp_bot) ====================
+
+MIGRACOES_WHATSAPP = [
+    (1, "tabelas de conversas e clientes WhatsApp", [
+        """
+        CREATE TABLE IF NOT EXISTS conversas_whatsapp (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            numero_telefone TEXT NOT NULL,
+            mensagem_cliente TEXT NOT NULL,
+            mensagem_bot TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'enviada',
+            metadata TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS clientes_whatsapp (
+            numero_telefone TEXT PRIMARY KEY,
+            nome TEXT,
+            email TEXT,
+            primeira_interacao DATETIME DEFAULT CURRENT_TIMESTAMP,
+            ultima_interacao DATETIME DEFAULT CURRENT_TIMESTAMP,
+            total_mensagens INTEGER DEFAULT 0,
+            status_cliente TEXT DEFAULT 'ativo'
+        )
+        """,
+    ]),
+    (2, "índices de histórico e clientes recentes", [
+        "CREATE INDEX IF NOT EXISTS idx_conversas_whatsapp_numero ON conversas_whatsapp (numero_telefone, id)",
+        "CREATE INDEX IF NOT EXISTS idx_clientes_whatsapp_ultima ON clientes_whatsapp (ultima_interacao)",
+    ]),
+]
+
+
+def versao_atual(conn):
+    """Maior versão já aplicada no banco (0 se nenhuma)"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            versao INTEGER PRIMARY KEY,
+            descricao TEXT,
+            aplicada_em TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    return conn.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_version").fetchone()[0]
+
+
+def aplicar_migracoes(conn, migracoes):
+    """
+    Aplica, em ordem, as migrações ainda não registradas
+
+    Cada versão roda em sua própria transação (o DDL do SQLite é
+    transacional): se um passo falhar, a versão inteira é desfeita.
+    Retorna a lista de versões aplicadas.
+    """
+    atual = versao_atual(conn)
+    conn.commit()
+
+    aplicadas = []
+    for versao, descricao, passos in sorted(migracoes, key=lambda m: m[0]):
+        if versao <= atual:
+            continue
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for passo in passos:
+                if callable(passo):
+                    passo(conn)
+                else:
+                    conn.execute(passo)
+            conn.execute(
+                "INSERT INTO schema_version (versao, descricao) VALUES (?, ?)",
+                (versao, descricao)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        aplicadas.append(versao)
+        print(f"🔧 Migração {versao} aplicada: {descricao}")
+
+    return aplicadas
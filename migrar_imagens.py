@@ -0,0 +1,31 @@
+"""
+Migração Única: Imagens base64 do SQLite → Armazém em disco
+Move produtos.imagem para arquivos AVIF nomeados pelo hash do conteúdo
+"""
+
+from backend_api import pool_db, armazem_imagens, init_db
+from imagens import migrar_imagens_para_disco
+from busca_produtos import reconstruir_indice_busca
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("🖼️  MIGRANDO IMAGENS PARA O DISCO")
+    print("=" * 60)
+
+    init_db()
+
+    with pool_db.conexao() as conn:
+        migradas, erros = migrar_imagens_para_disco(conn, armazem_imagens)
+
+        # Devolve ao sistema de arquivos o espaço dos blobs removidos
+        if migradas:
+            conn.execute("VACUUM")
+            # O VACUUM pode renumerar os rowids indexados pela busca
+            reconstruir_indice_busca(conn)
+            conn.commit()
+
+    print(f"\n✅ {migradas} imagens migradas para {armazem_imagens.diretorio}/")
+    if erros:
+        print(f"⚠️  {erros} imagens não puderam ser convertidas")
+    print("=" * 60)
@@ -0,0 +1,140 @@
+"""
+Busca de Palavras-chave (Aho-Corasick)
+Encontra várias palavras-chave (e frases) em um texto numa única passada,
+só em palavras inteiras e sem diferenciar acentos e maiúsculas
+"""
+
+from collections import deque
+import re
+import unicodedata
+
+_MARCAS = re.compile('[\u0300-\u036f]')  # acentos separados pela forma NFD
+_PALAVRA = re.compile(r'\w+')
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos: 'Cordão Anéis' -> 'cordao aneis'"""
+    texto = texto.lower()
+    if texto.isascii():
+        return texto
+    return _MARCAS.sub('', unicodedata.normalize('NFD', texto))
+
+
+def tokenizar(texto):
+    return _PALAVRA.findall(normalizar(texto))
+
+
+def plural(palavra):
+    """Plural regular em português (anel -> aneis, colar -> colares, cordao -> cordoes)"""
+    if palavra.endswith('s'):
+        return palavra
+    if palavra.endswith('ao'):
+        return palavra[:-2] + 'oes'
+    if palavra.endswith('l'):
+        return palavra[:-1] + 'is'
+    if palavra.endswith(('r', 'z')):
+        return palavra + 'es'
+    if palavra.endswith('m'):
+        return palavra[:-1] + 'ns'
+    return palavra + 's'
+
+
+class BuscadorPalavras:
+    """
+    Autômato de Aho-Corasick sobre palavras
+
+    grupos é uma sequência de (valor, palavras-chave) em ordem de
+    prioridade; uma palavra-chave pode ser uma frase ('sao jorge'). O texto
+    vira uma lista de palavras normalizadas e o autômato anda uma transição
+    por palavra: o custo não depende do número de palavras-chave, e os
+    limites de palavra vêm de graça (um 'ear' nunca casa dentro de 'pearl').
+    Com plurais, palavras-chave simples também casam no plural.
+
+    Imutável depois de montado; pode ser compartilhado entre threads.
+    """
+
+    def __init__(self, grupos, plurais=False):
+        valores = []
+        prioridades = {}
+        for prioridade, (valor, palavras) in enumerate(grupos):
+            valores.append(valor)
+            for palavra in palavras:
+                termos = tuple(tokenizar(palavra))
+                variantes = [termos]
+                if plurais and len(termos) == 1:
+                    variantes.append((plural(termos[0]),))
+                for variante in variantes:
+                    # Repetida em dois grupos, vale o de maior prioridade
+                    prioridades.setdefault(variante, prioridade)
+
+        self.valores = tuple(valores)
+        self._sem_valor = len(valores)
+        self._transicoes, self._saidas = self._montar(prioridades)
+        self._menor = [saida[0] if saida else self._sem_valor for saida in self._saidas]
+        self._primeiras = frozenset(self._transicoes[0])
+
+    def _montar(self, prioridades):
+        # Trie das palavras-chave
+        filhos = [{}]
+        saidas = [set()]
+        for termos, prioridade in prioridades.items():
+            estado = 0
+            for termo in termos:
+                proximo = filhos[estado].get(termo)
+                if proximo is None:
+                    proximo = len(filhos)
+                    filhos[estado][termo] = proximo
+                    filhos.append({})
+                    saidas.append(set())
+                estado = proximo
+            saidas[estado].add(prioridade)
+
+        # Links de falha em largura; as transições ficam completas (um DFA),
+        # então a busca nunca volta pelos links
+        falha = [0] * len(filhos)
+        transicoes = [None] * len(filhos)
+        transicoes[0] = dict(filhos[0])
+        fila = deque(filhos[0].values())
+        while fila:
+            estado = fila.popleft()
+            saidas[estado] |= saidas[falha[estado]]
+            transicoes[estado] = {**transicoes[falha[estado]], **filhos[estado]}
+            for termo, filho in filhos[estado].items():
+                falha[filho] = transicoes[falha[estado]].get(termo, 0) if estado else 0
+                fila.append(filho)
+
+        return transicoes, [tuple(sorted(saida)) for saida in saidas]
+
+    def _prioridade(self, palavras):
+        if self._primeiras.isdisjoint(palavras):
+            return self._sem_valor
+        transicoes = self._transicoes
+        menor = self._menor
+        melhor = self._sem_valor
+        estado = 0
+        for palavra in palavras:
+            estado = transicoes[estado].get(palavra, 0)
+            if menor[estado] < melhor:
+                melhor = menor[estado]
+        return melhor
+
+    def primeiro(self, texto, padrao=None):
+        """Valor do grupo de maior prioridade presente no texto (ou padrao)"""
+        return self.primeiro_em(tokenizar(texto), padrao)
+
+    def primeiro_em(self, palavras, padrao=None):
+        """Como primeiro(), para um texto já passado por tokenizar()"""
+        prioridade = self._prioridade(palavras)
+        return padrao if prioridade == self._sem_valor else self.valores[prioridade]
+
+    def encontrados(self, texto):
+        """Valores de todos os grupos presentes, em ordem de prioridade"""
+        palavras = tokenizar(texto)
+        if self._primeiras.isdisjoint(palavras):
+            return []
+        achados = set()
+        estado = 0
+        for palavra in palavras:
+            estado = self._transicoes[estado].get(palavra, 0)
+            achados.update(self._saidas[estado])
+        return [self.valores[prioridade] for prioridade in sorted(achados)]
@@ -0,0 +1,273 @@
+"""
+Perfilador de Requisições por Amostragem
+Perfila uma fração das requisições (ou as que trazem o cabeçalho de admin)
+com cProfile e amostragem de pilhas, guardando as funções mais caras de cada
+rota em um buffer circular
+"""
+
+from collections import Counter, OrderedDict, deque
+from datetime import datetime
+from pathlib import Path
+import cProfile
+import hmac
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+
+FRACAO_PADRAO = float(os.getenv('PERFIL_FRACAO', '0') or 0)
+TOKEN_PADRAO = os.getenv('PERFIL_TOKEN', '')
+CABECALHO_TOKEN = 'X-Perfil-Token'
+
+TOP_FUNCOES = 25
+PERFIS_POR_ROTA = 20
+MAX_ROTAS = 200
+INTERVALO_AMOSTRAS = 0.002  # segundos entre amostras de pilha
+
+
+def _nome_funcao(arquivo, linha, funcao):
+    if arquivo == '~':
+        return funcao  # funções embutidas: '<built-in method ...>'
+    return f"{Path(arquivo).name}:{linha}({funcao})"
+
+
+def top_funcoes(perfil, n=TOP_FUNCOES):
+    """As n funções com maior tempo próprio de um cProfile.Profile"""
+    estatisticas = pstats.Stats(perfil).stats
+    ordenadas = sorted(estatisticas.items(), key=lambda item: item[1][2], reverse=True)[:n]
+    return [
+        {
+            'funcao': _nome_funcao(*chave),
+            'chamadas': nc,
+            'tempo_proprio_ms': round(tt * 1000, 3),
+            'tempo_total_ms': round(ct * 1000, 3),
+        }
+        for chave, (cc, nc, tt, ct, callers) in ordenadas
+    ]
+
+
+class AmostradorPilhas(threading.Thread):
+    """
+    Lê a pilha de uma thread em intervalos fixos (formato 'collapsed')
+
+    Cada amostra vira 'raiz;...;folha' e conta uma ocorrência; o resultado
+    alimenta diretamente flamegraph.pl ou speedscope.
+    """
+
+    def __init__(self, thread_id, intervalo=INTERVALO_AMOSTRAS):
+        super().__init__(name='amostrador-pilhas', daemon=True)
+        self.thread_id = thread_id
+        self.intervalo = intervalo
+        self.pilhas = Counter()
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            nomes = []
+            while frame is not None:
+                codigo = frame.f_code
+                nomes.append(f"{Path(codigo.co_filename).name}:{codigo.co_name}")
+                frame = frame.f_back
+            # Amostra lida durante parar() mostraria o próprio perfilador
+            if self._parar.is_set():
+                return
+            self.pilhas[';'.join(reversed(nomes))] += 1
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+        return self.pilhas
+
+
+def pilhas_collapsed(pilhas):
+    """Texto 'pilha contagem' por linha, da mais frequente para a menos"""
+    return ''.join(f"{pilha} {contagem}\n" for pilha, contagem in pilhas.most_common())
+
+
+class Perfilador:
+    """
+    Decide quais requisições perfilar e guarda os resultados por rota
+
+    Um único perfil por vez no processo (o cProfile do Python 3.12+ não
+    aceita dois ativos); requisições sorteadas enquanto outro está em
+    andamento seguem sem perfil. Assim o custo fica restrito à fração
+    amostrada.
+    """
+
+    def __init__(self, fracao=FRACAO_PADRAO, token=TOKEN_PADRAO, top=TOP_FUNCOES,
+                 por_rota=PERFIS_POR_ROTA, intervalo_amostras=INTERVALO_AMOSTRAS):
+        self.fracao = fracao
+        self.token = token
+        self.top = top
+        self.por_rota = por_rota
+        self.intervalo_amostras = intervalo_amostras
+        self._ativo = threading.Lock()
+        self._rotas = OrderedDict()  # rota -> deque de perfis
+        self._lock = threading.Lock()
+        self._proximo_id = 1
+
+    def token_valido(self, valor):
+        return bool(self.token) and bool(valor) and hmac.compare_digest(valor, self.token)
+
+    def motivo(self, cabecalho_token):
+        """'cabecalho', 'amostra' ou None (não perfilar)"""
+        if self.token_valido(cabecalho_token):
+            return 'cabecalho'
+        if self.fracao > 0 and random.random() < self.fracao:
+            return 'amostra'
+        return None
+
+    def iniciar(self):
+        """Começa a perfilar a thread atual; None se outro perfil está ativo"""
+        if not self._ativo.acquire(blocking=False):
+            return None
+        try:
+            perfil = cProfile.Profile()
+            perfil.enable()
+        except ValueError:
+            self._ativo.release()
+            return None
+        amostrador = AmostradorPilhas(threading.get_ident(), self.intervalo_amostras)
+        amostrador.start()
+        return perfil, amostrador, time.perf_counter()
+
+    def concluir(self, sessao, rota, metodo, caminho, status, motivo):
+        perfil, amostrador, inicio = sessao
+        perfil.disable()
+        duracao = time.perf_counter() - inicio
+        pilhas = amostrador.parar()
+        self._ativo.release()
+
+        registro = {
+            'rota': rota,
+            'metodo': metodo,
+            'caminho': caminho,
+            'status': status,
+            'motivo': motivo,
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'duracao_ms': round(duracao * 1000, 3),
+            'funcoes': top_funcoes(perfil, self.top),
+            'pilhas': pilhas,
+        }
+        with self._lock:
+            registro['id'] = self._proximo_id
+            self._proximo_id += 1
+            perfis = self._rotas.pop(rota, None) or deque(maxlen=self.por_rota)
+            perfis.append(registro)
+            self._rotas[rota] = perfis
+            while len(self._rotas) > MAX_ROTAS:
+                self._rotas.popitem(last=False)
+        return registro
+
+    # ---------- consulta ----------
+
+    def perfis(self, rota=None):
+        with self._lock:
+            if rota is not None:
+                return list(self._rotas.get(rota, ()))
+            return [registro for perfis in self._rotas.values() for registro in perfis]
+
+    def resumo(self):
+        """Por rota: quantidade, duração média e funções somadas entre os perfis"""
+        with self._lock:
+            rotas = {rota: list(perfis) for rota, perfis in self._rotas.items()}
+
+        resumo = {}
+        for rota, perfis in rotas.items():
+            funcoes = {}
+            for registro in perfis:
+                for funcao in registro['funcoes']:
+                    soma = funcoes.setdefault(funcao['funcao'], {'funcao': funcao['funcao'], 'chamadas': 0,
+                                                                 'tempo_proprio_ms': 0.0, 'tempo_total_ms': 0.0})
+                    for campo in ('chamadas', 'tempo_proprio_ms', 'tempo_total_ms'):
+                        soma[campo] += funcao[campo]
+            resumo[rota] = {
+                'perfis': len(perfis),
+                'duracao_media_ms': round(sum(r['duracao_ms'] for r in perfis) / len(perfis), 3),
+                'ids': [registro['id'] for registro in perfis],
+                'funcoes': sorted(funcoes.values(), key=lambda f: f['tempo_proprio_ms'], reverse=True)[:self.top],
+            }
+        return resumo
+
+    def pilhas(self, rota=None, perfil_id=None):
+        """Pilhas somadas de uma rota (ou de um perfil, ou de todos)"""
+        total = Counter()
+        for registro in self.perfis(rota):
+            if perfil_id is None or registro['id'] == perfil_id:
+                total.update(registro['pilhas'])
+        return total
+
+
+def registrar_perfilador(app, perfilador=None, prefixo='/admin/perfis'):
+    """
+    Liga o perfilador a uma app Flask
+
+    Perfila a fração configurada (PERFIL_FRACAO) e toda requisição com
+    X-Perfil-Token igual a PERFIL_TOKEN. GET {prefixo} traz o resumo por
+    rota (?rota= lista os perfis dela) e GET {prefixo}/pilhas as pilhas no
+    formato collapsed (?rota= e ?id= filtram). Os endpoints exigem o mesmo
+    token; sem token configurado, respondem 403.
+    """
+    from flask import g, jsonify, request
+
+    perfilador = perfilador or Perfilador()
+
+    @app.before_request
+    def _iniciar_perfil():
+        if request.path.startswith(prefixo):
+            return
+        motivo = perfilador.motivo(request.headers.get(CABECALHO_TOKEN))
+        if motivo:
+            sessao = perfilador.iniciar()
+            if sessao is not None:
+                g.perfil = (sessao, motivo)
+
+    @app.after_request
+    def _status_perfil(resposta):
+        if 'perfil' in g:
+            g.perfil_status = resposta.status_code
+        return resposta
+
+    @app.teardown_request
+    def _concluir_perfil(exc):
+        perfil = g.pop('perfil', None)
+        if perfil is None:
+            return
+        sessao, motivo = perfil
+        rota = request.url_rule.rule if request.url_rule is not None else 'sem_rota'
+        perfilador.concluir(
+            sessao, rota, request.method, request.path,
+            g.pop('perfil_status', 500), motivo
+        )
+
+    def _autorizado():
+        return perfilador.token_valido(request.headers.get(CABECALHO_TOKEN))
+
+    def listar_perfis():
+        if not _autorizado():
+            return jsonify({'error': f'{CABECALHO_TOKEN} ausente ou inválido'}), 403
+        rota = request.args.get('rota')
+        if rota is None:
+            return jsonify({'fracao': perfilador.fracao, 'rotas': perfilador.resumo()})
+        perfis = [
+            {campo: valor for campo, valor in registro.items() if campo != 'pilhas'}
+            for registro in perfilador.perfis(rota)
+        ]
+        return jsonify({'rota': rota, 'perfis': perfis})
+
+    def pilhas_perfis():
+        if not _autorizado():
+            return jsonify({'error': f'{CABECALHO_TOKEN} ausente ou inválido'}), 403
+        perfil_id = request.args.get('id', type=int)
+        texto = pilhas_collapsed(perfilador.pilhas(request.args.get('rota'), perfil_id))
+        return app.response_class(texto, mimetype='text/plain')
+
+    app.add_url_rule(prefixo, 'listar_perfis', listar_perfis, methods=['GET'])
+    app.add_url_rule(f'{prefixo}/pilhas', 'pilhas_perfis', pilhas_perfis, methods=['GET'])
+    app.extensions['perfilador'] = perfilador
+    return perfilador
@@ -0,0 +1,26 @@
+"""
+Reconstrução das Estatísticas de Pedidos
+Recalcula pedidos_stats e pedidos_stats_diarias do zero a partir da tabela
+pedidos (após importações diretas no banco ou para corrigir divergências)
+"""
+
+from backend_api import pool_db, init_db
+from estatisticas_pedidos import reconstruir_estatisticas, ler_estatisticas
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("📊 RECONSTRUINDO ESTATÍSTICAS DE PEDIDOS")
+    print("=" * 60)
+
+    init_db()
+
+    with pool_db.conexao() as conn:
+        reconstruir_estatisticas(conn)
+        dias = conn.execute("SELECT COUNT(*) FROM pedidos_stats_diarias").fetchone()[0]
+        stats = ler_estatisticas(conn)
+
+    print(f"\n✅ {stats['total']} pedidos em {dias} dias")
+    print(f"   Pendentes: {stats['pendentes']} | Enviados: {stats['enviados']} | Concluídos: {stats['concluidos']}")
+    print(f"   Lucro concluído: R$ {stats['total_lucro']:.2f}")
+    print("=" * 60)
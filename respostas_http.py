@@ -0,0 +1,186 @@
+"""
+Camada de Respostas HTTP
+Serialização JSON rápida (orjson quando instalado) e compressão gzip/brotli
+negociada pelo Accept-Encoding, compartilhadas pelas três APIs Flask
+"""
+
+from collections import OrderedDict
+import gzip
+import hashlib
+import threading
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+from metricas import registrar_cache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Respostas menores que isso não compensam o custo da compressão
+TAMANHO_MINIMO = 1024
+
+MIMETYPES_COMPRESSIVEIS = {
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'text/html', 'text/plain', 'text/csv', 'text/css',
+}
+
+# Nível por requisição x nível das respostas cacheáveis (comprimidas uma vez
+# por versão, podem usar o máximo)
+NIVEIS = {
+    'br': {'dinamico': 4, 'cacheavel': 11},
+    'gzip': {'dinamico': 5, 'cacheavel': 9},
+}
+
+
+# ==================== JSON ====================
+
+class JSONProviderRapido(DefaultJSONProvider):
+    """
+    Provider JSON do Flask que usa orjson quando disponível
+
+    Sem orjson, comporta-se exatamente como o provider padrão. Com orjson,
+    o JSON é o mesmo: chaves ordenadas conforme sort_keys do provider e
+    datas pelo default do Flask (formato HTTP, como http_date), em vez do
+    ISO 8601 nativo do orjson. Só a formatação muda: UTF-8 sem escapes
+    e sem espaços entre os itens.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        return self._dumps_orjson(obj, **kwargs).decode()
+
+    def dumps_bytes(self, obj, **kwargs):
+        """Como dumps, mas já em UTF-8 (evita decodificar e recodificar)"""
+        if orjson is None:
+            return super().dumps(obj, **kwargs).encode()
+        return self._dumps_orjson(obj, **kwargs)
+
+    def _dumps_orjson(self, obj, indent=None, sort_keys=None, **_):
+        # date/datetime vão para o default do Flask, como no provider padrão
+        opcoes = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            opcoes |= orjson.OPT_INDENT_2
+        if self.sort_keys if sort_keys is None else sort_keys:
+            opcoes |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=opcoes)
+
+    def loads(self, s, **kwargs):
+        if orjson is None:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self._dumps_orjson(obj, indent=indent) + b"\n", mimetype=self.mimetype
+        )
+
+
+# ==================== COMPRESSÃO ====================
+
+def comprimir(dados, codificacao, nivel):
+    """Comprime bytes com 'br' ou 'gzip'"""
+    if codificacao == 'br':
+        return brotli.compress(dados, quality=nivel)
+    return gzip.compress(dados, compresslevel=nivel, mtime=0)
+
+
+class CacheComprimidos:
+    """LRU de corpos já comprimidos, indexados por (hash do corpo, codificação)"""
+
+    def __init__(self, max_entradas=256):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def obter(self, chave, gerar):
+        with self._lock:
+            corpo = self._entradas.get(chave)
+            if corpo is not None:
+                self.hits += 1
+                self._entradas.move_to_end(chave)
+                return corpo
+            self.misses += 1
+
+        corpo = gerar()
+        with self._lock:
+            self._entradas[chave] = corpo
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+        return corpo
+
+
+def codificacoes_suportadas():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def registrar_compressao(app, tamanho_minimo=TAMANHO_MINIMO, cache=None):
+    """
+    Comprime as respostas de texto/JSON conforme o Accept-Encoding
+
+    Respostas com ETag (cacheáveis) são comprimidas uma única vez e
+    servidas do CacheComprimidos; o ETag passa a ser fraco, como faz o
+    nginx, pois os bytes dependem da codificação. A chave do cache é o
+    hash do corpo sem compressão, não o ETag: um ETag que não mudou junto
+    com os dados nunca serve um corpo antigo. Arquivos (send_file),
+    streams e respostas já codificadas passam sem alteração.
+    """
+    cache = cache if cache is not None else CacheComprimidos()
+    codificacoes = codificacoes_suportadas()
+
+    @app.after_request
+    def comprimir_resposta(resposta):
+        if (resposta.status_code != 200
+                or resposta.direct_passthrough
+                or resposta.is_streamed
+                or 'Content-Encoding' in resposta.headers
+                or resposta.mimetype not in MIMETYPES_COMPRESSIVEIS):
+            return resposta
+
+        resposta.vary.add('Accept-Encoding')
+        codificacao = request.accept_encodings.best_match(codificacoes)
+        if not codificacao:
+            return resposta
+
+        dados = resposta.get_data()
+        if len(dados) < tamanho_minimo:
+            return resposta
+
+        etag, _ = resposta.get_etag()
+        if etag:
+            nivel = NIVEIS[codificacao]['cacheavel']
+            corpo = cache.obter(
+                (hashlib.blake2b(dados, digest_size=16).digest(), codificacao),
+                lambda: comprimir(dados, codificacao, nivel)
+            )
+            resposta.set_etag(etag, weak=True)
+        else:
+            corpo = comprimir(dados, codificacao, NIVEIS[codificacao]['dinamico'])
+
+        resposta.set_data(corpo)
+        resposta.headers['Content-Encoding'] = codificacao
+        return resposta
+
+    app.extensions['cache_comprimidos'] = cache
+    registrar_cache('respostas_comprimidas', lambda: {'corpo': (cache.hits, cache.misses)})
+    return cache
+
+
+def otimizar_respostas(app, **kwargs):
+    """JSON rápido + compressão em uma aplicação Flask"""
+    app.json = JSONProviderRapido(app)
+    return registrar_compressao(app, **kwargs)
@@ -0,0 +1,277 @@
+"""
+Resumo do Catálogo por Categoria
+Quantidade, preços mínimo/máximo/mediano e as peças mais baratas e mais
+caras de cada categoria, mantidos em memória e atualizados só com os
+produtos alterados desde a última leitura
+"""
+
+from bisect import bisect_left, insort
+from collections import Counter
+import sqlite3
+import threading
+import time
+
+from categorizar_produtos import detectar_categoria
+
+# Intervalo mínimo entre duas consultas de versão ao banco (segundos)
+INTERVALO_VERIFICACAO = 1.0
+# Peças em mais_baratos e mais_caros
+TOP_ITENS = 5
+# Acima disso é mais barato reler o catálogo inteiro que código por código
+LIMITE_INCREMENTAL = 5000
+# Códigos por consulta IN (...) na releitura incremental
+CODIGOS_POR_CONSULTA = 500
+
+# UPSERT e não INSERT OR REPLACE: dentro de um trigger, o OR REPLACE é
+# trocado pelo tratamento de conflito da instrução de fora, e o
+# INSERT ... ON CONFLICT DO UPDATE do bulk falharia com UNIQUE constraint
+_REGISTRAR = (
+    "INSERT INTO produtos_alteracoes (codigo, versao) "
+    "SELECT {linha}.codigo, versao FROM versoes_tabelas WHERE tabela = 'produtos' "
+    "ON CONFLICT (codigo) DO UPDATE SET versao = excluded.versao;"
+)
+_INCREMENTAR = "UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'produtos';"
+
+# INSERT, DELETE e UPDATE de qualquer coluna: a versão também é o ETag
+# do catálogo e invalida o cache da API em todos os processos, que servem
+# preços de atacado, descrições e imagens, não só as colunas do resumo
+SQL_TRIGGERS_ALTERACOES = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_produtos_alteracao_insert AFTER INSERT ON produtos
+    BEGIN {_INCREMENTAR} {_REGISTRAR.format(linha='NEW')} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_produtos_alteracao_delete AFTER DELETE ON produtos
+    BEGIN {_INCREMENTAR} {_REGISTRAR.format(linha='OLD')} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_produtos_alteracao_update AFTER UPDATE ON produtos
+    BEGIN {_INCREMENTAR} {_REGISTRAR.format(linha='OLD')} {_REGISTRAR.format(linha='NEW')} END
+    """,
+]
+
+# Toda escrita em produtos incrementa a versão 'produtos' de versoes_tabelas
+# e grava em produtos_alteracoes a versão em que cada código mudou. Vale
+# para qualquer processo que escreva no banco (API, cargas, scripts).
+SQL_REGISTRO_ALTERACOES = [
+    """
+    CREATE TABLE IF NOT EXISTS produtos_alteracoes (
+        codigo TEXT PRIMARY KEY,
+        versao INTEGER NOT NULL
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_produtos_alteracoes_versao ON produtos_alteracoes (versao)",
+    *SQL_TRIGGERS_ALTERACOES,
+]
+
+_COLUNAS = "codigo, categoria, titulo, preco_varejo"
+
+
+def ler_alteracoes(conn, desde, limite=LIMITE_INCREMENTAL):
+    """
+    (versão atual do catálogo, códigos alterados depois da versão desde)
+
+    Os códigos vêm como None quando é preciso descartar tudo: primeira
+    leitura (desde None), banco recriado (versão menor) ou mais de limite
+    códigos alterados. A versão é lida antes dos códigos: uma escrita no
+    meio só faz o mesmo código aparecer de novo na próxima leitura.
+    """
+    row = conn.execute("SELECT versao FROM versoes_tabelas WHERE tabela = 'produtos'").fetchone()
+    versao = row[0] if row else None
+    if desde is None or versao is None or versao < desde:
+        return versao, None
+    if versao == desde:
+        return versao, []
+    codigos = [r[0] for r in conn.execute(
+        "SELECT codigo FROM produtos_alteracoes WHERE versao > ? LIMIT ?", (desde, limite + 1)
+    )]
+    return versao, codigos if len(codigos) <= limite else None
+
+
+def categoria_efetiva(categoria, titulo):
+    """
+    Categoria gravada ou, para produtos ainda não categorizados (NULL ou
+    'OUTROS', como os da carga do fornecedor), a detectada pelo título
+    """
+    if categoria and categoria != 'OUTROS':
+        return categoria
+    return detectar_categoria(titulo or '')
+
+
+class ResumoCatalogo:
+    """
+    Resumo por categoria do catálogo de pedidos.db, servido da memória
+
+    Cada categoria guarda a lista de (preço, código) ordenada; o resumo de
+    uma categoria é montado na primeira consulta e reaproveitado até um
+    produto dela mudar. No máximo a cada `intervalo` segundos uma consulta
+    lê a versão do catálogo; se mudou, relê só os códigos de
+    produtos_alteracoes posteriores à versão já carregada.
+
+    A releitura do banco roda fora do lock dos dados e só uma thread por
+    vez a faz: as outras continuam respondendo com o resumo anterior.
+
+    Produtos sem categoria entram pela detectada no título
+    (categoria_efetiva): o resumo não depende de categorizar_produtos já
+    ter rodado.
+    """
+
+    def __init__(self, pool, intervalo=INTERVALO_VERIFICACAO, top=TOP_ITENS):
+        self.pool = pool
+        self.intervalo = intervalo
+        self.top = top
+        self.versao = None
+        self.carregado = False
+        self._proxima_verificacao = 0.0
+        self._produtos = {}           # codigo -> (categoria, preco, titulo)
+        self._precos = {}             # categoria -> [(preco, codigo), ...] ordenada
+        self._quantidades = Counter()  # categoria -> produtos, com ou sem preço
+        self._resumos = {}            # categoria -> resumo pronto
+        self._contadores = {'hits': 0, 'misses': 0}
+        self._recargas = {'completas': 0, 'incrementais': 0, 'produtos': 0}
+        self._lock = threading.Lock()
+        self._lock_leitura = threading.Lock()
+
+    # ---------- consulta ----------
+
+    def categoria(self, nome):
+        """Resumo de uma categoria (None se ela não tiver produtos)"""
+        self.atualizar()
+        with self._lock:
+            resumo = self._resumos.get(nome)
+            if resumo is not None:
+                self._contadores['hits'] += 1
+                return resumo
+            self._contadores['misses'] += 1
+            if not self._quantidades.get(nome):
+                return None
+            resumo = self._resumos[nome] = self._montar(nome)
+            return resumo
+
+    def categorias(self):
+        """{categoria: resumo} de todas as categorias com produtos"""
+        self.atualizar()
+        return {nome: self.categoria(nome) for nome in sorted(self._quantidades, key=str) if self._quantidades[nome]}
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                **self._contadores, **self._recargas,
+                'versao': self.versao, 'produtos_em_memoria': len(self._produtos),
+            }
+
+    def _montar(self, nome):
+        precos = self._precos.get(nome, [])
+        total = len(precos)
+        meio = total // 2
+        if not total:
+            mediano = None
+        elif total % 2:
+            mediano = precos[meio][0]
+        else:
+            mediano = round((precos[meio - 1][0] + precos[meio][0]) / 2, 2)
+        return {
+            'categoria': nome,
+            'quantidade': self._quantidades[nome],
+            'com_preco': total,
+            'preco_min': precos[0][0] if precos else None,
+            'preco_max': precos[-1][0] if precos else None,
+            'preco_mediano': mediano,
+            'mais_baratos': tuple(self._item(codigo) for _, codigo in precos[:self.top]),
+            'mais_caros': tuple(self._item(codigo) for _, codigo in reversed(precos[-self.top:])),
+        }
+
+    def _item(self, codigo):
+        _, preco, titulo = self._produtos[codigo]
+        return {'codigo': codigo, 'titulo': titulo, 'preco': preco}
+
+    # ---------- atualização ----------
+
+    def atualizar(self, forcar=False):
+        """
+        Confere a versão do catálogo e aplica as alterações
+
+        Sem forcar, consulta o banco no máximo uma vez por intervalo; a
+        primeira carga espera, as seguintes são puladas se outra thread já
+        estiver relendo. Retorna True se o resumo mudou.
+        """
+        agora = time.monotonic()
+        if not forcar and agora < self._proxima_verificacao:
+            return False
+        if not self._lock_leitura.acquire(blocking=forcar or not self.carregado):
+            return False
+        try:
+            if not forcar and agora < self._proxima_verificacao:
+                return False  # outra thread acabou de verificar
+            self._proxima_verificacao = agora + self.intervalo
+            with self.pool.conexao() as conn:
+                return self._sincronizar(conn)
+        except sqlite3.Error as e:
+            # Banco sem as migrações ou indisponível: segue com o último resumo
+            print(f"⚠️ Resumo do catálogo não atualizado: {e}")
+            return False
+        finally:
+            self._lock_leitura.release()
+
+    def _sincronizar(self, conn):
+        versao, codigos = ler_alteracoes(conn, self.versao if self.carregado else None)
+        if self.carregado and versao == self.versao:
+            return False
+
+        if codigos is None:
+            # Primeira carga, banco recriado (versão menor) ou alteração em massa
+            linhas = conn.execute(f"SELECT {_COLUNAS} FROM produtos").fetchall()
+            self._substituir(linhas)
+            self._recargas['completas'] += 1
+        else:
+            linhas = []
+            for inicio in range(0, len(codigos), CODIGOS_POR_CONSULTA):
+                lote = codigos[inicio:inicio + CODIGOS_POR_CONSULTA]
+                linhas += conn.execute(
+                    f"SELECT {_COLUNAS} FROM produtos WHERE codigo IN ({', '.join('?' * len(lote))})", lote
+                ).fetchall()
+            self._aplicar(codigos, linhas)
+            self._recargas['incrementais'] += 1
+            self._recargas['produtos'] += len(codigos)
+        self.versao = versao
+        self.carregado = True
+        return True
+
+    def _substituir(self, linhas):
+        produtos = {}
+        precos = {}
+        quantidades = Counter()
+        for codigo, categoria, titulo, preco in linhas:
+            categoria = categoria_efetiva(categoria, titulo)
+            produtos[codigo] = (categoria, preco, titulo)
+            quantidades[categoria] += 1
+            if preco is not None:
+                precos.setdefault(categoria, []).append((preco, codigo))
+        for lista in precos.values():
+            lista.sort()
+        with self._lock:
+            self._produtos, self._precos, self._quantidades = produtos, precos, quantidades
+            self._resumos = {}
+
+    def _aplicar(self, codigos, linhas):
+        atuais = {linha[0]: linha for linha in linhas}
+        with self._lock:
+            for codigo in codigos:
+                anterior = self._produtos.pop(codigo, None)
+                if anterior is not None:
+                    categoria, preco, _ = anterior
+                    self._quantidades[categoria] -= 1
+                    self._resumos.pop(categoria, None)
+                    if preco is not None:
+                        lista = self._precos[categoria]
+                        del lista[bisect_left(lista, (preco, codigo))]
+                linha = atuais.get(codigo)
+                if linha is None:
+                    continue  # removido
+                _, categoria, titulo, preco = linha
+                categoria = categoria_efetiva(categoria, titulo)
+                self._produtos[codigo] = (categoria, preco, titulo)
+                self._quantidades[categoria] += 1
+                self._resumos.pop(categoria, None)
+                if preco is not None:
+                    insort(self._precos.setdefault(categoria, []), (preco, codigo))
@@ -6,7 +6,8 @@ Gerencia pedidos da Griffe da Prata e integração com Atacado de Prata
 import json
 from datetime import datetime
 from pathlib import Path
-import hashlib
+
+from identificadores import gerar_id
 
 
 class SistemaPedidos:
@@ -50,7 +51,8 @@ class SistemaPedidos:
             {'codigo': 'P3-10', 'quantidade': 1}
         ]
         """
-        pedido_id = hashlib.md5(f"{datetime.now().isoformat()}{cliente_nome}".encode()).hexdigest()[:8]
+        # Ordenado por tempo e sem colisão entre processos (pedidos antigos mantêm o ID de 8 caracteres)
+        pedido_id = gerar_id()
         
         # Calcular valores
         total_atacado = 0
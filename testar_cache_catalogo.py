@@ -0,0 +1,98 @@
+"""
+Teste da invalidação do cache do catálogo entre processos
+Uma segunda conexão (outro worker, carga ou script) altera produtos no
+banco; sincronizar() deve descartar do cache os produtos alterados e
+mudar a versão usada no ETag, qualquer que seja a coluna alterada
+"""
+from pathlib import Path
+import sqlite3
+import sys
+import tempfile
+
+from migracoes import aplicar_migracoes, MIGRACOES_PEDIDOS
+from cache_catalogo import CacheCatalogo
+from resumo_catalogo import ler_alteracoes
+
+falhas = 0
+
+
+def verificar(descricao, condicao):
+    global falhas
+    if condicao:
+        print(f"✅ {descricao}")
+    else:
+        falhas += 1
+        print(f"❌ {descricao}")
+
+
+def em_cache(cache, codigo):
+    return ('produto', codigo) in cache._entradas
+
+
+print("=" * 60)
+print("🧪 TESTE DO CACHE DO CATÁLOGO (ESCRITAS DE OUTRO PROCESSO)")
+print("=" * 60)
+
+with tempfile.TemporaryDirectory() as pasta:
+    caminho = str(Path(pasta) / "pedidos.db")
+    conn = sqlite3.connect(caminho, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    aplicar_migracoes(conn, MIGRACOES_PEDIDOS)
+    conn.executemany(
+        "INSERT INTO produtos (codigo, titulo, categoria, preco_atacado, preco_varejo) VALUES (?, ?, 'ANÉIS', ?, ?)",
+        [('A1', 'Anel 1', 4.0, 20.0), ('A2', 'Anel 2', 5.0, 25.0)]
+    )
+
+    # Outro processo: conexão própria, sem acesso ao cache
+    outra = sqlite3.connect(caminho, isolation_level=None)
+
+    cache = CacheCatalogo(ler_alteracoes=ler_alteracoes, intervalo=0)
+
+    def carregar(faltando):
+        marcadores = ', '.join('?' * len(faltando))
+        rows = conn.execute(f"SELECT * FROM produtos WHERE codigo IN ({marcadores})", faltando)
+        return {row['codigo']: dict(row) for row in rows}
+
+    def preco_atacado(codigo):
+        cache.sincronizar(conn)
+        return cache.obter_produtos([codigo], carregar)[codigo]['preco_atacado']
+
+    print("\n📂 preço de atacado")
+    preco_atacado('A1')
+    preco_atacado('A2')
+    versao = cache.versao_banco
+    verificar("produtos carregados no cache", em_cache(cache, 'A1') and em_cache(cache, 'A2'))
+
+    outra.execute("UPDATE produtos SET preco_atacado = 7.0 WHERE codigo = 'A1'")
+    cache.sincronizar(conn)
+    verificar("A1 descartado após UPDATE de preco_atacado em outra conexão", not em_cache(cache, 'A1'))
+    verificar("A2 (não alterado) continua no cache", em_cache(cache, 'A2'))
+    verificar("versão do banco (ETag) mudou", cache.versao_banco != versao)
+    verificar("pedido usa o preço novo (7.0)", preco_atacado('A1') == 7.0)
+
+    print("\n📂 demais colunas")
+    for coluna, valor in [('descricao', 'nova'), ('peso', '2g'), ('lote', 'L2'),
+                          ('imagem_url', 'http://x/a.jpg'), ('imagem_hash', 'abc'),
+                          ('imagem_largura', 640)]:
+        preco_atacado('A1')
+        versao = cache.versao_banco
+        outra.execute(f"UPDATE produtos SET {coluna} = ? WHERE codigo = 'A1'", (valor,))
+        cache.sincronizar(conn)
+        verificar(f"UPDATE de {coluna} descarta A1 e muda a versão",
+                  not em_cache(cache, 'A1') and cache.versao_banco != versao)
+
+    print("\n📂 exclusão")
+    preco_atacado('A2')
+    outra.execute("DELETE FROM produtos WHERE codigo = 'A2'")
+    cache.sincronizar(conn)
+    verificar("DELETE em outra conexão descarta A2", not em_cache(cache, 'A2'))
+
+    outra.close()
+    conn.close()
+
+print("\n" + "=" * 60)
+if falhas:
+    print(f"❌ {falhas} verificações falharam")
+    sys.exit(1)
+print("✅ SUCESSO! O cache acompanha as escritas de outros processos")
+print("=" * 60)
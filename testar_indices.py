@@ -0,0 +1,138 @@
+"""
+Teste dos índices das consultas dos endpoints
+Aplica as migrações em bancos temporários e verifica, via EXPLAIN QUERY PLAN,
+que nenhuma consulta faz varredura completa de tabela e que as filtradas ou
+paginadas por cursor buscam no índice (SEARCH) em vez de percorrê-lo (SCAN)
+"""
+from pathlib import Path
+import sqlite3
+import sys
+import tempfile
+
+from migracoes import aplicar_migracoes, MIGRACOES_PEDIDOS, MIGRACOES_CHATBOT, MIGRACOES_WHATSAPP
+
+# As consultas vêm dos próprios módulos: uma mudança no SQL de um endpoint
+# é testada aqui sem precisar copiá-la
+import backend_api as api
+import chatbot_api
+import whatsapp_bot
+import exportacao
+from estatisticas_pedidos import SQL_ESTATISTICAS, SQL_ESTATISTICAS_POR_DIA
+from busca_produtos import sql_busca
+from gerar_variantes_imagens import SQL_DIMENSOES
+
+# Leitura de um índice inteiro na ordem do ORDER BY, interrompida pelo LIMIT:
+# aceita só nas listagens sem filtro de índice (primeira página)
+VARREDURA = 'varredura'
+BUSCA = 'busca'
+
+COLUNAS = api._colunas_produto()
+
+# (endpoint, consulta, parâmetros, acesso esperado)
+CONSULTAS = {
+    'pedidos': (MIGRACOES_PEDIDOS, [
+        ("GET /api/produtos", api.sql_listar_produtos(COLUNAS, []), (10,), VARREDURA),
+        ("GET /api/produtos?after", api.sql_listar_produtos(COLUNAS, ['after']), ('A', 10), BUSCA),
+        ("GET /api/produtos?categoria", api.sql_listar_produtos(COLUNAS, ['categoria']), ('ANÉIS', 10), BUSCA),
+        ("GET /api/produtos?after&categoria", api.sql_listar_produtos(COLUNAS, ['after', 'categoria']), ('A', 'ANÉIS', 10), BUSCA),
+        # Nenhum índice entrega uma faixa de preço em ordem de código: a
+        # primeira página percorre a chave e filtra o preço até o LIMIT
+        ("GET /api/produtos?preco_min", api.sql_listar_produtos(COLUNAS, ['preco_min']), (50, 10), VARREDURA),
+        ("GET /api/produtos?preco_min&preco_max", api.sql_listar_produtos(COLUNAS, ['preco_min', 'preco_max']), (50, 100, 10), VARREDURA),
+        ("GET /api/produtos?after&preco_min", api.sql_listar_produtos(COLUNAS, ['after', 'preco_min']), ('A', 50, 10), BUSCA),
+        ("GET /api/produtos?categoria&preco_max", api.sql_listar_produtos(COLUNAS, ['categoria', 'preco_max']), ('ANÉIS', 100, 10), BUSCA),
+        ("GET /api/produtos/busca", sql_busca(COLUNAS), ('"anel"*', 20), BUSCA),
+        ("GET /api/produtos/<codigo>", api.sql_produtos_por_codigo(COLUNAS, 1), ('A1',), BUSCA),
+        ("GET /api/produtos/<codigo>/imagem", api.SQL_IMAGEM_PRODUTO, ('A1',), BUSCA),
+        ("POST /api/pedidos (preços)", api.sql_produtos_por_codigo(COLUNAS, 2), ('A1', 'A2'), BUSCA),
+        ("GET /api/pedidos", api.sql_listar_pedidos([]), (10,), VARREDURA),
+        ("GET /api/pedidos?after", api.sql_listar_pedidos(['after']), ('z', 10), BUSCA),
+        ("GET /api/pedidos?status", api.sql_listar_pedidos(['status']), ('pendente', 10), BUSCA),
+        ("GET /api/pedidos?status&after&desde", api.sql_listar_pedidos(['status', 'after', 'desde']), ('pendente', 'z', '0', 10), BUSCA),
+        ("GET /api/pedidos?desde&ate", api.sql_listar_pedidos(['desde', 'ate']), ('0', 'z', 10), BUSCA),
+        ("GET /api/pedidos (itens)", api.sql_items_por_pedidos(2), ('a', 'b'), BUSCA),
+        ("GET /api/pedidos/<id> (id antigo)", api.SQL_ID_LEGADO, ('abcdef01',), BUSCA),
+        ("GET /api/pedidos/<id>", api.SQL_PEDIDO, ('a',), BUSCA),
+        ("GET /api/pedidos/<id> (itens)", api.SQL_ITEMS_PEDIDO, ('a',), BUSCA),
+        ("PUT /api/pedidos/<id>/status", api.SQL_STATUS_PEDIDO, ('concluido', 'a'), BUSCA),
+        ("PUT /api/pedidos/<id>/status (enviado)", api.SQL_ENVIO_PEDIDO, ('enviado', '2026-01-01', 'a'), BUSCA),
+        ("GET /api/export/pedidos", exportacao.sql_lotes_pedidos(False)[0], (1000,), VARREDURA),
+        ("GET /api/export/pedidos (lotes seguintes)", exportacao.sql_lotes_pedidos(False)[1], ('a', 1000), BUSCA),
+        ("GET /api/export/pedidos?desde", exportacao.sql_lotes_pedidos(True)[0], ('a', 1000), BUSCA),
+        ("GET /api/export/pedidos?desde (lotes seguintes)", exportacao.sql_lotes_pedidos(True)[1], ('b', 'a', 1000), BUSCA),
+        ("GET /api/export/pedidos (itens)", exportacao.sql_items_lote(2), ('a', 'b'), BUSCA),
+        ("GET /api/export/produtos", exportacao.sql_lotes_produtos(False)[0], (1000,), VARREDURA),
+        ("GET /api/export/produtos (lotes seguintes)", exportacao.sql_lotes_produtos(False)[1], ('a', 'b', 1000), BUSCA),
+        ("GET /api/export/produtos?desde", exportacao.sql_lotes_produtos(True)[0], ('2026-01-01', 1000), BUSCA),
+        ("GET /api/export/produtos?desde (lotes seguintes)", exportacao.sql_lotes_produtos(True)[1], ('a', 'b', '2026-01-01', 1000), BUSCA),
+        ("GET /api/estatisticas", SQL_ESTATISTICAS, (), BUSCA),
+        ("GET /api/estatisticas?desde", SQL_ESTATISTICAS_POR_DIA, ('2026-01-01',), BUSCA),
+        ("DELETE /api/produtos/<codigo>", api.SQL_DELETAR_PRODUTO, ('A1',), BUSCA),
+        ("backfill de variantes", SQL_DIMENSOES, (1, 1, 'h'), BUSCA),
+    ]),
+    'chatbot': (MIGRACOES_CHATBOT, [
+        ("histórico recente da sessão", chatbot_api.SQL_HISTORICO_RECENTE, ('s', 5), BUSCA),
+        ("GET /api/chatbot/historico/<sessao>", chatbot_api.SQL_HISTORICO_SESSAO, ('s',), BUSCA),
+        ("GET /api/chatbot/estatisticas (hoje)", chatbot_api.SQL_SESSOES_HOJE, (), BUSCA),
+    ]),
+    'whatsapp': (MIGRACOES_WHATSAPP, [
+        ("POST /whatsapp/webhook (histórico)", whatsapp_bot.SQL_HISTORICO_RECENTE, ('1', 5), BUSCA),
+        ("GET /whatsapp/historico/<numero>", whatsapp_bot.SQL_HISTORICO_NUMERO, ('1',), BUSCA),
+        ("GET /whatsapp/clientes", whatsapp_bot.SQL_CLIENTES, (), VARREDURA),
+        ("GET /whatsapp/estatisticas (hoje)", whatsapp_bot.SQL_CLIENTES_HOJE, (), BUSCA),
+    ]),
+}
+
+
+def _busca_no_indice(detalhe):
+    # FTS5 com MATCH aparece como SCAN da tabela virtual com 'M' no idxStr
+    if detalhe.startswith('SCAN') and 'VIRTUAL TABLE INDEX' in detalhe:
+        return ':M' in detalhe
+    return detalhe.startswith('SEARCH')
+
+
+def usa_indice(plano, acesso=BUSCA):
+    """
+    Toda tabela acessada deve ser lida por índice (ou pela chave primária),
+    sem ordenação em árvore temporária; em BUSCA, só com SEARCH
+    """
+    for detalhe in plano:
+        if 'USE TEMP B-TREE' in detalhe:
+            return False
+        if not detalhe.startswith(('SCAN', 'SEARCH')):
+            continue
+        if 'INDEX' not in detalhe and 'PRIMARY KEY' not in detalhe:
+            return False
+        if acesso == BUSCA and not _busca_no_indice(detalhe):
+            return False
+    return True
+
+
+print("=" * 60)
+print("🧪 TESTE DE ÍNDICES (EXPLAIN QUERY PLAN)")
+print("=" * 60)
+
+falhas = 0
+with tempfile.TemporaryDirectory() as pasta:
+    for banco, (migracoes, consultas) in CONSULTAS.items():
+        print(f"\n📂 {banco}")
+        conn = sqlite3.connect(str(Path(pasta) / f"{banco}.db"))
+        aplicar_migracoes(conn, migracoes)
+
+        for endpoint, sql, params, acesso in consultas:
+            plano = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+            if usa_indice(plano, acesso):
+                print(f"✅ {endpoint}" + (" (varredura ordenada)" if acesso == VARREDURA else ""))
+            else:
+                falhas += 1
+                print(f"❌ {endpoint} (esperado: {acesso})")
+                for detalhe in plano:
+                    print(f"      {detalhe}")
+        conn.close()
+
+print("\n" + "=" * 60)
+if falhas:
+    print(f"❌ {falhas} consultas sem o acesso por índice esperado")
+    sys.exit(1)
+print("✅ SUCESSO! Todas as consultas usam índice")
+print("=" * 60)
@@ -0,0 +1,154 @@
+"""
+Teste do resumo incremental do catálogo
+Inserções, alterações de preço, exclusões e trocas de categoria aplicadas
+pela releitura incremental devem dar o mesmo resumo (preço mínimo, mediano
+e mais baratos) que um recálculo completo a partir do banco; e o chatbot
+não pode quebrar com um pedidos.db ainda sem as migrações
+"""
+from pathlib import Path
+import sqlite3
+import sys
+import tempfile
+
+from banco import obter_pool
+from migracoes import aplicar_migracoes, MIGRACOES_PEDIDOS
+from resumo_catalogo import ResumoCatalogo, categoria_efetiva
+import chatbot_api
+
+falhas = 0
+
+
+def verificar(descricao, condicao):
+    global falhas
+    if condicao:
+        print(f"✅ {descricao}")
+    else:
+        falhas += 1
+        print(f"❌ {descricao}")
+
+
+def recalcular(conn, top):
+    """Resumo esperado, calculado do zero direto das linhas de produtos"""
+    precos = {}
+    for codigo, categoria, titulo, preco in conn.execute(
+        "SELECT codigo, categoria, titulo, preco_varejo FROM produtos"
+    ):
+        lista = precos.setdefault(categoria_efetiva(categoria, titulo), [])
+        if preco is not None:
+            lista.append((preco, codigo))
+
+    esperado = {}
+    for categoria, lista in precos.items():
+        lista.sort()
+        meio = len(lista) // 2
+        if not lista:
+            mediano = None
+        elif len(lista) % 2:
+            mediano = lista[meio][0]
+        else:
+            mediano = round((lista[meio - 1][0] + lista[meio][0]) / 2, 2)
+        esperado[categoria] = {
+            'preco_min': lista[0][0] if lista else None,
+            'preco_mediano': mediano,
+            'mais_baratos': [codigo for _, codigo in lista[:top]],
+        }
+    return esperado
+
+
+def conferir(descricao, resumo, conn):
+    """Atualiza o resumo (incremental) e compara com o recálculo completo"""
+    incrementais = resumo.estatisticas()['incrementais']
+    resumo.atualizar(forcar=True)
+    verificar(f"{descricao}: aplicado pela releitura incremental",
+              resumo.estatisticas()['incrementais'] == incrementais + 1)
+
+    esperado = recalcular(conn, resumo.top)
+    obtido = {
+        nome: {
+            'preco_min': r['preco_min'],
+            'preco_mediano': r['preco_mediano'],
+            'mais_baratos': [item['codigo'] for item in r['mais_baratos']],
+        }
+        for nome, r in resumo.categorias().items()
+    }
+    verificar(f"{descricao}: igual ao recálculo completo", obtido == esperado)
+    if obtido != esperado:
+        for nome in sorted(set(obtido) | set(esperado)):
+            if obtido.get(nome) != esperado.get(nome):
+                print(f"      {nome}: obtido {obtido.get(nome)} / esperado {esperado.get(nome)}")
+
+
+print("=" * 60)
+print("🧪 TESTE DO RESUMO INCREMENTAL DO CATÁLOGO")
+print("=" * 60)
+
+with tempfile.TemporaryDirectory() as pasta:
+    caminho = str(Path(pasta) / "pedidos.db")
+    pool = obter_pool(caminho)
+    with pool.conexao() as conn:
+        aplicar_migracoes(conn, MIGRACOES_PEDIDOS)
+        conn.executemany(
+            "INSERT INTO produtos (codigo, titulo, categoria, preco_varejo) VALUES (?, ?, ?, ?)",
+            [(f"A{i}", f"Anel {i}", 'ANÉIS', 10.0 + i) for i in range(8)]
+            + [(f"B{i}", f"Brinco {i}", 'BRINCOS', 30.0 - i) for i in range(4)]
+            + [('C0', 'Colar sem preço', 'COLARES', None)]
+        )
+        conn.commit()
+
+    # Outra conexão escreve, como a API ou uma carga em outro processo
+    escrita = sqlite3.connect(caminho, isolation_level=None)
+
+    with pool.conexao() as conn:
+        resumo = ResumoCatalogo(pool, intervalo=0, top=3)
+        resumo.atualizar(forcar=True)
+        # Resumos já montados: a atualização precisa descartá-los
+        resumo.categorias()
+
+        print("\n📂 inserção")
+        escrita.executemany(
+            "INSERT INTO produtos (codigo, titulo, categoria, preco_varejo) VALUES (?, ?, ?, ?)",
+            [('A8', 'Anel barato', 'ANÉIS', 5.0), ('A9', 'Anel empatado', 'ANÉIS', 10.0),
+             ('X1', 'Pulseira sem categoria', None, 12.0)]
+        )
+        conferir("inserção", resumo, conn)
+
+        print("\n📂 alteração de preço")
+        escrita.execute("UPDATE produtos SET preco_varejo = 99.0 WHERE codigo = 'A8'")
+        escrita.execute("UPDATE produtos SET preco_varejo = 1.0 WHERE codigo = 'B0'")
+        escrita.execute("UPDATE produtos SET preco_varejo = 15.0 WHERE codigo = 'C0'")
+        conferir("alteração de preço", resumo, conn)
+
+        print("\n📂 exclusão")
+        escrita.execute("DELETE FROM produtos WHERE codigo IN ('A0', 'B0')")
+        conferir("exclusão", resumo, conn)
+
+        print("\n📂 troca de categoria")
+        escrita.execute("UPDATE produtos SET categoria = 'BRINCOS' WHERE codigo = 'A1'")
+        escrita.execute("UPDATE produtos SET categoria = 'COLARES', preco_varejo = 2.0 WHERE codigo = 'A2'")
+        escrita.execute("UPDATE produtos SET categoria = 'ANÉIS' WHERE codigo = 'X1'")
+        conferir("troca de categoria", resumo, conn)
+
+        print("\n📂 categoria esvaziada")
+        escrita.execute("DELETE FROM produtos WHERE categoria = 'COLARES'")
+        conferir("categoria esvaziada", resumo, conn)
+        verificar("COLARES sai do resumo", resumo.categoria('COLARES') is None)
+
+    escrita.close()
+
+    print("\n📂 pedidos.db sem migrações")
+    chatbot_api.pool_produtos = obter_pool(str(Path(pasta) / "vazio.db"))
+    try:
+        produtos = chatbot_api.buscar_produtos_relevantes("anel de prata")
+        verificar("buscar_produtos_relevantes não levanta e retorna []", produtos == [])
+    except Exception as e:
+        verificar(f"buscar_produtos_relevantes não levanta ({type(e).__name__}: {e})", False)
+
+    vazio = ResumoCatalogo(chatbot_api.pool_produtos, intervalo=0)
+    verificar("resumo segue sem carregar", vazio.atualizar(forcar=True) is False and not vazio.carregado)
+
+print("\n" + "=" * 60)
+if falhas:
+    print(f"❌ {falhas} verificações falharam")
+    sys.exit(1)
+print("✅ SUCESSO! O resumo incremental bate com o recálculo completo")
+print("=" * 60)
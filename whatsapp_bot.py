@@ -5,14 +5,29 @@ Sistema de atendimento SEM APIs externas
 """
 
 import json
-import sqlite3
 from datetime import datetime
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from chatbot_hibrido import gerar_resposta
+from banco import obter_pool
+from migracoes import aplicar_migracoes, MIGRACOES_WHATSAPP
+from respostas_http import otimizar_respostas
+from escrita_agrupada import escritor_opcional, gravar, FilaEscritaCheia, EscritaNaoConfirmada
+from metricas import instrumentar, medir_provedor
+from perfilador import registrar_perfilador
 
 app = Flask(__name__)
 
+# JSON via orjson (se instalado) e compressão gzip/brotli das respostas
+otimizar_respostas(app)
+
+# Contagem e latência por rota, SQL e caches em GET /metrics (Prometheus)
+instrumentar(app)
+
+# Perfis cProfile + pilhas de uma fração das requisições (PERFIL_FRACAO) ou
+# das que trazem X-Perfil-Token; consulta em /admin/perfis
+registrar_perfilador(app)
+
 # CORS configurado para GitHub Pages + Twilio
 CORS(app, resources={
     r"/*": {
@@ -33,54 +48,51 @@ CORS(app, resources={
 # Banco de dados para conversas WhatsApp
 DB_WHATSAPP = "whatsapp_conversas.db"
 
+pool_whatsapp = obter_pool(DB_WHATSAPP)
+
+# Group commit opcional das mensagens (ESCRITA_AGRUPADA)
+escritor_whatsapp = escritor_opcional(DB_WHATSAPP)
+
+# Consultas de leitura (testar_indices.py confere o plano destas mesmas strings)
+SQL_HISTORICO_RECENTE = """
+    SELECT mensagem_cliente, mensagem_bot 
+    FROM conversas_whatsapp 
+    WHERE numero_telefone = ? 
+    ORDER BY id DESC 
+    LIMIT ?
+"""
+SQL_HISTORICO_NUMERO = """
+    SELECT mensagem_cliente, mensagem_bot, timestamp, metadata
+    FROM conversas_whatsapp
+    WHERE numero_telefone = ?
+    ORDER BY id DESC
+    LIMIT 50
+"""
+SQL_CLIENTES = """
+    SELECT numero_telefone, nome, email, primeira_interacao, 
+           ultima_interacao, total_mensagens, status_cliente
+    FROM clientes_whatsapp
+    ORDER BY ultima_interacao DESC
+"""
+SQL_CLIENTES_HOJE = """
+    SELECT COUNT(*) FROM clientes_whatsapp 
+    WHERE ultima_interacao >= DATE('now') AND ultima_interacao < DATE('now', '+1 day')
+"""
+
 def init_whatsapp_db():
-    """Inicializa banco de dados WhatsApp"""
-    conn = sqlite3.connect(DB_WHATSAPP)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS conversas_whatsapp (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            numero_telefone TEXT NOT NULL,
-            mensagem_cliente TEXT NOT NULL,
-            mensagem_bot TEXT NOT NULL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            status TEXT DEFAULT 'enviada',
-            metadata TEXT
-        )
-    """)
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS clientes_whatsapp (
-            numero_telefone TEXT PRIMARY KEY,
-            nome TEXT,
-            email TEXT,
-            primeira_interacao DATETIME DEFAULT CURRENT_TIMESTAMP,
-            ultima_interacao DATETIME DEFAULT CURRENT_TIMESTAMP,
-            total_mensagens INTEGER DEFAULT 0,
-            status_cliente TEXT DEFAULT 'ativo'
-        )
-    """)
-    
-    conn.commit()
-    conn.close()
+    """Inicializa banco de dados WhatsApp (aplica as migrações pendentes)"""
+    with pool_whatsapp.conexao() as conn:
+        aplicar_migracoes(conn, MIGRACOES_WHATSAPP)
     print("✅ Banco WhatsApp inicializado!")
 
 def get_historico_whatsapp(numero, limite=10):
     """Busca histórico de conversa WhatsApp"""
-    conn = sqlite3.connect(DB_WHATSAPP)
-    cursor = conn.cursor()
+    with pool_whatsapp.conexao() as conn:
+        cursor = conn.cursor()
     
-    cursor.execute("""
-        SELECT mensagem_cliente, mensagem_bot 
-        FROM conversas_whatsapp 
-        WHERE numero_telefone = ? 
-        ORDER BY timestamp DESC 
-        LIMIT ?
-    """, (numero, limite))
+        cursor.execute(SQL_HISTORICO_RECENTE, (numero, limite))
     
-    historico = cursor.fetchall()
-    conn.close()
+        historico = cursor.fetchall()
     
     mensagens = []
     for cliente_msg, bot_msg in reversed(historico):
@@ -89,27 +101,29 @@ def get_historico_whatsapp(numero, limite=10):
     
     return mensagens
 
-def salvar_conversa_whatsapp(numero, mensagem_cliente, mensagem_bot, metadata=None):
-    """Salva conversa WhatsApp no banco"""
-    conn = sqlite3.connect(DB_WHATSAPP)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
+def _gravar_conversa_whatsapp(conn, numero, mensagem_cliente, mensagem_bot, metadata):
+    conn.execute("""
         INSERT INTO conversas_whatsapp (numero_telefone, mensagem_cliente, mensagem_bot, metadata)
         VALUES (?, ?, ?, ?)
-    """, (numero, mensagem_cliente, mensagem_bot, json.dumps(metadata or {})))
+    """, (numero, mensagem_cliente, mensagem_bot, metadata))
     
     # Atualizar cliente
-    cursor.execute("""
+    conn.execute("""
         INSERT INTO clientes_whatsapp (numero_telefone, ultima_interacao, total_mensagens)
         VALUES (?, CURRENT_TIMESTAMP, 1)
         ON CONFLICT(numero_telefone) DO UPDATE SET
             ultima_interacao = CURRENT_TIMESTAMP,
             total_mensagens = total_mensagens + 1
     """, (numero,))
-    
-    conn.commit()
-    conn.close()
+
+def salvar_conversa_whatsapp(numero, mensagem_cliente, mensagem_bot, metadata=None):
+    """Salva conversa WhatsApp no banco (em lote com outras se a escrita agrupada estiver ativa)"""
+    args = (numero, mensagem_cliente, mensagem_bot, json.dumps(metadata or {}))
+    if escritor_whatsapp is not None:
+        gravar(escritor_whatsapp, None, _gravar_conversa_whatsapp, *args)
+        return
+    with pool_whatsapp.conexao() as conn:
+        gravar(None, conn, _gravar_conversa_whatsapp, *args)
 
 def detectar_intencao(mensagem):
     """Detecta a intenção do cliente usando IA"""
@@ -132,7 +146,8 @@ Responda apenas com a categoria.
 """
     
     try:
-        intencao = gerar_resposta(f"Classifique a intenção: {mensagem}", 'whatsapp')
+        with medir_provedor('hibrido'):
+            intencao = gerar_resposta(f"Classifique a intenção: {mensagem}", 'whatsapp')
         return intencao.strip().lower()[:20]  # Primeiras palavras
     except:
         return "duvida"
@@ -166,7 +181,8 @@ def whatsapp_webhook():
         historico_simples = [(msg_cliente, msg_bot) for msg_cliente, msg_bot in historico]
 
         # Gerar resposta
-        resposta = gerar_resposta(mensagem, 'whatsapp', historico_simples)
+        with medir_provedor('hibrido'):
+            resposta = gerar_resposta(mensagem, 'whatsapp', historico_simples)
         
         if not resposta:
             resposta = "Desculpe, estou com dificuldades. Um atendente humano entrará em contato em breve!"
@@ -185,6 +201,9 @@ def whatsapp_webhook():
             'intencao': intencao
         })
         
+    except (FilaEscritaCheia, EscritaNaoConfirmada) as e:
+        # A conversa ainda pode ser gravada: não é uma recusa da mensagem
+        return jsonify({'erro': 'Servidor ocupado, tente novamente', 'detalhes': str(e)}), 503
     except Exception as e:
         print(f"❌ Erro no webhook WhatsApp: {e}")
         return jsonify({'erro': str(e)}), 500
@@ -215,27 +234,19 @@ def enviar_whatsapp():
 def historico_whatsapp(numero):
     """Retorna histórico de conversa de um número"""
     try:
-        conn = sqlite3.connect(DB_WHATSAPP)
-        cursor = conn.cursor()
+        with pool_whatsapp.conexao() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT mensagem_cliente, mensagem_bot, timestamp, metadata
-            FROM conversas_whatsapp
-            WHERE numero_telefone = ?
-            ORDER BY timestamp DESC
-            LIMIT 50
-        """, (numero,))
+            cursor.execute(SQL_HISTORICO_NUMERO, (numero,))
         
-        conversas = []
-        for row in cursor.fetchall():
-            conversas.append({
-                'cliente': row[0],
-                'bot': row[1],
-                'timestamp': row[2],
-                'metadata': json.loads(row[3]) if row[3] else {}
-            })
-        
-        conn.close()
+            conversas = []
+            for row in cursor.fetchall():
+                conversas.append({
+                    'cliente': row[0],
+                    'bot': row[1],
+                    'timestamp': row[2],
+                    'metadata': json.loads(row[3]) if row[3] else {}
+                })
         
         return jsonify({
             'numero': numero,
@@ -250,29 +261,22 @@ def historico_whatsapp(numero):
 def listar_clientes_whatsapp():
     """Lista todos os clientes que interagiram via WhatsApp"""
     try:
-        conn = sqlite3.connect(DB_WHATSAPP)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT numero_telefone, nome, email, primeira_interacao, 
-                   ultima_interacao, total_mensagens, status_cliente
-            FROM clientes_whatsapp
-            ORDER BY ultima_interacao DESC
-        """)
+        with pool_whatsapp.conexao() as conn:
+            cursor = conn.cursor()
         
-        clientes = []
-        for row in cursor.fetchall():
-            clientes.append({
-                'numero': row[0],
-                'nome': row[1],
-                'email': row[2],
-                'primeira_interacao': row[3],
-                'ultima_interacao': row[4],
-                'total_mensagens': row[5],
-                'status': row[6]
-            })
+            cursor.execute(SQL_CLIENTES)
         
-        conn.close()
+            clientes = []
+            for row in cursor.fetchall():
+                clientes.append({
+                    'numero': row[0],
+                    'nome': row[1],
+                    'email': row[2],
+                    'primeira_interacao': row[3],
+                    'ultima_interacao': row[4],
+                    'total_mensagens': row[5],
+                    'status': row[6]
+                })
         
         return jsonify({
             'total': len(clientes),
@@ -282,32 +286,34 @@ def listar_clientes_whatsapp():
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
+@app.route('/whatsapp/escrita', methods=['GET'])
+def metricas_escrita_whatsapp():
+    """Fila e tamanho dos lotes do escritor agrupado"""
+    if escritor_whatsapp is None:
+        return jsonify({'ativo': False})
+    return jsonify({'ativo': True, **escritor_whatsapp.metricas()})
+
 @app.route('/whatsapp/estatisticas', methods=['GET'])
 def estatisticas_whatsapp():
     """Retorna estatísticas do atendimento WhatsApp"""
     try:
-        conn = sqlite3.connect(DB_WHATSAPP)
-        cursor = conn.cursor()
-        
-        # Total de clientes
-        cursor.execute("SELECT COUNT(*) FROM clientes_whatsapp")
-        total_clientes = cursor.fetchone()[0]
+        with pool_whatsapp.conexao() as conn:
+            cursor = conn.cursor()
         
-        # Total de mensagens
-        cursor.execute("SELECT COUNT(*) FROM conversas_whatsapp")
-        total_mensagens = cursor.fetchone()[0]
+            # Total de clientes
+            cursor.execute("SELECT COUNT(*) FROM clientes_whatsapp")
+            total_clientes = cursor.fetchone()[0]
         
-        # Clientes hoje
-        cursor.execute("""
-            SELECT COUNT(*) FROM clientes_whatsapp 
-            WHERE DATE(ultima_interacao) = DATE('now')
-        """)
-        clientes_hoje = cursor.fetchone()[0]
+            # Total de mensagens
+            cursor.execute("SELECT COUNT(*) FROM conversas_whatsapp")
+            total_mensagens = cursor.fetchone()[0]
         
-        # Média de mensagens
-        media = total_mensagens / total_clientes if total_clientes > 0 else 0
+            # Clientes hoje
+            cursor.execute(SQL_CLIENTES_HOJE)
+            clientes_hoje = cursor.fetchone()[0]
         
-        conn.close()
+            # Média de mensagens
+            media = total_mensagens / total_clientes if total_clientes > 0 else 0
         
         return jsonify({
             'total_clientes': total_clientes,